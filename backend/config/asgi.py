@@ -2,6 +2,10 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The real-time event stream (/api/events/) holds connections open and must be
+served through this entry point (e.g. ``uvicorn config.asgi:application``),
+as must /api/telemetry/ingest/, whose queued readings are flushed on lifespan
+shutdown.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +17,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.ingest_queue import with_lifespan  # noqa: E402  (needs django.setup())
+
+application = with_lifespan(django_application)
@@ -125,6 +125,67 @@ REST_FRAMEWORK = {
     }
 }
 
+# Telemetry bulk ingestion
+TELEMETRY_BULK_CHUNK_SIZE = config('TELEMETRY_BULK_CHUNK_SIZE', default=500, cast=int)
+TELEMETRY_BULK_MAX_ROWS = config('TELEMETRY_BULK_MAX_ROWS', default=50000, cast=int)
+
+# Telemetry processing: evaluate readings in the request, or leave them for
+# `manage.py process_telemetry` workers when ingestion should stay write-only
+TELEMETRY_INLINE_PROCESSING = config('TELEMETRY_INLINE_PROCESSING', default=True, cast=bool)
+TELEMETRY_WORKER_BATCH_SIZE = config('TELEMETRY_WORKER_BATCH_SIZE', default=1000, cast=int)
+TELEMETRY_WORKER_IDLE_SLEEP = config('TELEMETRY_WORKER_IDLE_SLEEP', default=1.0, cast=float)
+
+# Trigger rules are indexed in each process and reloaded when a rule changes.
+# That reload reaches other processes only through a shared cache (Redis);
+# without one they reload once their index is TRIGGER_INDEX_MAX_AGE seconds old
+TRIGGER_INDEX_MAX_AGE = config('TRIGGER_INDEX_MAX_AGE', default=60, cast=int)
+
+# Statistical anomaly detection (see core/anomaly.py): 'ewma' z-scores, or
+# 'mad' for robust median/MAD z-scores over the last TELEMETRY_ANOMALY_WINDOW values
+TELEMETRY_ANOMALY_DETECTION = config('TELEMETRY_ANOMALY_DETECTION', default=True, cast=bool)
+TELEMETRY_ANOMALY_METHOD = config('TELEMETRY_ANOMALY_METHOD', default='ewma')
+TELEMETRY_ANOMALY_ALPHA = config('TELEMETRY_ANOMALY_ALPHA', default=0.05, cast=float)
+TELEMETRY_ANOMALY_THRESHOLD = config('TELEMETRY_ANOMALY_THRESHOLD', default=4.0, cast=float)
+TELEMETRY_ANOMALY_WARMUP = config('TELEMETRY_ANOMALY_WARMUP', default=30, cast=int)
+TELEMETRY_ANOMALY_WINDOW = config('TELEMETRY_ANOMALY_WINDOW', default=64, cast=int)
+
+# Equipment health scoring (`manage.py score_health`, see core/health.py):
+# inputs are read over the last HEALTH_WINDOW_DAYS, and scores older than
+# HEALTH_RESCORE_HOURS are refreshed even when nothing marked them dirty
+HEALTH_WINDOW_DAYS = config('HEALTH_WINDOW_DAYS', default=7, cast=int)
+HEALTH_RESCORE_HOURS = config('HEALTH_RESCORE_HOURS', default=24, cast=int)
+HEALTH_BATCH_SIZE = config('HEALTH_BATCH_SIZE', default=1000, cast=int)
+
+# Columnar storage: `manage.py compact_telemetry` moves processed readings
+# older than TELEMETRY_COMPACT_AFTER_DAYS into compressed per-day chunks that
+# /api/telemetry/ reads alongside the live rows
+TELEMETRY_COLUMNAR_STORAGE = config('TELEMETRY_COLUMNAR_STORAGE', default=False, cast=bool)
+TELEMETRY_COMPACT_AFTER_DAYS = config('TELEMETRY_COMPACT_AFTER_DAYS', default=7, cast=int)
+TELEMETRY_CHUNK_VALUE_TYPE = config('TELEMETRY_CHUNK_VALUE_TYPE', default='float64')
+
+# Retention (`manage.py apply_retention`): days to keep each tier, None keeps
+# it forever. Parameters without their own entry use 'default', e.g. add
+# 'Vibration': {'raw': 30} to keep raw vibration readings longer
+TELEMETRY_RETENTION = {
+    'default': {
+        'raw': config('TELEMETRY_RAW_RETENTION_DAYS', default=14, cast=int),
+        '1m': config('TELEMETRY_MINUTE_ROLLUP_RETENTION_DAYS', default=90, cast=int),
+        '1h': config('TELEMETRY_HOURLY_ROLLUP_RETENTION_DAYS', default=730, cast=int),
+        '1d': None,
+    },
+}
+TELEMETRY_RETENTION_BATCH_SIZE = config('TELEMETRY_RETENTION_BATCH_SIZE', default=5000, cast=int)
+
+# PostgreSQL range partitioning of raw telemetry (`manage.py partition_telemetry`)
+TELEMETRY_PARTITION_INTERVAL = config('TELEMETRY_PARTITION_INTERVAL', default='day')
+TELEMETRY_PARTITION_PREMAKE = config('TELEMETRY_PARTITION_PREMAKE', default=7, cast=int)
+
+# Async ingestion (/api/telemetry/ingest/, served under ASGI)
+TELEMETRY_ASYNC_QUEUE_SIZE = config('TELEMETRY_ASYNC_QUEUE_SIZE', default=100000, cast=int)
+TELEMETRY_ASYNC_BATCH_SIZE = config('TELEMETRY_ASYNC_BATCH_SIZE', default=1000, cast=int)
+TELEMETRY_ASYNC_FLUSH_INTERVAL = config('TELEMETRY_ASYNC_FLUSH_INTERVAL', default=0.5, cast=float)
+TELEMETRY_ASYNC_MAX_RETRIES = config('TELEMETRY_ASYNC_MAX_RETRIES', default=3, cast=int)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('ACCESS_TOKEN_LIFETIME', default=60, cast=int)),
@@ -155,6 +216,65 @@ else:
         }
     }
 
+# Response cache for read-heavy endpoints (see core/cache.py)
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Reporting KPIs (/api/analytics/): per-month ticket buckets are cached
+# until a ticket in that month changes, or for ANALYTICS_CACHE_TIMEOUT seconds
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=86400, cast=int)
+ANALYTICS_DEFAULT_MONTHS = config('ANALYTICS_DEFAULT_MONTHS', default=12, cast=int)
+ANALYTICS_MAX_MONTHS = config('ANALYTICS_MAX_MONTHS', default=120, cast=int)
+
+# Dashboard summary (/api/dashboard/summary/): equipment below
+# DASHBOARD_CRITICAL_HEALTH counts as critical, and technician utilization is
+# open assigned tickets over DASHBOARD_TECHNICIAN_CAPACITY tickets each
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=30, cast=int)
+DASHBOARD_CRITICAL_HEALTH = config('DASHBOARD_CRITICAL_HEALTH', default=40, cast=int)
+DASHBOARD_TECHNICIAN_CAPACITY = config('DASHBOARD_TECHNICIAN_CAPACITY', default=5, cast=int)
+
+# Full-text search (/api/search/ and ?search= on tickets, equipment and messages)
+SEARCH_RESULTS_LIMIT = config('SEARCH_RESULTS_LIMIT', default=20, cast=int)
+SEARCH_MAX_RESULTS = config('SEARCH_MAX_RESULTS', default=100, cast=int)
+SEARCH_MAX_TERMS = config('SEARCH_MAX_TERMS', default=8, cast=int)
+
+# Equipment autocomplete (/api/equipment/autocomplete/)
+AUTOCOMPLETE_LIMIT = config('AUTOCOMPLETE_LIMIT', default=10, cast=int)
+AUTOCOMPLETE_MAX_LIMIT = config('AUTOCOMPLETE_MAX_LIMIT', default=50, cast=int)
+AUTOCOMPLETE_MIN_CHARS = config('AUTOCOMPLETE_MIN_CHARS', default=1, cast=int)
+# Like the trigger index, the in-process prefix index (non-PostgreSQL) hears
+# about equipment edits in other processes only through a shared cache
+AUTOCOMPLETE_INDEX_MAX_AGE = config('AUTOCOMPLETE_INDEX_MAX_AGE', default=300, cast=int)
+
+# Serialize /api/tickets/ and /api/telemetry/ lists from values() rows with
+# compiled converters instead of ModelSerializer (see core/fastpath.py)
+FAST_LIST_SERIALIZATION = config('FAST_LIST_SERIALIZATION', default=False, cast=bool)
+
+# Streaming exports (/api/telemetry/export/, /api/tickets/export/ and
+# `manage.py export_history`): rows fetched per cursor round trip and encoded
+# per CSV/NDJSON write or Parquet row group
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=5000, cast=int)
+
+# Delta sync (/api/sync/)
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=5, cast=int)
+# Tombstones older than this are pruned by `manage.py apply_retention`;
+# clients whose cursor predates that must start a full sync
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=90, cast=int)
+
+# Real-time event stream (/api/events/, served under ASGI)
+# The in-process broker only reaches clients of the process that published
+# the event. Anomalies are published by the process_telemetry worker and
+# other events by whichever worker handled the write, so any deployment
+# with a worker or more than one process needs core.events.RedisBroker
+EVENTS_BROKER = config(
+    'EVENTS_BROKER',
+    default='core.events.InProcessBroker' if DEBUG else 'core.events.RedisBroker'
+)
+EVENTS_REDIS_URL = config('EVENTS_REDIS_URL', default=config('REDIS_URL', default='redis://127.0.0.1:6379/1'))
+EVENTS_SUBSCRIBER_QUEUE_SIZE = config('EVENTS_SUBSCRIBER_QUEUE_SIZE', default=1000, cast=int)
+EVENTS_HEARTBEAT_SECONDS = config('EVENTS_HEARTBEAT_SECONDS', default=15, cast=int)
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     User, MaintenanceTeam, AssetHierarchy, Equipment,
-    MaintenanceTrigger, MachineTelemetryLog, Ticket, Message
+    MaintenanceTrigger, MachineTelemetryLog, TelemetryRollup, TelemetryChunk, AnomalyState, Ticket,
+    Message, SyncTombstone
 )
 
 
@@ -47,6 +48,28 @@ class MachineTelemetryLogAdmin(admin.ModelAdmin):
     date_hierarchy = 'reading_date_time'
 
 
+@admin.register(TelemetryRollup)
+class TelemetryRollupAdmin(admin.ModelAdmin):
+    list_display = ['equipment', 'parameter_type', 'resolution', 'bucket_start', 'reading_count', 'value_min', 'value_max']
+    list_filter = ['resolution', 'parameter_type']
+    date_hierarchy = 'bucket_start'
+
+
+@admin.register(AnomalyState)
+class AnomalyStateAdmin(admin.ModelAdmin):
+    list_display = ['equipment', 'parameter_type', 'reading_count', 'ewma_mean', 'ewma_variance', 'last_reading_at']
+    list_filter = ['parameter_type']
+    exclude = ['window']
+
+
+@admin.register(TelemetryChunk)
+class TelemetryChunkAdmin(admin.ModelAdmin):
+    list_display = ['equipment', 'parameter_type', 'day', 'reading_count', 'value_type', 'stored_bytes']
+    list_filter = ['parameter_type', 'value_type']
+    date_hierarchy = 'day'
+    exclude = ['timestamps', 'values', 'anomalies']
+
+
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
     list_display = ['title', 'equipment', 'stage', 'priority', 'request_type', 'assigned_technician', 'created_at']
@@ -55,6 +78,13 @@ class TicketAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
+@admin.register(SyncTombstone)
+class SyncTombstoneAdmin(admin.ModelAdmin):
+    list_display = ['model_name', 'object_id', 'deleted_at']
+    list_filter = ['model_name']
+    date_hierarchy = 'deleted_at'
+
+
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ['ticket', 'user', 'type', 'content_preview', 'created_at']
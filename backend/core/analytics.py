@@ -0,0 +1,348 @@
+"""
+Maintenance KPIs for the Reporting page
+
+Ticket history is summarised into one bucket per calendar month (UTC):
+
+* tickets created, and failures among them (Corrective and Condition_Based
+  requests);
+* tickets repaired, by completion month, with the summed repair time
+  (``completion_date - created_at``) and logged ``duration_hours``, split per
+  technician and with failures counted separately.
+
+Buckets hold sums and counts only, so any range of months merges into MTTR,
+MTBF, downtime, availability and failure rates without touching the
+tickets again. Each month is cached under its own generation counter,
+which the ticket signals bump for the months a ticket was created or
+completed in; a request recomputes only the months that changed, with
+two grouped queries however many are missing.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Min, Q, Sum, Value
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .cache import bump_generation, scope_generations
+from .models import Equipment, Ticket, User
+from .triggers import OPEN_STAGES
+
+
+FAILURE_TYPES = ('Corrective', 'Condition_Based')
+BUCKET_KEY = 'core:analytics:{month}:{generation}'
+EQUIPMENT_KEY = 'core:analytics:equipment:{generation}'
+DASHBOARD_KEY = 'core:dashboard:summary'
+BACKLOG_AGES = (('under_1d', 1), ('1_7d', 7), ('7_30d', 30))
+
+
+def month_key(moment):
+    return moment.astimezone(dt_timezone.utc).strftime('%Y-%m')
+
+
+def month_start(key):
+    return datetime.strptime(key, '%Y-%m').replace(tzinfo=dt_timezone.utc)
+
+
+def next_month(start):
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def month_range(first, last):
+    """Month keys from ``first`` to ``last`` inclusive"""
+    keys = []
+    start, end = month_start(first), month_start(last)
+    while start <= end:
+        keys.append(start.strftime('%Y-%m'))
+        start = next_month(start)
+    return keys
+
+
+def shift_months(key, count):
+    start = month_start(key)
+    index = start.year * 12 + start.month - 1 + count
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+def invalidate_months(moments):
+    """Drop the cached buckets of the months ``moments`` fall in"""
+    for month in {month_key(moment) for moment in moments if moment}:
+        bump_generation(f'analytics:{month}')
+
+
+def _empty_bucket():
+    return {
+        'created': 0, 'failures': 0,
+        'repaired': 0, 'repair_seconds': 0.0, 'work_hours': 0.0,
+        'failures_repaired': 0, 'downtime_seconds': 0.0,
+        'technicians': {},
+    }
+
+
+def _seconds(duration):
+    return duration.total_seconds() if duration else 0.0
+
+
+def compute_buckets(months):
+    """Build the buckets of ``months`` from the tickets with two grouped queries"""
+    buckets = {month: _empty_bucket() for month in months}
+    if not months:
+        return buckets
+    ordered = sorted(months)
+    since, until = month_start(ordered[0]), next_month(month_start(ordered[-1]))
+
+    created = Ticket.objects.filter(
+        created_at__gte=since, created_at__lt=until
+    ).order_by().annotate(month=TruncMonth('created_at', tzinfo=dt_timezone.utc)).values('month').annotate(
+        created=Count('id'),
+        failures=Count('id', filter=Q(request_type__in=FAILURE_TYPES)),
+    )
+    for row in created:
+        bucket = buckets.get(month_key(row['month']))
+        if bucket is not None:
+            bucket['created'] = row['created']
+            bucket['failures'] = row['failures']
+
+    repair_time = ExpressionWrapper(F('completion_date') - F('created_at'), output_field=DurationField())
+    failure = Q(request_type__in=FAILURE_TYPES)
+    repaired = Ticket.objects.filter(
+        stage='Repaired', completion_date__gte=since, completion_date__lt=until
+    ).order_by().annotate(
+        month=TruncMonth('completion_date', tzinfo=dt_timezone.utc)
+    ).values('month', 'assigned_technician_id').annotate(
+        closed=Count('id'),
+        repair_time=Sum(repair_time),
+        work_hours=Sum('duration_hours'),
+        failures_closed=Count('id', filter=failure),
+        downtime=Sum(repair_time, filter=failure),
+    )
+    for row in repaired:
+        bucket = buckets.get(month_key(row['month']))
+        if bucket is None:
+            continue
+        repair_seconds = _seconds(row['repair_time'])
+        work_hours = float(row['work_hours'] or 0)
+        bucket['repaired'] += row['closed']
+        bucket['repair_seconds'] += repair_seconds
+        bucket['work_hours'] += work_hours
+        bucket['failures_repaired'] += row['failures_closed']
+        bucket['downtime_seconds'] += _seconds(row['downtime'])
+        if row['assigned_technician_id']:
+            bucket['technicians'][str(row['assigned_technician_id'])] = {
+                'closed': row['closed'],
+                'repair_seconds': repair_seconds,
+                'work_hours': work_hours,
+            }
+    return buckets
+
+
+def month_buckets(months):
+    """Cached buckets for ``months``, recomputing only the stale ones"""
+    generations = scope_generations([f'analytics:{month}' for month in months]).split('.')
+    keys = {
+        month: BUCKET_KEY.format(month=month, generation=generation)
+        for month, generation in zip(months, generations)
+    }
+    found = cache.get_many(list(keys.values()))
+    buckets = {month: found[key] for month, key in keys.items() if key in found}
+
+    missing = [month for month in months if month not in buckets]
+    if missing:
+        computed = compute_buckets(missing)
+        cache.set_many(
+            {keys[month]: bucket for month, bucket in computed.items()},
+            settings.ANALYTICS_CACHE_TIMEOUT,
+        )
+        buckets.update(computed)
+    return buckets
+
+
+def equipment_in_service(months):
+    """
+    ``{month: equipment count}`` of assets registered by the end of each
+    month, cached until the next equipment change.
+    """
+    key = EQUIPMENT_KEY.format(generation=scope_generations(['equipment']))
+    registered = cache.get(key)
+    if registered is None:
+        registered = {
+            month_key(row['month']): row['count']
+            for row in Equipment.objects.order_by().annotate(
+                month=TruncMonth('created_at', tzinfo=dt_timezone.utc)
+            ).values('month').annotate(count=Count('id'))
+        }
+        cache.set(key, registered, settings.ANALYTICS_CACHE_TIMEOUT)
+
+    counts = {}
+    for month in months:
+        counts[month] = sum(count for registered_month, count in registered.items() if registered_month <= month)
+    return counts
+
+
+def _service_hours(month, assets, now):
+    start = month_start(month)
+    end = min(next_month(start), now)
+    return max(0.0, (end - start).total_seconds() / 3600) * assets
+
+
+def _ratio(numerator, denominator, digits=2):
+    return round(numerator / denominator, digits) if denominator else None
+
+
+def summarize(buckets, in_service, months, now):
+    """Merge month buckets into the KPIs of a period"""
+    totals = _empty_bucket()
+    service_hours = 0.0
+    for month in months:
+        bucket = buckets[month]
+        for field in ('created', 'failures', 'repaired', 'repair_seconds', 'work_hours',
+                      'failures_repaired', 'downtime_seconds'):
+            totals[field] += bucket[field]
+        service_hours += _service_hours(month, in_service[month], now)
+
+    downtime_hours = totals['downtime_seconds'] / 3600
+    return {
+        'tickets_created': totals['created'],
+        'tickets_repaired': totals['repaired'],
+        'failures': totals['failures'],
+        'mttr_hours': _ratio(downtime_hours, totals['failures_repaired']),
+        'mtbf_hours': _ratio(service_hours, totals['failures']),
+        'downtime_hours': round(downtime_hours, 2),
+        'availability': _ratio(service_hours - downtime_hours, service_hours, 4),
+        'work_hours': round(totals['work_hours'], 2),
+    }
+
+
+def monthly_series(buckets, in_service, months):
+    series = []
+    for month in months:
+        bucket = buckets[month]
+        series.append({
+            'month': month,
+            'tickets_created': bucket['created'],
+            'tickets_repaired': bucket['repaired'],
+            'failures': bucket['failures'],
+            'equipment_in_service': in_service[month],
+            'failure_rate': _ratio(bucket['failures'], in_service[month], 4),
+            'mttr_hours': _ratio(bucket['downtime_seconds'] / 3600, bucket['failures_repaired']),
+            'downtime_hours': round(bucket['downtime_seconds'] / 3600, 2),
+        })
+    return series
+
+
+def technician_performance(buckets, months):
+    """Closed tasks per technician over ``months``, most productive first"""
+    merged = {}
+    for month in months:
+        for technician, stats in buckets[month]['technicians'].items():
+            entry = merged.setdefault(technician, {'closed': 0, 'repair_seconds': 0.0, 'work_hours': 0.0})
+            for field in entry:
+                entry[field] += stats[field]
+
+    names = {
+        str(user.id): user.get_full_name() or user.username
+        for user in User.objects.filter(id__in=list(merged)).only('id', 'username', 'first_name', 'last_name')
+    }
+    rows = [
+        {
+            'technician': technician,
+            'name': names.get(technician),
+            'tasks_closed': stats['closed'],
+            'avg_repair_hours': _ratio(stats['repair_seconds'] / 3600, stats['closed']),
+            'work_hours': round(stats['work_hours'], 2),
+        }
+        for technician, stats in merged.items()
+    ]
+    rows.sort(key=lambda row: (-row['tasks_closed'], row['name'] or ''))
+    return rows
+
+
+def backlog(now):
+    """Age profile of the open tickets, aggregated in one query"""
+    age = ExpressionWrapper(Value(now) - F('created_at'), output_field=DurationField())
+    counts = {
+        name: Count('id', filter=Q(created_at__gt=now - timedelta(days=days)))
+        for name, days in BACKLOG_AGES
+    }
+    stats = Ticket.objects.filter(stage__in=OPEN_STAGES).order_by().aggregate(
+        open=Count('id'), total_age=Sum(age), oldest=Min('created_at'), **counts
+    )
+    by_age, younger = {}, 0
+    for name, _ in BACKLOG_AGES:
+        by_age[name] = stats[name] - younger
+        younger = stats[name]
+    by_age['over_30d'] = stats['open'] - younger
+    return {
+        'open_tickets': stats['open'],
+        'avg_age_hours': _ratio(_seconds(stats['total_age']) / 3600, stats['open']),
+        'oldest_age_hours': round((now - stats['oldest']).total_seconds() / 3600, 2) if stats['oldest'] else None,
+        'by_age': by_age,
+    }
+
+
+def report(first, last, now=None):
+    """
+    KPIs for the months ``first``..``last`` (``YYYY-MM``), with the same
+    KPIs for the preceding period of equal length for trend arrows.
+    """
+    now = now or timezone.now()
+    months = month_range(first, last)
+    previous = month_range(shift_months(first, -len(months)), shift_months(first, -1))
+    buckets = month_buckets(previous + months)
+    in_service = equipment_in_service(previous + months)
+    return {
+        'from': first,
+        'to': last,
+        'summary': summarize(buckets, in_service, months, now),
+        'previous': summarize(buckets, in_service, previous, now),
+        'monthly': monthly_series(buckets, in_service, months),
+        'technicians': technician_performance(buckets, months),
+        'backlog': backlog(now),
+    }
+
+
+def dashboard_summary(now=None):
+    """
+    Headline counts for the dashboard: one aggregate query each over
+    equipment, tickets and technicians, cached for
+    ``DASHBOARD_CACHE_TIMEOUT`` seconds since overdue counts age with time.
+    """
+    summary = cache.get(DASHBOARD_KEY)
+    if summary is not None:
+        return summary
+
+    now = now or timezone.now()
+    in_service = ~Q(status='Scrapped')
+    equipment = Equipment.objects.order_by().aggregate(
+        total=Count('id', filter=in_service),
+        under_maintenance=Count('id', filter=Q(status='Under Maintenance')),
+        critical=Count('id', filter=in_service & (
+            Q(status='Under Maintenance') | Q(health_score__lt=settings.DASHBOARD_CRITICAL_HEALTH)
+        )),
+    )
+    open_tickets = Q(stage__in=OPEN_STAGES)
+    tickets = Ticket.objects.order_by().aggregate(
+        open=Count('id', filter=open_tickets),
+        pending=Count('id', filter=Q(stage='New')),
+        in_progress=Count('id', filter=Q(stage='In Progress')),
+        overdue=Count('id', filter=open_tickets & Q(scheduled_date__lt=now)),
+        assigned=Count('id', filter=open_tickets & Q(assigned_technician__isnull=False)),
+    )
+    technicians = User.objects.filter(role='technician', is_active=True).order_by().aggregate(
+        total=Count('id', distinct=True),
+        busy=Count('id', distinct=True, filter=Q(assigned_tickets__stage__in=OPEN_STAGES)),
+    )
+
+    capacity = technicians['total'] * settings.DASHBOARD_TECHNICIAN_CAPACITY
+    summary = {
+        'equipment': equipment,
+        'tickets': tickets,
+        'technicians': {
+            **technicians,
+            'utilization': _ratio(tickets['assigned'], capacity, 4),
+        },
+        'generated_at': now,
+    }
+    cache.set(DASHBOARD_KEY, summary, settings.DASHBOARD_CACHE_TIMEOUT)
+    return summary
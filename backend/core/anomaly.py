@@ -0,0 +1,171 @@
+"""
+Statistical anomaly detection for telemetry
+
+Each (equipment, parameter) series keeps an exponentially weighted moving
+mean and variance, updated in O(1) per reading:
+
+    delta = x - mean
+    mean += alpha * delta
+    variance = (1 - alpha) * (variance + alpha * delta ** 2)
+
+A reading is scored against the statistics as they stood before it
+arrived, and flagged when ``|z| >= TELEMETRY_ANOMALY_THRESHOLD`` once the
+series has seen ``TELEMETRY_ANOMALY_WARMUP`` readings. With
+``TELEMETRY_ANOMALY_METHOD = 'mad'`` the score is the robust z-score
+``0.6745 * (x - median) / MAD`` over the last ``TELEMETRY_ANOMALY_WINDOW``
+values instead, which a burst of outliers cannot drag along; the EWMA is
+maintained either way. Every reading updates the statistics, anomalous or
+not, which keeps the update linear: ``manage.py backfill_anomalies``
+replays whole series with NumPy and reproduces the online scores for
+readings that arrived in time order.
+"""
+
+import math
+import sys
+from array import array
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import AnomalyState
+
+
+MAD_SCALE = 0.6745
+
+DetectorConfig = namedtuple('DetectorConfig', 'method alpha threshold warmup window')
+
+
+def detector_config():
+    return DetectorConfig(
+        method=settings.TELEMETRY_ANOMALY_METHOD,
+        alpha=settings.TELEMETRY_ANOMALY_ALPHA,
+        threshold=settings.TELEMETRY_ANOMALY_THRESHOLD,
+        warmup=settings.TELEMETRY_ANOMALY_WARMUP,
+        window=settings.TELEMETRY_ANOMALY_WINDOW,
+    )
+
+
+def pack_window(values):
+    data = array('d', values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def unpack_window(blob):
+    data = array('d')
+    data.frombytes(bytes(blob))
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return list(data)
+
+
+def _median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def robust_z(value, window):
+    median = _median(window)
+    mad = _median([abs(item - median) for item in window])
+    if mad == 0:
+        return 0.0 if value == median else math.inf
+    return MAD_SCALE * (value - median) / mad
+
+
+def score(state, window, value, config):
+    """
+    Z-score of ``value`` against the series state, then fold the value in.
+
+    ``window`` is the decoded list of recent values and is updated in
+    place; returns None while the series is still warming up.
+    """
+    z = None
+    if state.reading_count >= config.warmup:
+        if config.method == 'mad':
+            if window:
+                z = robust_z(value, window)
+        elif state.ewma_variance > 0:
+            z = (value - state.ewma_mean) / math.sqrt(state.ewma_variance)
+
+    if state.reading_count == 0:
+        state.ewma_mean = value
+        state.ewma_variance = 0.0
+    else:
+        delta = value - state.ewma_mean
+        state.ewma_mean += config.alpha * delta
+        state.ewma_variance = (1 - config.alpha) * (state.ewma_variance + config.alpha * delta * delta)
+    state.reading_count += 1
+
+    if config.method == 'mad':
+        window.append(value)
+        del window[:-config.window]
+    return z
+
+
+def is_anomalous(z, config):
+    return z is not None and abs(z) >= config.threshold
+
+
+def load_states(keys, lock=False):
+    """
+    Fetch (creating when missing) the states for ``(equipment_id, parameter)``
+    keys, locking them for the rest of the transaction when ``lock`` is set.
+    """
+    if not keys:
+        return {}
+    AnomalyState.objects.bulk_create(
+        [AnomalyState(equipment_id=equipment_id, parameter_type=parameter) for equipment_id, parameter in keys],
+        ignore_conflicts=True,
+    )
+    equipment_ids = {equipment_id for equipment_id, _ in keys}
+    parameters = {parameter for _, parameter in keys}
+    queryset = AnomalyState.objects.filter(
+        equipment_id__in=equipment_ids, parameter_type__in=parameters
+    ).order_by('equipment_id', 'parameter_type')
+    if lock:
+        queryset = queryset.select_for_update()
+    return {
+        (state.equipment_id, state.parameter_type): state
+        for state in queryset
+        if (state.equipment_id, state.parameter_type) in keys
+    }
+
+
+def detect_anomalies(readings):
+    """
+    Score a batch of readings and set ``is_anomaly`` on each of them.
+
+    States for every series in the batch are loaded and locked with one
+    query, readings are applied in time order, and the states are written
+    back with one ``bulk_update``. Must run inside a transaction.
+    """
+    config = detector_config()
+    by_series = defaultdict(list)
+    for reading in readings:
+        by_series[(reading.equipment_id, reading.parameter_type)].append(reading)
+
+    states = load_states(set(by_series), lock=True)
+    now = timezone.now()
+    for key, series in by_series.items():
+        state = states[key]
+        window = unpack_window(state.window) if config.method == 'mad' else []
+        series.sort(key=lambda reading: reading.reading_date_time)
+        for reading in series:
+            z = score(state, window, float(reading.value), config)
+            reading.is_anomaly = is_anomalous(z, config)
+        if config.method == 'mad':
+            state.window = pack_window(window)
+        state.last_reading_at = max(
+            filter(None, [state.last_reading_at, series[-1].reading_date_time])
+        )
+        state.updated_at = now
+
+    AnomalyState.objects.bulk_update(
+        list(states.values()),
+        ['reading_count', 'ewma_mean', 'ewma_variance', 'window', 'last_reading_at', 'updated_at'],
+    )
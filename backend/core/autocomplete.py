@@ -0,0 +1,110 @@
+"""
+Equipment autocomplete by serial number or name
+
+On PostgreSQL the lookup is a query served by pg_trgm GIN indexes on
+``UPPER(serial_number)`` and ``UPPER(name)``: serial number prefixes rank
+first, then names containing the text, most similar first. Other
+databases use an in-process prefix index over serial numbers and the word
+suffixes of names ("pump 3" finds "Hydraulic Pump 3"), rebuilt lazily when
+the version bumped by the Equipment signals changes. Only a cache shared by
+every process (Redis) makes that reload immediate everywhere; with a
+per-process cache other processes reload once their index is
+``AUTOCOMPLETE_INDEX_MAX_AGE`` seconds old.
+"""
+
+import bisect
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Equipment
+from .versioned import VersionedIndex
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_KEY = 'core:autocomplete_index_version'
+FIELDS = ('id', 'name', 'serial_number', 'status')
+
+
+class PrefixIndex(VersionedIndex):
+    """
+    Sorted (key, equipment id) arrays searched with ``bisect``.
+
+    A prefix query is a binary search plus a scan of at most ``limit``
+    matches, which answers the same questions as a trie in O(log n) while
+    storing each key once as a plain string.
+    """
+    version_key = INDEX_VERSION_KEY
+    max_age_setting = 'AUTOCOMPLETE_INDEX_MAX_AGE'
+
+    def __init__(self):
+        super().__init__()
+        self._serials = []
+        self._names = []
+        self._rows = {}
+
+    def load(self):
+        serials, names, rows = [], [], {}
+        for row in Equipment.objects.order_by().values(*FIELDS).iterator(chunk_size=5000):
+            rows[row['id']] = row
+            serials.append((row['serial_number'].lower(), row['id']))
+            words = row['name'].lower().split()
+            for start in range(len(words)):
+                names.append((' '.join(words[start:]), row['id']))
+        serials.sort()
+        names.sort()
+        self._serials, self._names, self._rows = serials, names, rows
+        logger.info('Loaded %d equipment into the autocomplete index', len(rows))
+
+    @staticmethod
+    def _scan(keys, prefix, limit, found):
+        position = bisect.bisect_left(keys, (prefix,))
+        while position < len(keys) and len(found) < limit:
+            key, equipment_id = keys[position]
+            if not key.startswith(prefix):
+                break
+            if equipment_id not in found:
+                found.append(equipment_id)
+            position += 1
+
+    def lookup(self, text, limit):
+        """Serial number prefix matches first, then name word prefixes"""
+        self.refresh()
+        prefix = ' '.join(text.lower().split())
+        found = []
+        self._scan(self._serials, prefix, limit, found)
+        self._scan(self._names, prefix, limit, found)
+        return [self._rows[equipment_id] for equipment_id in found]
+
+
+index = PrefixIndex()
+
+
+def _trigram_lookup(text, limit):
+    return list(
+        Equipment.objects.filter(Q(serial_number__istartswith=text) | Q(name__icontains=text))
+        .annotate(
+            serial_match=Case(
+                When(serial_number__istartswith=text, then=Value(0)),
+                default=Value(1), output_field=IntegerField(),
+            ),
+            similarity=RawSQL('similarity(UPPER(name::text), UPPER(%s))', [text], output_field=FloatField()),
+        )
+        .order_by('serial_match', '-similarity', 'serial_number')
+        .values(*FIELDS)[:limit]
+    )
+
+
+def autocomplete(text, limit=None):
+    """Up to ``limit`` equipment rows (id, name, serial_number, status) matching ``text``"""
+    text = text.strip()
+    if len(text) < settings.AUTOCOMPLETE_MIN_CHARS:
+        return []
+    limit = min(limit or settings.AUTOCOMPLETE_LIMIT, settings.AUTOCOMPLETE_MAX_LIMIT)
+    if connection.vendor == 'postgresql':
+        return _trigram_lookup(text, limit)
+    return index.lookup(text, limit)
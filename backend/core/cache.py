@@ -0,0 +1,125 @@
+"""
+Response caching for read-heavy endpoints with generation-based invalidation
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+
+GENERATION_KEY = 'core:gen:{scope}'
+RESPONSE_KEY = 'core:resp:{name}:{generations}:{role}:{params}:{path}'
+STATS_KEY = 'core:cache_stats:{name}:{outcome}'
+
+CACHED_ENDPOINTS = {}
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+def bump_generation(scope):
+    """
+    Invalidate every cached response that depends on ``scope``.
+
+    Keys embed the current generation of each scope they depend on, so
+    bumping the counter orphans the old entries without scanning for them;
+    they simply age out.
+    """
+    _incr(GENERATION_KEY.format(scope=scope))
+
+
+def scope_generations(scopes):
+    """Current generation counters of ``scopes`` joined into one string"""
+    keys = [GENERATION_KEY.format(scope=scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, 1, None)
+            found[key] = cache.get(key, 1)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def response_cache_key(name, scopes, request):
+    params = hashlib.md5(
+        '&'.join(f'{k}={v}' for k, v in sorted(request.query_params.lists())).encode()
+    ).hexdigest()
+    return RESPONSE_KEY.format(
+        name=name,
+        generations=scope_generations(scopes),
+        role=getattr(request.user, 'role', 'anonymous'),
+        params=params,
+        path=request.path,
+    )
+
+
+def cached_response(name, scopes, timeout=None):
+    """
+    Cache successful GET responses of a ViewSet method.
+
+    Entries are keyed by endpoint, the generations of ``scopes``, the
+    caller's role, the query parameters and the path, and are invalidated
+    by the model signals in ``core.signals``. ETag / Last-Modified headers
+    are stored with the data so hits can still answer conditional requests.
+    """
+    CACHED_ENDPOINTS[name] = scopes
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return method(self, request, *args, **kwargs)
+
+            key = response_cache_key(name, scopes, request)
+            entry = cache.get(key)
+            if entry is not None:
+                _incr(STATS_KEY.format(name=name, outcome='hit'))
+                data, headers = entry
+                not_modified = get_conditional_response(
+                    request,
+                    etag=headers.get('ETag'),
+                    last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+                )
+                response = not_modified or Response(data)
+                for header, value in headers.items():
+                    response[header] = value
+                return response
+
+            _incr(STATS_KEY.format(name=name, outcome='miss'))
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {
+                    header: response[header]
+                    for header in CACHED_HEADERS if response.has_header(header)
+                }
+                cache.set(key, (response.data, headers), timeout or settings.RESPONSE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Hit/miss counters for every cached endpoint"""
+    keys = {
+        (name, outcome): STATS_KEY.format(name=name, outcome=outcome)
+        for name in CACHED_ENDPOINTS
+        for outcome in ('hit', 'miss')
+    }
+    values = cache.get_many(list(keys.values()))
+    stats = {}
+    for (name, outcome), key in keys.items():
+        stats.setdefault(name, {'hit': 0, 'miss': 0})[outcome] = values.get(key, 0)
+    for counters in stats.values():
+        total = counters['hit'] + counters['miss']
+        counters['hit_ratio'] = round(counters['hit'] / total, 4) if total else None
+    return stats
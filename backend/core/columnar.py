@@ -0,0 +1,272 @@
+"""
+Columnar storage for raw telemetry
+
+Processed readings older than ``TELEMETRY_COMPACT_AFTER_DAYS`` are moved by
+``manage.py compact_telemetry`` from ``machine_telemetry_log`` into one
+``TelemetryChunk`` per equipment, parameter and UTC day. A chunk stores its
+readings as three zlib-compressed packed arrays:
+
+* timestamps: int64 epoch microseconds, the first absolute and the rest as
+  deltas from the previous reading (regular sampling compresses to almost
+  nothing);
+* values: float64 (or float32 with ``TELEMETRY_CHUNK_VALUE_TYPE``);
+* anomalies: int32 positions of readings flagged ``is_anomaly``.
+
+That is roughly 10 bytes per reading instead of a 150+ byte row plus its
+indexes, and a range scan reads a few contiguous blobs. Archived readings
+have no stored primary key; they get a stable UUID derived from their
+series, timestamp and position among equal timestamps, so keyset cursors
+work across both stores. They can be listed through /api/telemetry/ but not
+retrieved, updated or deleted individually.
+"""
+
+import itertools
+import sys
+import uuid
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import MachineTelemetryLog, TelemetryChunk
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+READING_NAMESPACE = uuid.UUID('6f1c3c0e-3b0b-4d53-9d4e-8a3f0d1f7c21')
+VALUE_TYPECODES = {'float32': 'f', 'float64': 'd'}
+VALUE_QUANTUM = Decimal('0.0001')
+COMPRESSION_LEVEL = 6
+
+
+def _pack(typecode, items):
+    data = array(typecode, items)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return zlib.compress(data.tobytes(), COMPRESSION_LEVEL)
+
+
+def _unpack(typecode, blob):
+    data = array(typecode)
+    data.frombytes(zlib.decompress(bytes(blob)))
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data
+
+
+def to_micros(moment):
+    delta = moment - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def from_micros(micros):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def encode_series(times, values, anomalies, value_type):
+    """Pack sorted timestamps (µs), values and anomaly positions"""
+    deltas = [times[0]] + [b - a for a, b in zip(times, times[1:])] if times else []
+    return (
+        _pack('q', deltas),
+        _pack(VALUE_TYPECODES[value_type], values),
+        _pack('i', anomalies),
+    )
+
+
+def decode_chunk(chunk):
+    """Return ``(times, values, anomaly positions)`` of a chunk"""
+    times = list(itertools.accumulate(_unpack('q', chunk.timestamps)))
+    values = _unpack(VALUE_TYPECODES[chunk.value_type], chunk.values)
+    anomalies = list(_unpack('i', chunk.anomalies))
+    return times, values, anomalies
+
+
+def reading_id(equipment_id, parameter_type, micros, occurrence):
+    return uuid.uuid5(READING_NAMESPACE, f'{equipment_id}:{parameter_type}:{micros}:{occurrence}')
+
+
+def _to_reading(chunk, times, values, anomaly_set, index):
+    micros = times[index]
+    reading = MachineTelemetryLog(
+        id=reading_id(chunk.equipment_id, chunk.parameter_type, micros,
+                      index - bisect_left(times, micros)),
+        equipment_id=chunk.equipment_id,
+        parameter_type=chunk.parameter_type,
+        value=Decimal(repr(values[index])).quantize(VALUE_QUANTUM),
+        reading_date_time=from_micros(micros),
+        processed_flag=True,
+        is_anomaly=index in anomaly_set,
+        created_at=None,
+    )
+    if TelemetryChunk.equipment.is_cached(chunk):
+        # Serializers read equipment.name; share the chunk's joined row
+        # instead of loading it once per reading
+        reading.equipment = chunk.equipment
+    return reading
+
+
+def _chunk_readings(chunk, anomaly_only, position, pk, descending, limit):
+    """
+    The at most ``limit`` readings of one chunk that come right after the
+    cursor ``(position, pk)`` in scan order, plus any ties on the last time.
+    """
+    times, values, anomalies = decode_chunk(chunk)
+    anomaly_set = set(anomalies)
+    candidates = anomalies if anomaly_only else range(len(times))
+
+    ties = []
+    if position is None:
+        lower, upper = 0, len(candidates)
+    else:
+        micros = to_micros(position)
+        first_equal = bisect_left(candidates, bisect_left(times, micros))
+        after_equal = bisect_left(candidates, bisect_right(times, micros))
+        # Readings sharing the cursor's timestamp are ordered by id
+        for index in candidates[first_equal:after_equal]:
+            reading = _to_reading(chunk, times, values, anomaly_set, index)
+            if (reading.id < pk) if descending else (reading.id > pk):
+                ties.append(reading)
+        lower, upper = (0, first_equal) if descending else (after_equal, len(candidates))
+
+    if descending:
+        start = max(lower, upper - limit)
+        while start > lower and times[candidates[start - 1]] == times[candidates[start]]:
+            start -= 1
+        selected = candidates[start:upper]
+    else:
+        end = min(upper, lower + limit)
+        while end < upper and times[candidates[end]] == times[candidates[end - 1]]:
+            end += 1
+        selected = candidates[lower:end]
+    return ties + [_to_reading(chunk, times, values, anomaly_set, index) for index in selected]
+
+
+def scan_chunks(equipment_id=None, parameter=None, anomaly_only=False,
+                position=None, pk=None, descending=True, limit=100):
+    """
+    Read up to ``limit`` archived readings after the keyset cursor
+    ``(position, pk)``, ordered by ``(reading_date_time, id)``.
+
+    Chunks are visited a day at a time in scan order; days never overlap,
+    so once a full day has been read and ``limit`` readings are in hand no
+    later day can contribute.
+    """
+    chunks = TelemetryChunk.objects.select_related('equipment')
+    if equipment_id:
+        chunks = chunks.filter(equipment_id=equipment_id)
+    if parameter:
+        chunks = chunks.filter(parameter_type=parameter)
+    if position is not None:
+        day = position.astimezone(dt_timezone.utc).date()
+        chunks = chunks.filter(day__lte=day) if descending else chunks.filter(day__gte=day)
+    chunks = chunks.order_by('-day' if descending else 'day', 'id')
+
+    found = []
+    current_day = None
+    for chunk in chunks.iterator(chunk_size=50):
+        if chunk.day != current_day:
+            if len(found) >= limit:
+                break
+            current_day = chunk.day
+        found.extend(_chunk_readings(chunk, anomaly_only, position, pk, descending, limit))
+
+    found.sort(key=lambda reading: (reading.reading_date_time, reading.id), reverse=descending)
+    return found[:limit]
+
+
+def iter_chunk_readings(chunks):
+    """Yield every reading stored in ``chunks`` as unsaved log instances"""
+    for chunk in chunks:
+        times, values, anomalies = decode_chunk(chunk)
+        anomaly_set = set(anomalies)
+        for index in range(len(times)):
+            yield _to_reading(chunk, times, values, anomaly_set, index)
+
+
+def _merge_into_chunk(equipment_id, parameter_type, day, rows, value_type):
+    """Append ``(micros, value, is_anomaly)`` rows to the series' chunk for ``day``"""
+    chunk = TelemetryChunk.objects.select_for_update().filter(
+        equipment_id=equipment_id, parameter_type=parameter_type, day=day
+    ).first()
+    if chunk is not None:
+        times, values, anomalies = decode_chunk(chunk)
+        anomaly_set = set(anomalies)
+        existing = [(t, v, i in anomaly_set) for i, (t, v) in enumerate(zip(times, values))]
+        rows = existing + rows
+        # Keep the stored precision when appending to an existing chunk
+        value_type = chunk.value_type
+    else:
+        chunk = TelemetryChunk(equipment_id=equipment_id, parameter_type=parameter_type, day=day)
+
+    rows.sort(key=lambda row: row[0])
+    times = [row[0] for row in rows]
+    chunk.timestamps, chunk.values, chunk.anomalies = encode_series(
+        times, [row[1] for row in rows], [i for i, row in enumerate(rows) if row[2]], value_type
+    )
+    chunk.value_type = value_type
+    chunk.start_time = from_micros(times[0])
+    chunk.end_time = from_micros(times[-1])
+    chunk.reading_count = len(rows)
+    chunk.save()
+    return chunk
+
+
+def compact_day(day_start, value_type=None):
+    """
+    Move the processed readings of one UTC day into chunks.
+
+    Runs in a single transaction, so a failure leaves the rows in place.
+    Returns ``(readings moved, chunks written)``.
+    """
+    value_type = value_type or settings.TELEMETRY_CHUNK_VALUE_TYPE
+    rows = MachineTelemetryLog.objects.filter(
+        processed_flag=True,
+        reading_date_time__gte=day_start,
+        reading_date_time__lt=day_start + timedelta(days=1),
+    ).order_by('equipment_id', 'parameter_type').values_list(
+        'id', 'equipment_id', 'parameter_type', 'reading_date_time', 'value', 'is_anomaly'
+    )
+
+    moved, chunks = 0, 0
+    with transaction.atomic():
+        ids = []
+        for (equipment_id, parameter_type), series in itertools.groupby(
+            rows.iterator(chunk_size=5000), key=lambda row: (row[1], row[2])
+        ):
+            series_rows = []
+            for pk, _, _, moment, value, is_anomaly in series:
+                ids.append(pk)
+                series_rows.append((to_micros(moment), float(value), is_anomaly))
+            _merge_into_chunk(equipment_id, parameter_type, day_start.date(), series_rows, value_type)
+            moved += len(series_rows)
+            chunks += 1
+        for offset in range(0, len(ids), 1000):
+            MachineTelemetryLog.objects.filter(id__in=ids[offset:offset + 1000]).delete()
+    return moved, chunks
+
+
+def compact_readings(before):
+    """
+    Compact every whole UTC day of processed readings before ``before``.
+
+    Days are visited oldest first and each is its own transaction. Readings
+    still waiting for the processing workers are left in the row table.
+    Returns ``(readings moved, chunks written)``.
+    """
+    cutoff = before.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    pending = MachineTelemetryLog.objects.filter(
+        processed_flag=True, reading_date_time__lt=cutoff
+    ).order_by('reading_date_time').values_list('reading_date_time', flat=True)
+
+    moved, chunks = 0, 0
+    oldest = pending.first()
+    while oldest is not None:
+        day_start = oldest.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        day_moved, day_chunks = compact_day(day_start)
+        moved += day_moved
+        chunks += day_chunks
+        oldest = pending.filter(reading_date_time__gte=day_start + timedelta(days=1)).first()
+    return moved, chunks
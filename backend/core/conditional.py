@@ -0,0 +1,104 @@
+"""
+Weak ETag / Last-Modified validators and conditional GET for ViewSets
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .cache import scope_generations
+
+
+def make_validators(request, *parts, last_modified=None):
+    """
+    Build a weak ETag from the request path (so different filters or pages
+    never share a tag), the caller's role and the given state parts.
+    """
+    digest = hashlib.md5('|'.join([
+        request.get_full_path(),
+        str(getattr(request.user, 'role', '')),
+        *(str(part) for part in parts),
+    ]).encode()).hexdigest()
+    return f'W/"{digest}"', last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 response if the request's validators still match"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Allow caching but force revalidation on every use
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Emits weak ETags and Last-Modified on list and retrieve, and answers
+    If-None-Match / If-Modified-Since with 304 before serializing.
+
+    List validators come from one ``MAX(validator_field), COUNT(*)``
+    aggregate over the filtered queryset; detail validators come from the
+    object's own timestamp. Related names rendered by the serializer do not
+    touch that timestamp, so the cache generations of ``validator_scopes``
+    are folded into the tag as well. Relations in ``validator_related`` have
+    no cache scope; when one is expanded, its own ``validator_field`` is.
+    """
+    validator_field = 'updated_at'
+    validator_scopes = ()
+    validator_related = ()
+
+    def get_validator_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def expanded_validator_related(self):
+        if not hasattr(self, 'sparse_options'):
+            return []
+        _, expand = self.sparse_options()
+        return [name for name in self.validator_related if name in expand]
+
+    def list_validators(self, request):
+        related = {
+            f'{name}_modified': Max(f'{name}__{self.validator_field}')
+            for name in self.expanded_validator_related()
+        }
+        state = self.get_validator_queryset().order_by().aggregate(
+            last_modified=Max(self.validator_field), count=Count('pk'), **related
+        )
+        return make_validators(
+            request, state['count'], state['last_modified'],
+            *(state[key] for key in related),
+            scope_generations(self.validator_scopes),
+            last_modified=state['last_modified'],
+        )
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.list_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        timestamp = getattr(instance, self.validator_field)
+        related = [
+            getattr(getattr(instance, name), self.validator_field, None)
+            for name in self.expanded_validator_related()
+        ]
+        etag, last_modified = make_validators(
+            request, instance.pk, timestamp, *related, scope_generations(self.validator_scopes),
+            last_modified=timestamp,
+        )
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, last_modified)
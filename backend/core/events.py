@@ -0,0 +1,209 @@
+"""
+Real-time event fan-out for the Server-Sent Events stream
+
+Events are published from synchronous code (signals, the telemetry
+pipeline) after the surrounding transaction commits and delivered to
+asyncio subscribers of the ASGI stream. The in-process broker only reaches
+subscribers in the same process; the Redis broker relays every event
+through a pub/sub channel so all ASGI workers receive it.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Equipment
+
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A bounded queue of events for one connected client"""
+
+    def __init__(self, loop, channels, max_size):
+        self.loop = loop
+        self.channels = frozenset(channels)
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.dropped = 0
+
+    def matches(self, event):
+        return not self.channels or not self.channels.isdisjoint(event['channels'])
+
+    def offer(self, event):
+        # Runs on the subscriber's loop; slow clients lose events rather
+        # than growing memory without bound
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+class InProcessBroker:
+    """Delivers events to subscribers living in this process"""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(
+            asyncio.get_running_loop(), channels, settings.EVENTS_SUBSCRIBER_QUEUE_SIZE
+        )
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        self.deliver(event)
+
+    def deliver(self, event):
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.matches(event)]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; its stream is gone
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Relays events through Redis pub/sub so every process sees them.
+
+    Requires the ``redis`` package (already needed by the Redis cache
+    backend). One listener task per process forwards messages to the local
+    subscribers; when the pub/sub connection drops it resubscribes with
+    exponential backoff for as long as anyone is subscribed. Events
+    published while it is disconnected are lost.
+    """
+    channel = 'gearguard:events'
+    retry_delay = 0.5
+    max_retry_delay = 30
+
+    def __init__(self):
+        super().__init__()
+        self._client = None
+        self._listener = None
+
+    def subscribe(self, channels):
+        subscription = super().subscribe(channels)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return subscription
+
+    def publish(self, event):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(settings.EVENTS_REDIS_URL)
+        self._client.publish(self.channel, json.dumps(event, cls=DjangoJSONEncoder))
+
+    async def _open_pubsub(self):
+        import redis.asyncio as aioredis
+        client = aioredis.Redis.from_url(settings.EVENTS_REDIS_URL)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+        except BaseException:
+            await pubsub.aclose()
+            await client.aclose()
+            raise
+        return client, pubsub
+
+    async def _listen(self):
+        delay = self.retry_delay
+        while self._subscriptions:
+            try:
+                client, pubsub = await self._open_pubsub()
+            except Exception:
+                logger.warning('Cannot subscribe to Redis events; retrying in %.1fs', delay, exc_info=True)
+            else:
+                delay = self.retry_delay
+                try:
+                    async for message in pubsub.listen():
+                        if message.get('type') == 'message':
+                            self.deliver(json.loads(message['data']))
+                    logger.warning('Redis event subscription ended; resubscribing in %.1fs', delay)
+                except Exception:
+                    logger.warning('Redis event connection lost; resubscribing in %.1fs', delay, exc_info=True)
+                finally:
+                    await self._close(client, pubsub)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    @staticmethod
+    async def _close(client, pubsub):
+        for resource in (pubsub, client):
+            try:
+                await resource.aclose()
+            except Exception:
+                logger.debug('Error closing the Redis event connection', exc_info=True)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def channel_name(kind, object_id):
+    """Channel for one equipment, team or hierarchy node (ids as hex)"""
+    return f'{kind}:{uuid.UUID(str(object_id)).hex}'
+
+
+def routing_channels(equipment_id, team_id=None, hierarchy_path=None):
+    """Channels an event is published on: equipment, team and every ancestor node"""
+    channels = [channel_name('equipment', equipment_id)]
+    if team_id:
+        channels.append(channel_name('team', team_id))
+    for node in (hierarchy_path or '').strip('/').split('/'):
+        if node:
+            channels.append(f'hierarchy:{node}')
+    return channels
+
+
+def equipment_routes(equipment_ids):
+    """Map equipment id -> (team id, hierarchy path) with one query"""
+    return {
+        row['id']: (row['assigned_team_id'], row['asset_hierarchy__path'])
+        for row in Equipment.objects.filter(id__in=set(equipment_ids)).values(
+            'id', 'assigned_team_id', 'asset_hierarchy__path'
+        )
+    }
+
+
+def publish(event_type, channels, data):
+    """Publish once the current transaction commits"""
+    event = {'type': event_type, 'channels': channels, 'data': data}
+
+    def send():
+        try:
+            get_broker().publish(json.loads(json.dumps(event, cls=DjangoJSONEncoder)))
+        except Exception:
+            logger.exception('Failed to publish %s event', event_type)
+
+    transaction.on_commit(send)
+
+
+def format_sse(event):
+    payload = json.dumps({'type': event['type'], 'data': event['data']}, cls=DjangoJSONEncoder)
+    return f'event: {event["type"]}\ndata: {payload}\n\n'
@@ -0,0 +1,363 @@
+"""
+Streaming exports of telemetry and ticket history
+
+``/api/telemetry/export/<format>/``, ``/api/tickets/export/<format>/`` and
+``manage.py export_history`` write CSV, NDJSON or Parquet. Rows are read
+with ``values_list().iterator(chunk_size=EXPORT_CHUNK_SIZE)`` (a
+server-side cursor on PostgreSQL) and encoded a batch at a time, so memory
+stays flat however long the export is. With ``TELEMETRY_COLUMNAR_STORAGE``
+telemetry exports start with the archived chunks, decoded one at a time.
+
+Parquet needs pyarrow (requirements-optional.txt); every batch becomes
+one row group. Under ASGI the response iterates asynchronously and fetches
+each batch with ``sync_to_async``: Django would otherwise collect a sync
+iterator into a list before sending the first byte.
+Both endpoints take the list filters plus ``from``/``to`` (ISO dates or
+datetimes, ``to`` exclusive) on the reading or creation time.
+"""
+
+import csv
+import itertools
+import json
+import uuid
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .columnar import iter_chunk_readings
+from .models import MachineTelemetryLog, TelemetryChunk, Ticket
+
+
+class Dataset:
+    """Exported columns of one model, as ``(name, values_list lookup)``"""
+
+    def __init__(self, name, model, time_field, columns):
+        self.name = name
+        self.model = model
+        self.time_field = time_field
+        self.columns = columns
+        self.names = [name for name, _ in columns]
+        self.lookups = [lookup for _, lookup in columns]
+
+    def model_field(self, lookup):
+        model = self.model
+        *path, name = lookup.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        field = model._meta.get_field(name)
+        return field.target_field if field.is_relation else field
+
+    def rows(self, queryset, start=None, end=None, chunk_size=None):
+        """Value tuples of ``queryset`` within ``[start, end)``, oldest first"""
+        if start is not None:
+            queryset = queryset.filter(**{f'{self.time_field}__gte': start})
+        if end is not None:
+            queryset = queryset.filter(**{f'{self.time_field}__lt': end})
+        return queryset.order_by(self.time_field, 'id').values_list(*self.lookups).iterator(
+            chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE
+        )
+
+
+TELEMETRY = Dataset('telemetry', MachineTelemetryLog, 'reading_date_time', (
+    ('id', 'id'),
+    ('equipment', 'equipment_id'),
+    ('equipment_name', 'equipment__name'),
+    ('parameter_type', 'parameter_type'),
+    ('value', 'value'),
+    ('reading_date_time', 'reading_date_time'),
+    ('is_anomaly', 'is_anomaly'),
+))
+
+TICKETS = Dataset('tickets', Ticket, 'created_at', (
+    ('id', 'id'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('equipment', 'equipment_id'),
+    ('equipment_name', 'equipment__name'),
+    ('request_type', 'request_type'),
+    ('stage', 'stage'),
+    ('priority', 'priority'),
+    ('assigned_team', 'assigned_team_id'),
+    ('assigned_technician', 'assigned_technician_id'),
+    ('created_by', 'created_by_id'),
+    ('scheduled_date', 'scheduled_date'),
+    ('completion_date', 'completion_date'),
+    ('duration_hours', 'duration_hours'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+))
+
+DATASETS = {dataset.name: dataset for dataset in (TELEMETRY, TICKETS)}
+
+
+def parse_bound(value):
+    """Aware datetime for an ISO date or datetime; None when empty, ValueError when invalid"""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def archived_telemetry(equipment_id=None, parameter=None, anomaly_only=False, start=None, end=None):
+    """Value tuples of compacted readings, chunk by chunk in day order"""
+    chunks = TelemetryChunk.objects.select_related('equipment')
+    if equipment_id:
+        chunks = chunks.filter(equipment_id=equipment_id)
+    if parameter:
+        chunks = chunks.filter(parameter_type=parameter)
+    if start is not None:
+        chunks = chunks.filter(day__gte=start.astimezone(dt_timezone.utc).date())
+    if end is not None:
+        chunks = chunks.filter(day__lte=end.astimezone(dt_timezone.utc).date())
+
+    for chunk in chunks.order_by('day', 'equipment_id', 'parameter_type').iterator(chunk_size=50):
+        for reading in iter_chunk_readings([chunk]):
+            if anomaly_only and not reading.is_anomaly:
+                continue
+            if start is not None and reading.reading_date_time < start:
+                continue
+            if end is not None and reading.reading_date_time >= end:
+                continue
+            yield (
+                reading.id, chunk.equipment_id, chunk.equipment.name, chunk.parameter_type,
+                reading.value, reading.reading_date_time, reading.is_anomaly,
+            )
+
+
+def telemetry_rows(queryset, start=None, end=None, equipment_id=None, parameter=None, anomaly_only=False,
+                   chunk_size=None):
+    """Archived (with columnar storage) then live readings; the filters must match ``queryset``'s"""
+    rows = TELEMETRY.rows(queryset, start, end, chunk_size=chunk_size)
+    if not settings.TELEMETRY_COLUMNAR_STORAGE:
+        return rows
+    archived = archived_telemetry(equipment_id, parameter, anomaly_only, start, end)
+    return itertools.chain(archived, rows)
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    # Decimals stay strings, as in the API
+    return _text(value)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def write_csv(dataset, rows, batch_size):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(dataset.names).encode('utf-8')
+    for batch in _batches(rows, batch_size):
+        yield ''.join(writer.writerow([_text(value) for value in row]) for row in batch).encode('utf-8')
+
+
+def write_ndjson(dataset, rows, batch_size):
+    names = dataset.names
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    for batch in _batches(rows, batch_size):
+        yield ''.join(dumps(dict(zip(names, map(_json_value, row)))) + '\n' for row in batch).encode('utf-8')
+
+
+class _Sink:
+    """Write-only file object whose output is handed on after each row group"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _arrow_schema(pa, dataset):
+    types = {
+        'DecimalField': lambda field: pa.decimal128(field.max_digits, field.decimal_places),
+        'DateTimeField': lambda field: pa.timestamp('us', tz='UTC'),
+        'DateField': lambda field: pa.date32(),
+        'BooleanField': lambda field: pa.bool_(),
+        'IntegerField': lambda field: pa.int64(),
+        'BigIntegerField': lambda field: pa.int64(),
+        'PositiveIntegerField': lambda field: pa.int64(),
+        'FloatField': lambda field: pa.float64(),
+    }
+    fields = []
+    for name, lookup in dataset.columns:
+        field = dataset.model_field(lookup)
+        arrow_type = types.get(field.get_internal_type(), lambda field: pa.string())(field)
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def write_parquet(dataset, rows, batch_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa, dataset)
+    as_text = [pa.types.is_string(field.type) for field in schema]
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in _batches(rows, batch_size):
+            columns = [
+                [None if value is None else str(value) for value in column] if text else list(column)
+                for column, text in zip(zip(*batch), as_text)
+            ]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', write_csv),
+    'ndjson': ('application/x-ndjson', write_ndjson),
+    'parquet': ('application/vnd.apache.parquet', write_parquet),
+}
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def encode(dataset, file_format, rows, batch_size=None):
+    """Yield the export of ``rows`` in ``file_format`` as byte strings"""
+    _, writer = FORMATS[file_format]
+    return writer(dataset, rows, batch_size or settings.EXPORT_CHUNK_SIZE)
+
+
+def filename(dataset, file_format, now=None):
+    now = (now or timezone.now()).astimezone(dt_timezone.utc)
+    return f'{dataset.name}-{now:%Y%m%dT%H%M%SZ}.{file_format}'
+
+
+async def _async_chunks(chunks):
+    # Thread-sensitive like the view itself, so every fetch uses the
+    # connection (and server-side cursor) the rows were opened on
+    fetch = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await fetch(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def export_response(dataset, file_format, rows, asynchronous=False):
+    content_type, _ = FORMATS[file_format]
+    chunks = encode(dataset, file_format, rows)
+    if asynchronous:
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename(dataset, file_format)}"'
+    return response
+
+
+class ExportMixin:
+    """
+    ``GET export/<csv|ndjson|parquet>/`` streaming the filtered list.
+
+    Views set ``export_dataset`` and implement ``export_rows(start, end)``;
+    query parameters listed in ``export_uuid_params`` are rejected with a
+    400 unless they are UUIDs.
+    """
+    export_dataset = None
+    export_uuid_params = ()
+
+    def perform_content_negotiation(self, request, force=False):
+        # The export format comes from the URL, whatever the Accept header says
+        return super().perform_content_negotiation(request, force=force or self.action == 'export')
+
+    @action(detail=False, methods=['get'], url_path=rf'export/(?P<file_format>{"|".join(FORMATS)})')
+    def export(self, request, file_format=None):
+        """Stream the filtered rows as CSV, NDJSON or Parquet"""
+        try:
+            start = parse_bound(request.query_params.get('from', None))
+            end = parse_bound(request.query_params.get('to', None))
+        except ValueError:
+            return Response(
+                {'error': 'from and to must be ISO dates or datetimes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start is not None and end is not None and start >= end:
+            return Response(
+                {'error': 'from must be before to'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        for name in self.export_uuid_params:
+            value = request.query_params.get(name, None)
+            if not value:
+                continue
+            try:
+                uuid.UUID(value)
+            except ValueError:
+                return Response(
+                    {'error': f'{name} must be a valid UUID'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        if file_format == 'parquet' and not parquet_available():
+            return Response(
+                {'error': 'Parquet export requires pyarrow'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        return export_response(
+            self.export_dataset, file_format, self.export_rows(start, end),
+            asynchronous=isinstance(request._request, ASGIRequest),
+        )
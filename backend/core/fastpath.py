@@ -0,0 +1,230 @@
+"""
+Fast JSON path for hot list endpoints
+
+With ``FAST_LIST_SERIALIZATION`` on, list actions of views using
+FastListMixin skip ModelSerializer: the page is fetched with
+``values_list(named=True)`` and every row is turned into the serializer's
+output by converters compiled once per serializer from its fields (UUID,
+datetime, Decimal, relation names), then streamed through the C JSON
+encoder. The bytes match what the serializer and DRF's JSONRenderer
+produce, including fields DRF skips when a nullable relation is empty.
+``manage.py benchmark_serializers`` compares both paths and checks that.
+"""
+
+import decimal
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.http import StreamingHttpResponse
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .fieldsets import METHOD_COLUMNS
+
+
+ENCODER = json.JSONEncoder(
+    ensure_ascii=not api_settings.UNICODE_JSON,
+    allow_nan=not api_settings.STRICT_JSON,
+    separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+    check_circular=False,
+)
+STREAM_BATCH = 200
+
+
+def _encode(data):
+    # Same escaping as rest_framework.renderers.JSONRenderer
+    return ENCODER.encode(data).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    # DateTimeField.enforce_timezone looks the zone up per value; plans are
+    # compiled per request, so resolving it here sees the same zone
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def convert(value):
+        if output_format is None or isinstance(value, str):
+            return value
+        if field_timezone is not None and value.utcoffset() is not None:
+            value = value.astimezone(field_timezone)
+        else:
+            value = field.enforce_timezone(value)
+        if output_format.lower() == ISO_8601:
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return value.strftime(output_format)
+    return convert
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+    # DecimalField.quantize with the context built once instead of per value
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+    return convert
+
+
+def _identity(value):
+    return value
+
+
+CONVERTERS = (
+    (serializers.DateTimeField, _datetime_converter),
+    (serializers.DecimalField, _decimal_converter),
+    (serializers.UUIDField, lambda field: str),
+    (serializers.RelatedField, lambda field: str),
+    (serializers.BooleanField, lambda field: field.to_representation),
+    (serializers.IntegerField, lambda field: int),
+    (serializers.FloatField, lambda field: float),
+    (serializers.ChoiceField, lambda field: field.to_representation),
+    (serializers.CharField, lambda field: str),
+    (serializers.ReadOnlyField, lambda field: _identity),
+)
+
+
+class FastPlan:
+    """
+    Compiled output of one serializer: for each field the ``values()``
+    lookups it reads, the converter turning them into JSON-ready data, and
+    the relation whose absence makes DRF skip the field.
+    """
+
+    def __init__(self, serializer_class, names=None, extra_lookups=()):
+        fast_sources = getattr(serializer_class.Meta, 'fast_sources', {})
+        self.fields = []
+        lookups = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only or (names is not None and name not in names):
+                continue
+            entry = self._compile(name, field, fast_sources)
+            self.fields.append(entry)
+            lookups.extend(entry[1])
+            if entry[3]:
+                lookups.append(entry[3])
+        self.lookups = list(dict.fromkeys([*lookups, *extra_lookups]))
+        positions = {lookup: index for index, lookup in enumerate(self.lookups)}
+        self.rows = [
+            (name, [positions[lookup] for lookup in field_lookups], convert,
+             positions[skip] if skip else None)
+            for name, field_lookups, convert, skip in self.fields
+        ]
+
+    def _compile(self, name, field, fast_sources):
+        if isinstance(field, serializers.SerializerMethodField):
+            if name not in fast_sources:
+                raise ImproperlyConfigured(f'{name}: SerializerMethodField needs a Meta.fast_sources entry')
+            return name, [fast_sources[name]], _identity, None
+
+        attrs = field.source.split('.')
+        if len(attrs) == 1:
+            return name, [attrs[0]], self._converter(field), None
+        if len(attrs) != 2:
+            raise ImproperlyConfigured(f'{name}: only one level of relation is supported')
+        relation, attr = attrs
+        columns = METHOD_COLUMNS.get(attr, (attr,))
+        lookups = [f'{relation}__{column}' for column in columns]
+        if attr == 'get_full_name':
+            return name, lookups, lambda first, last: f'{first} {last}'.strip(), relation
+        return name, lookups, self._converter(field), relation
+
+    @staticmethod
+    def _converter(field):
+        for field_class, factory in CONVERTERS:
+            if isinstance(field, field_class):
+                return factory(field)
+        raise ImproperlyConfigured(f'{field.field_name}: {type(field).__name__} has no fast converter')
+
+    def values_from_instance(self, instance):
+        """Row tuple for a model instance that never went through ``values()``"""
+        row = []
+        for lookup in self.lookups:
+            value = instance
+            parts = lookup.split('__')
+            for part in parts[:-1]:
+                value = getattr(value, part, None)
+            if value is not None:
+                try:
+                    value = getattr(value, value._meta.get_field(parts[-1]).attname)
+                except FieldDoesNotExist:
+                    # Annotations
+                    value = getattr(value, parts[-1], None)
+            row.append(value)
+        return tuple(row)
+
+    def render_row(self, row):
+        if not isinstance(row, tuple):
+            row = self.values_from_instance(row)
+        data = {}
+        for name, positions, convert, skip in self.rows:
+            if skip is not None and row[skip] is None:
+                continue
+            values = [row[position] for position in positions]
+            if len(values) == 1:
+                data[name] = None if values[0] is None else convert(values[0])
+            else:
+                data[name] = convert(*values)
+        return data
+
+    def stream(self, rows):
+        """Yield the JSON array of ``rows`` in batches"""
+        yield '['
+        for start in range(0, len(rows), STREAM_BATCH):
+            batch = ','.join(_encode(self.render_row(row)) for row in rows[start:start + STREAM_BATCH])
+            yield batch if start == 0 else ',' + batch
+        yield ']'
+
+
+class FastListMixin:
+    """
+    Opt-in fast list serialization (see module docstring).
+
+    Falls back to the regular serializer for non-JSON renderers and
+    ``?expand=``; ``?fields=`` narrows the compiled plan.
+    """
+
+    def sparse_fields(self):
+        return self.sparse_options() if hasattr(self, 'sparse_options') else (None, [])
+
+    def use_fast_list(self, request):
+        if not settings.FAST_LIST_SERIALIZATION or request.accepted_renderer.format != 'json':
+            return False
+        _, expand = self.sparse_fields()
+        return not expand
+
+    def fast_plan(self):
+        fields, _ = self.sparse_fields()
+        ordering = {column.lstrip('-') for column in getattr(self, 'ordering', None) or ()}
+        ordering.update(getattr(self, 'ordering_fields', None) or ())
+        return FastPlan(self.get_serializer_class(), fields, extra_lookups=['id', *sorted(ordering)])
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list(request):
+            return super().list(request, *args, **kwargs)
+        plan = self.fast_plan()
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*plan.lookups, named=True)
+        rows = self.paginate_queryset(queryset)
+        if rows is None:
+            return self.stream_response(plan.stream(list(queryset)))
+        return self.stream_response(self.paginated_stream(plan, rows))
+
+    def paginated_stream(self, plan, rows):
+        # Mirrors KeysetPagination.get_paginated_response
+        yield '{"next":' + _encode(self.paginator.get_next_link())
+        yield ',"previous":' + _encode(self.paginator.get_previous_link()) + ',"results":'
+        yield from plan.stream(rows)
+        yield '}'
+
+    def stream_response(self, chunks):
+        return StreamingHttpResponse(
+            (chunk.encode('utf-8') for chunk in chunks), content_type='application/json'
+        )
@@ -0,0 +1,139 @@
+"""
+Sparse fieldsets for the ViewSets: ``?fields=`` and ``?expand=``
+
+``?fields=id,title,stage`` renders only those fields and loads only the
+columns they need: the queryset is narrowed with ``.only()`` and its
+``select_related`` joins are cut down to the relations the remaining
+fields read. ``?expand=equipment`` renders a relation as a compact object
+(``Meta.expandable_fields`` of the serializer) fetched in the same join
+instead of a bare primary key. Both apply to GET requests only; writes
+always see the full serializer.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import SerializerMethodField
+
+
+# Columns read by model methods used as serializer sources
+METHOD_COLUMNS = {'get_full_name': ('first_name', 'last_name')}
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def _concrete_field(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.concrete else None
+
+
+def trim_queryset(queryset, serializer_class, fields, expand, required=()):
+    """
+    Narrow ``queryset`` to the columns and joins used by the requested
+    serializer fields (all of them when ``fields`` is None) and expansions.
+    """
+    model = queryset.model
+    expandable = getattr(serializer_class.Meta, 'expandable_fields', {})
+    columns = {model._meta.pk.name}
+    columns.update(name for name in required if _concrete_field(model, name))
+    related = set()
+
+    for name, field in serializer_class().fields.items():
+        if fields is not None and name not in fields:
+            continue
+        if name in expand:
+            related.add(name)
+            columns.add(name)
+            columns.update(f'{name}__{column}' for column in expandable[name].Meta.fields)
+            continue
+        if isinstance(field, SerializerMethodField) or field.source == '*':
+            continue
+        attrs = field.source.split('.')
+        model_field = _concrete_field(model, attrs[0])
+        if model_field is None:
+            # Annotations, properties and reverse relations load themselves
+            continue
+        columns.add(attrs[0])
+        if len(attrs) > 1 and model_field.is_relation:
+            related.add(attrs[0])
+            columns.update(
+                f'{attrs[0]}__{column}' for column in METHOD_COLUMNS.get(attrs[1], (attrs[1],))
+            )
+
+    if fields is None:
+        return queryset.select_related(*related) if related else queryset
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet support for ``?fields=`` and ``?expand=``.
+
+    The serializer must use SparseFieldsSerializerMixin. ``get_queryset``
+    overrides can call ``field_requested`` to skip annotations and
+    prefetches nobody asked for.
+    """
+    fields_param = 'fields'
+    expand_param = 'expand'
+
+    def sparse_options(self):
+        """``(fields or None, expand)`` for this request; validated once"""
+        if not hasattr(self, '_sparse_options'):
+            self._sparse_options = (None, [])
+            request = getattr(self, 'request', None)
+            if request is not None and request.method in SAFE_METHODS:
+                self._sparse_options = self.parse_sparse_options(request)
+        return self._sparse_options
+
+    def parse_sparse_options(self, request):
+        meta = self.get_serializer_class().Meta
+        expandable = getattr(meta, 'expandable_fields', {})
+        fields = request.query_params.get(self.fields_param, None)
+        fields = set(_split(fields)) if fields is not None else None
+        expand = _split(request.query_params.get(self.expand_param, ''))
+
+        unknown = sorted((fields or set()) - set(meta.fields))
+        if unknown:
+            raise ValidationError({'error': f'Unknown field(s): {", ".join(unknown)}'})
+        unknown = sorted(set(expand) - set(expandable))
+        if unknown:
+            raise ValidationError({'error': f'Cannot expand: {", ".join(unknown)}'})
+        if fields is not None:
+            # Expanding a relation implies rendering it
+            fields.update(expand)
+        return fields, expand
+
+    def field_requested(self, name):
+        fields, _ = self.sparse_options()
+        return fields is None or name in fields
+
+    def required_columns(self):
+        """Columns pagination and validators read even when not rendered"""
+        columns = set(getattr(self, 'ordering', None) or ())
+        columns.update(getattr(self, 'ordering_fields', None) or ())
+        columns.add(getattr(self, 'validator_field', 'updated_at'))
+        return {column.lstrip('-') for column in columns}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields, expand = self.sparse_options()
+        if fields is not None:
+            context['fields'] = fields
+        if expand:
+            context['expand'] = expand
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, expand = self.sparse_options()
+        if fields is None and not expand:
+            return queryset
+        return trim_queryset(queryset, self.get_serializer_class(), fields, expand, self.required_columns())
@@ -0,0 +1,162 @@
+"""
+Incremental equipment health scoring
+
+``Equipment.health_score`` (0-100) is derived from four inputs over the
+last ``HEALTH_WINDOW_DAYS``:
+
+* anomaly rate: anomalous readings (partial anomaly index) over the
+  reading count from the hourly rollups, so telemetry is never scanned;
+* trigger violations: Condition_Based tickets opened by the trigger engine;
+* open tickets, weighted by priority;
+* time since ``last_maintenance``.
+
+Anything that changes an input marks the equipment in a dirty set
+(``HealthDirtyMark``); ``manage.py score_health`` rescores only those, plus
+equipment whose score is older than ``HEALTH_RESCORE_HOURS`` so the
+maintenance-age term keeps moving. Each batch costs a handful of grouped
+queries and one ``bulk_update``.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .cache import bump_generation
+from .models import Equipment, HealthDirtyMark, MachineTelemetryLog, TelemetryRollup, Ticket
+from .triggers import OPEN_STAGES
+
+
+# Maximum points each input can take off a perfect score
+ANOMALY_PENALTY = 40
+VIOLATION_PENALTY = 20
+OPEN_TICKET_PENALTY = 25
+MAINTENANCE_PENALTY = 15
+
+# Anomaly rate at which the full anomaly penalty applies
+ANOMALY_RATE_CEILING = 0.10
+VIOLATION_POINTS = 5
+PRIORITY_POINTS = {'Low': 2, 'Medium': 4, 'High': 8, 'Critical': 15}
+MAINTENANCE_FULL_PENALTY_DAYS = 365
+
+
+def mark_dirty(equipment_ids):
+    """Queue equipment for rescoring (idempotent, one statement)"""
+    now = timezone.now()
+    marks = [HealthDirtyMark(equipment_id=pk, marked_at=now) for pk in set(equipment_ids) if pk]
+    if marks:
+        HealthDirtyMark.objects.bulk_create(
+            marks, update_conflicts=True, unique_fields=['equipment_id'], update_fields=['marked_at']
+        )
+
+
+def compute_scores(equipment, now):
+    """``{equipment id: score}`` for a batch of Equipment instances"""
+    ids = [item.id for item in equipment]
+    since = now - timedelta(days=settings.HEALTH_WINDOW_DAYS)
+
+    anomalies = dict(
+        MachineTelemetryLog.objects.filter(
+            equipment_id__in=ids, is_anomaly=True, reading_date_time__gte=since
+        ).order_by().values('equipment_id').annotate(n=Count('id')).values_list('equipment_id', 'n')
+    )
+    readings = dict(
+        TelemetryRollup.objects.filter(
+            equipment_id__in=ids, resolution='1h', bucket_start__gte=since
+        ).order_by().values('equipment_id').annotate(n=Sum('reading_count')).values_list('equipment_id', 'n')
+    )
+    tickets = Ticket.objects.filter(equipment_id__in=ids).order_by()
+    violations = dict(
+        tickets.filter(request_type='Condition_Based', created_at__gte=since)
+        .values('equipment_id').annotate(n=Count('id')).values_list('equipment_id', 'n')
+    )
+    open_points = {}
+    for equipment_id, priority, count in tickets.filter(stage__in=OPEN_STAGES).values(
+        'equipment_id', 'priority'
+    ).annotate(n=Count('id')).values_list('equipment_id', 'priority', 'n'):
+        open_points[equipment_id] = open_points.get(equipment_id, 0) + PRIORITY_POINTS.get(priority, 0) * count
+
+    scores = {}
+    for item in equipment:
+        penalty = 0.0
+        total = readings.get(item.id) or 0
+        if total:
+            rate = min(1.0, anomalies.get(item.id, 0) / total)
+            penalty += ANOMALY_PENALTY * min(1.0, rate / ANOMALY_RATE_CEILING)
+        penalty += min(VIOLATION_PENALTY, VIOLATION_POINTS * violations.get(item.id, 0))
+        penalty += min(OPEN_TICKET_PENALTY, open_points.get(item.id, 0))
+        if item.last_maintenance:
+            days = max(0.0, (now - item.last_maintenance).total_seconds() / 86400)
+            penalty += MAINTENANCE_PENALTY * min(1.0, days / MAINTENANCE_FULL_PENALTY_DAYS)
+        scores[item.id] = max(0, min(100, round(100 - penalty)))
+    return scores
+
+
+def score_batch(equipment_ids, now):
+    """
+    Rescore one batch and persist it with ``bulk_update``.
+
+    ``updated_at`` moves only for equipment whose score changed, so delta
+    sync clients and cached responses see the new value while unchanged
+    rows stay quiet. Returns ``(scored, changed)``.
+    """
+    equipment = list(Equipment.objects.filter(id__in=equipment_ids).only(
+        'id', 'health_score', 'last_maintenance', 'health_scored_at', 'updated_at'
+    ))
+    scores = compute_scores(equipment, now)
+    changed = 0
+    for item in equipment:
+        if item.health_score != scores[item.id]:
+            item.health_score = scores[item.id]
+            item.updated_at = now
+            changed += 1
+        item.health_scored_at = now
+    Equipment.objects.bulk_update(equipment, ['health_score', 'health_scored_at', 'updated_at'])
+    if changed:
+        # bulk_update sends no signals, so invalidate cached equipment responses here
+        bump_generation('equipment')
+    return len(equipment), changed
+
+
+def score_pending(batch_size=None, rescore_all=False):
+    """
+    Rescore dirty and stale equipment in batches.
+
+    Only marks older than the start of the run are considered, and they are
+    cleared only if they were not refreshed while their batch was scored,
+    so equipment that keeps streaming telemetry cannot keep a run going and
+    changes that race with a run are picked up by the next one. Returns
+    ``(scored, changed)``.
+    """
+    batch_size = batch_size or settings.HEALTH_BATCH_SIZE
+    started = timezone.now()
+    stale_before = started - timedelta(hours=settings.HEALTH_RESCORE_HOURS)
+    scored = changed = 0
+
+    if rescore_all:
+        pending = Equipment.objects.filter(
+            Q(health_scored_at__lt=started) | Q(health_scored_at__isnull=True)
+        )
+    else:
+        pending = Equipment.objects.filter(
+            Q(id__in=HealthDirtyMark.objects.filter(marked_at__lt=started).values('equipment_id'))
+            | Q(health_scored_at__lt=stale_before)
+            | Q(health_scored_at__isnull=True)
+        )
+
+    while True:
+        ids = list(pending.order_by().values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        now = timezone.now()
+        batch_scored, batch_changed = score_batch(ids, now)
+        HealthDirtyMark.objects.filter(equipment_id__in=ids, marked_at__lt=now).delete()
+        scored += batch_scored
+        changed += batch_changed
+
+    # Marks left behind by deleted equipment
+    HealthDirtyMark.objects.filter(marked_at__lt=started).exclude(
+        equipment_id__in=Equipment.objects.values('id')
+    ).delete()
+    return scored, changed
@@ -0,0 +1,43 @@
+"""
+Materialized-path helpers for the ISA-95 asset hierarchy
+"""
+
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Q
+
+
+PATH_SEPARATOR = '/'
+
+
+def build_path(parent_path, node_id):
+    """Path of a node: its ancestors' ids then its own, e.g. ``/<site>/<area>/``"""
+    return f'{parent_path or PATH_SEPARATOR}{node_id.hex}{PATH_SEPARATOR}'
+
+
+def path_depth(path):
+    return path.count(PATH_SEPARATOR) - 2
+
+
+def subtree_q(path, field='path'):
+    """
+    Q matching every node whose path starts with ``path`` (the node itself
+    included). ``field`` lets related models filter through a join, e.g.
+    ``asset_hierarchy__path``.
+
+    PostgreSQL serves ``LIKE 'prefix%'`` from the varchar_pattern_ops index.
+    SQLite's LIKE is case-insensitive and skips the index, so a binary range
+    over the same prefix is used instead ('~' sorts after hex digits and '/').
+    """
+    if connection.vendor == 'postgresql':
+        return Q(**{f'{field}__startswith': path})
+    return Q(**{f'{field}__gte': path, f'{field}__lt': path + '~'})
+
+
+def children_index(queryset):
+    """Group nodes by parent id from a single query"""
+    children = defaultdict(list)
+    for node in queryset.order_by('name'):
+        children[node.parent_id].append(node)
+    return children
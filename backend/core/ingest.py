@@ -0,0 +1,154 @@
+"""
+Batch ingestion of telemetry readings pushed by PLC gateways
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Equipment, MachineTelemetryLog
+from .processing import process_readings
+
+
+REQUIRED_FIELDS = ('equipment', 'parameter_type', 'value')
+
+
+def invalid_message(field, raw):
+    """Error for a value the field could not even parse (e.g. a number as a date)"""
+    if field is None:
+        return 'Must be a valid UUID.'
+    return str(field.error_messages.get('invalid', 'Enter a valid value.')) % {'value': raw}
+
+
+def clean_row(row):
+    """
+    Validate one raw reading using the model field definitions.
+
+    Returns a dict of cleaned values or raises ``ValidationError`` with a
+    per-field error mapping.
+    """
+    if not isinstance(row, dict):
+        raise ValidationError({'non_field_errors': ['Expected an object.']})
+
+    errors = {}
+    cleaned = {}
+    for name in REQUIRED_FIELDS:
+        if row.get(name) in (None, ''):
+            errors[name] = ['This field is required.']
+
+    fields = {
+        'equipment': None,
+        'parameter_type': MachineTelemetryLog._meta.get_field('parameter_type'),
+        'value': MachineTelemetryLog._meta.get_field('value'),
+        'reading_date_time': MachineTelemetryLog._meta.get_field('reading_date_time'),
+        'is_anomaly': MachineTelemetryLog._meta.get_field('is_anomaly'),
+    }
+    for name, field in fields.items():
+        if name in errors or row.get(name) in (None, ''):
+            continue
+        raw = row[name]
+        try:
+            if name == 'equipment':
+                cleaned[name] = raw if isinstance(raw, uuid.UUID) else uuid.UUID(str(raw))
+            else:
+                cleaned[name] = field.clean(raw, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+        except (ValueError, TypeError, AttributeError):
+            errors[name] = [invalid_message(field, raw)]
+
+    if errors:
+        raise ValidationError(errors)
+
+    if cleaned.get('reading_date_time') and timezone.is_naive(cleaned['reading_date_time']):
+        cleaned['reading_date_time'] = timezone.make_aware(cleaned['reading_date_time'])
+    return cleaned
+
+
+def _known_equipment_ids(cleaned_rows):
+    equipment_ids = {cleaned['equipment'] for cleaned in cleaned_rows}
+    return set(
+        Equipment.objects.filter(id__in=equipment_ids).values_list('id', flat=True)
+    )
+
+
+def _build_log(cleaned):
+    cleaned = dict(cleaned)
+    return MachineTelemetryLog(equipment_id=cleaned.pop('equipment'), **cleaned)
+
+
+def _insert(logs, chunk_size):
+    """Process (when inline) and bulk insert ``logs`` in one transaction"""
+    tickets = []
+    with transaction.atomic():
+        if settings.TELEMETRY_INLINE_PROCESSING:
+            tickets = process_readings(logs)
+            for log in logs:
+                log.processed_flag = True
+        MachineTelemetryLog.objects.bulk_create(logs, batch_size=chunk_size)
+    return tickets
+
+
+def ingest_telemetry(rows, chunk_size=None):
+    """
+    Validate and insert a batch of telemetry readings.
+
+    Equipment ids for the whole batch are checked with a single query and
+    valid rows are written with ``bulk_create`` in chunks of ``chunk_size``.
+    Invalid rows are reported by index and never abort the rest of the batch.
+    With ``TELEMETRY_INLINE_PROCESSING`` the batch is run through the
+    processing pipeline before insert; otherwise it is left for the workers.
+    """
+    chunk_size = chunk_size or settings.TELEMETRY_BULK_CHUNK_SIZE
+
+    cleaned_rows = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            cleaned_rows.append((index, clean_row(row)))
+        except ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.message_dict})
+
+    known_ids = _known_equipment_ids(cleaned for _, cleaned in cleaned_rows)
+
+    logs = []
+    for index, cleaned in cleaned_rows:
+        if cleaned['equipment'] not in known_ids:
+            errors.append({
+                'index': index,
+                'errors': {'equipment': [f"Equipment {cleaned['equipment']} does not exist."]},
+            })
+            continue
+        logs.append(_build_log(cleaned))
+
+    tickets = _insert(logs, chunk_size)
+    errors.sort(key=lambda error: error['index'])
+
+    return {
+        'received': len(rows),
+        'created': len(logs),
+        'tickets_created': len(tickets),
+        'errors': errors,
+    }
+
+
+def store_readings(cleaned_rows, chunk_size=None):
+    """
+    Insert readings already validated with ``clean_row``.
+
+    Used by the asynchronous ingestion writer, which has acknowledged the
+    readings before they reach the database; rows for unknown equipment
+    can no longer be reported to the sender and are dropped.
+    """
+    chunk_size = chunk_size or settings.TELEMETRY_BULK_CHUNK_SIZE
+    known_ids = _known_equipment_ids(cleaned_rows)
+    logs = [_build_log(cleaned) for cleaned in cleaned_rows if cleaned['equipment'] in known_ids]
+    tickets = _insert(logs, chunk_size)
+    return {
+        'created': len(logs),
+        'dropped': len(cleaned_rows) - len(logs),
+        'tickets_created': len(tickets),
+    }
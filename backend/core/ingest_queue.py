@@ -0,0 +1,253 @@
+"""
+Asynchronous telemetry ingestion for ASGI deployments
+
+Gateways POST readings to /api/telemetry/ingest/. The view validates them
+in the event loop, acknowledges with 202 and hands them to a bounded
+in-memory queue; a single writer task per process flushes the queue with
+``bulk_create`` whenever ``TELEMETRY_ASYNC_BATCH_SIZE`` readings are
+waiting or ``TELEMETRY_ASYNC_FLUSH_INTERVAL`` seconds have passed. When the
+queue is full callers get 429, and while the database is failing they get
+503, both with Retry-After.
+
+Acknowledged readings live only in memory until flushed: the ASGI lifespan
+wrapper in config/asgi.py drains the queue on shutdown, but a crash loses
+whatever was still queued. Gateways that cannot tolerate that should use
+/api/telemetry/bulk/.
+"""
+
+import asyncio
+import io
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import ParseError
+
+from .ingest import clean_row, store_readings
+from .parsers import NDJSONParser
+from .streams import authenticate
+
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueue:
+    """Bounded queue of cleaned readings plus the task that writes them"""
+
+    def __init__(self, max_size, batch_size, flush_interval, max_retries):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.failing = False
+        self.closed = False
+        self.stats = {'accepted': 0, 'created': 0, 'dropped': 0, 'lost': 0, 'flushes': 0}
+        # Readings taken off the queue for the next batch, and the flush in
+        # progress; close() must finish both, not just what is still queued
+        self._pending = []
+        self._flushing = None
+        self._writer = self.loop.create_task(self._run())
+
+    def free_slots(self):
+        return self.queue.maxsize - self.queue.qsize()
+
+    def put_many(self, rows):
+        """Enqueue ``rows``; callers must check ``free_slots`` first"""
+        for row in rows:
+            self.queue.put_nowait(row)
+        self.stats['accepted'] += len(rows)
+
+    async def _next_batch(self):
+        batch = self._pending
+        batch.append(await self.queue.get())
+        deadline = self.loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        self._pending = []
+        return batch
+
+    async def _flush(self, batch):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                result = await sync_to_async(store_readings)(batch)
+            except Exception:
+                self.failing = True
+                logger.exception(
+                    'Telemetry flush of %s readings failed (attempt %s/%s)',
+                    len(batch), attempt, self.max_retries
+                )
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+            self.failing = False
+            self.stats['flushes'] += 1
+            self.stats['created'] += result['created']
+            self.stats['dropped'] += result['dropped']
+            if result['dropped']:
+                logger.warning('Dropped %s queued readings for unknown equipment', result['dropped'])
+            return
+        self.stats['lost'] += len(batch)
+        logger.error('Discarded %s queued readings after %s failed flushes', len(batch), self.max_retries)
+
+    async def _run(self):
+        while True:
+            self._flushing = self.loop.create_task(self._flush(await self._next_batch()))
+            # Cancelling the writer must not abandon a half-written batch
+            await asyncio.shield(self._flushing)
+
+    async def close(self):
+        """Stop accepting readings and flush whatever is still queued"""
+        self.closed = True
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        if self._flushing is not None:
+            await self._flushing
+        batch, self._pending = self._pending, []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+            if len(batch) == self.batch_size:
+                await self._flush(batch)
+                batch = []
+        if batch:
+            await self._flush(batch)
+
+
+_queue = None
+
+
+def get_queue():
+    """The ingestion queue bound to the running event loop"""
+    global _queue
+    if _queue is None or _queue.loop is not asyncio.get_running_loop():
+        _queue = IngestQueue(
+            settings.TELEMETRY_ASYNC_QUEUE_SIZE,
+            settings.TELEMETRY_ASYNC_BATCH_SIZE,
+            settings.TELEMETRY_ASYNC_FLUSH_INTERVAL,
+            settings.TELEMETRY_ASYNC_MAX_RETRIES,
+        )
+    return _queue
+
+
+async def shutdown():
+    global _queue
+    if _queue is not None and _queue.loop is asyncio.get_running_loop():
+        await _queue.close()
+    _queue = None
+
+
+def with_lifespan(application):
+    """
+    Wrap an ASGI application so lifespan shutdown drains the ingestion
+    queue. Django's handler only speaks HTTP, so lifespan events are
+    answered here.
+    """
+    async def app(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    return app
+
+
+def _parse_rows(request):
+    if request.content_type == NDJSONParser.media_type:
+        return NDJSONParser().parse(io.BytesIO(request.body))
+    try:
+        rows = json.loads(request.body or b'[]')
+    except ValueError as exc:
+        raise ParseError(f'JSON parse error - {exc}')
+    if isinstance(rows, dict):
+        # Same shapes as /api/telemetry/bulk/: a list or {"readings": [...]}
+        rows = rows.get('readings')
+    return rows
+
+
+def _retry_after(response, seconds):
+    response['Retry-After'] = str(max(1, round(seconds)))
+    return response
+
+
+@csrf_exempt
+@require_POST
+async def ingest(request):
+    """Validate readings and queue them for the batched writer"""
+    user = await sync_to_async(authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid'}, status=401)
+
+    try:
+        rows = _parse_rows(request)
+    except ParseError as exc:
+        return JsonResponse({'error': str(exc.detail)}, status=400)
+    if not isinstance(rows, list):
+        return JsonResponse({'error': 'Expected a list of readings'}, status=400)
+    if len(rows) > settings.TELEMETRY_BULK_MAX_ROWS:
+        return JsonResponse(
+            {'error': f'Batch exceeds {settings.TELEMETRY_BULK_MAX_ROWS} readings'}, status=413
+        )
+
+    # Under WSGI each request gets a throwaway event loop, so there is no
+    # long-lived writer to hand readings to; store them synchronously
+    queued = isinstance(request, ASGIRequest)
+    queue = get_queue() if queued else None
+    if queued and (queue.failing or queue.closed):
+        return _retry_after(JsonResponse({'error': 'Telemetry storage is unavailable'}, status=503), 5)
+
+    cleaned_rows = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            cleaned_rows.append(clean_row(row))
+        except ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.message_dict})
+
+    stored = None
+    if not queued:
+        stored = await sync_to_async(store_readings)(cleaned_rows)
+    elif len(cleaned_rows) > queue.free_slots():
+        return _retry_after(
+            JsonResponse({'error': 'Telemetry queue is full'}, status=429), queue.flush_interval
+        )
+    else:
+        queue.put_many(cleaned_rows)
+
+    body = {'received': len(rows), 'accepted': len(cleaned_rows), 'errors': errors}
+    stored_count, dropped = len(cleaned_rows), 0
+    if stored is not None:
+        # Written synchronously, so unknown equipment is known now
+        stored_count, dropped = stored['created'], stored['dropped']
+        body.update(created=stored_count, dropped=dropped)
+
+    if (errors or dropped) and not stored_count:
+        response_status = 400
+    elif errors or dropped:
+        response_status = 207
+    else:
+        response_status = 202 if queued else 201
+    return JsonResponse(body, status=response_status)
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import partitions
+from core.retention import delete_in_batches, expired_querysets, longest_retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete telemetry, rollups and sync tombstones past their retention '
+        '(TELEMETRY_RETENTION) in bounded batches; on a partitioned table, '
+        'fully expired partitions are dropped instead'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TELEMETRY_RETENTION_BATCH_SIZE,
+            help='Rows deleted per statement'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Seconds to sleep between batches to leave room for other writers'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count what would be removed'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+
+        if partitions.is_partitioned() and not options['dry_run']:
+            partitions.ensure_partitions(now)
+            days = longest_retention('raw')
+            if days is not None:
+                for name in partitions.drop_expired_partitions(now - timedelta(days=days)):
+                    self.stdout.write(f'Dropped partition {name}')
+
+        for label, queryset, order_field in expired_querysets(now):
+            if options['dry_run']:
+                self.stdout.write(f'{label}: {queryset.count()} expired')
+                continue
+            deleted = delete_in_batches(
+                queryset, order_field, batch_size=options['batch_size'], pause=options['pause']
+            )
+            self.stdout.write(f'{label}: deleted {deleted}')
+        self.stdout.write(self.style.SUCCESS('Retention applied'))
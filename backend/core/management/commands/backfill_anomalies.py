@@ -0,0 +1,187 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from core.anomaly import MAD_SCALE, detector_config, load_states, pack_window, robust_z
+from core.health import mark_dirty
+from core.models import Equipment, MachineTelemetryLog, TelemetryChunk
+
+
+def _recurrence(np, inputs, decay, initial):
+    """
+    Vectorized ``y[t] = decay * y[t-1] + inputs[t]`` with ``y[-1] = initial``.
+
+    Uses the closed form ``y[t] = decay**t * (decay * initial + sum(inputs[j] /
+    decay**j))`` in blocks short enough that ``decay**-j`` stays finite.
+    """
+    output = np.empty_like(inputs)
+    block = max(1, int(300 / -np.log(decay)))
+    for start in range(0, len(inputs), block):
+        segment = inputs[start:start + block]
+        powers = decay ** np.arange(len(segment))
+        values = powers * (decay * initial + np.cumsum(segment / powers))
+        output[start:start + len(segment)] = values
+        initial = values[-1]
+    return output
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-score processed telemetry with the statistical anomaly detector, '
+        'series by series in large NumPy chunks, and leave each series\' '
+        'statistics ready for the online detector. Readings already compacted '
+        'into columnar chunks are not re-scored and keep their stored flags. '
+        'Requires NumPy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50000,
+                            help='Readings loaded and scored per step')
+        parser.add_argument('--equipment', help='Only re-score this equipment id')
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('backfill_anomalies requires NumPy (pip install numpy)')
+        self.np = np
+        self.config = detector_config()
+        if not 0 < self.config.alpha < 1:
+            raise CommandError('TELEMETRY_ANOMALY_ALPHA must be between 0 and 1')
+
+        readings = MachineTelemetryLog.objects.filter(processed_flag=True)
+        chunks = TelemetryChunk.objects.all()
+        if options['equipment']:
+            try:
+                known = Equipment.objects.filter(pk=options['equipment']).exists()
+            except ValidationError:
+                known = False
+            if not known:
+                raise CommandError(f'Unknown equipment: {options["equipment"]}')
+            readings = readings.filter(equipment_id=options['equipment'])
+            chunks = chunks.filter(equipment_id=options['equipment'])
+        series = readings.order_by().values_list('equipment_id', 'parameter_type').distinct()
+
+        total_scored = total_flagged = total_changed = 0
+        for equipment_id, parameter_type in list(series):
+            scored, flagged, changed = self._backfill_series(
+                readings.filter(equipment_id=equipment_id, parameter_type=parameter_type),
+                (equipment_id, parameter_type), options['chunk_size'],
+            )
+            total_scored += scored
+            total_flagged += flagged
+            total_changed += changed
+            self.stdout.write(f'{equipment_id} {parameter_type}: {scored} scored, {flagged} anomalous')
+
+        compacted = chunks.aggregate(total=Sum('reading_count'))['total']
+        if compacted:
+            self.stdout.write(f'{compacted} compacted readings were not re-scored')
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-scored {total_scored} readings: {total_flagged} anomalous, {total_changed} flags changed'
+        ))
+
+    def _backfill_series(self, readings, key, chunk_size):
+        np = self.np
+        scored = flagged = changed = 0
+        mean, variance, count, window = 0.0, 0.0, 0, []
+        position = None
+        while True:
+            chunk = readings
+            if position is not None:
+                moment, pk = position
+                chunk = chunk.filter(
+                    Q(reading_date_time__gt=moment) | Q(reading_date_time=moment, id__gt=pk)
+                )
+            rows = list(chunk.order_by('reading_date_time', 'id').values_list(
+                'id', 'value', 'is_anomaly', 'reading_date_time'
+            )[:chunk_size])
+            if not rows:
+                break
+            position = (rows[-1][3], rows[-1][0])
+
+            ids = [row[0] for row in rows]
+            values = np.array([float(row[1]) for row in rows])
+            previous = np.array([row[2] for row in rows], dtype=bool)
+
+            z, mean, variance = self._score_ewma(values, mean, variance, count)
+            if self.config.method == 'mad':
+                z, window = self._score_mad(values, window, count)
+            count += len(rows)
+
+            flags = np.nan_to_num(np.abs(z), nan=0.0) >= self.config.threshold
+            chunk_changed = int((flags != previous).sum())
+            # Each chunk commits with a checkpoint of the replayed statistics,
+            # so locks and undo stay bounded. The online detector may score a
+            # reading against a checkpoint in between; such readings are newer
+            # than the replay position, so the replay re-scores them and its
+            # final state includes them.
+            with transaction.atomic():
+                state = load_states({key}, lock=True)[key]
+                self._write_flags(ids, flags & ~previous, True)
+                self._write_flags(ids, ~flags & previous, False)
+                state.reading_count = count
+                state.ewma_mean = mean
+                state.ewma_variance = variance
+                state.window = pack_window(window)
+                state.last_reading_at = position[0]
+                state.save()
+                if chunk_changed:
+                    # Anomaly rate feeds the health score
+                    mark_dirty([key[0]])
+            scored += len(rows)
+            flagged += int(flags.sum())
+            changed += chunk_changed
+        return scored, flagged, changed
+
+    def _score_ewma(self, values, mean, variance, count):
+        np = self.np
+        alpha = self.config.alpha
+        decay = 1 - alpha
+        if count == 0:
+            # The first reading seeds the mean, as in the online detector
+            mean = values[0]
+        means = _recurrence(np, alpha * values, decay, mean)
+        deltas = values - np.concatenate(([mean], means[:-1]))
+        variances = _recurrence(np, decay * alpha * deltas ** 2, decay, variance)
+        previous_variances = np.concatenate(([variance], variances[:-1]))
+
+        seen = count + np.arange(len(values))
+        usable = (seen >= self.config.warmup) & (previous_variances > 0)
+        z = np.full(len(values), np.nan)
+        z[usable] = deltas[usable] / np.sqrt(previous_variances[usable])
+        return z, float(means[-1]), float(variances[-1])
+
+    def _score_mad(self, values, window, count):
+        np = self.np
+        size = self.config.window
+        history = np.concatenate((np.array(window, dtype=float), values))
+        offset = len(window)
+        z = np.full(len(values), np.nan)
+
+        # Readings whose window is still filling up are scored one by one
+        full_from = max(0, size - offset)
+        for index in range(min(full_from, len(values))):
+            previous = history[:offset + index][-size:]
+            if len(previous) and count + index >= self.config.warmup:
+                z[index] = robust_z(values[index], previous.tolist())
+
+        if full_from < len(values):
+            windows = np.lib.stride_tricks.sliding_window_view(history[:-1], size)[offset + full_from - size:]
+            medians = np.median(windows, axis=1)
+            mads = np.median(np.abs(windows - medians[:, None]), axis=1)
+            current = values[full_from:]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = np.where(
+                    mads > 0,
+                    MAD_SCALE * (current - medians) / mads,
+                    np.where(current == medians, 0.0, np.inf),
+                )
+            seen = count + np.arange(full_from, len(values))
+            z[full_from:] = np.where(seen >= self.config.warmup, scores, np.nan)
+        return z, history[-size:].tolist()
+
+    def _write_flags(self, ids, mask, value):
+        selected = [pk for pk, hit in zip(ids, mask) if hit]
+        for start in range(0, len(selected), 1000):
+            MachineTelemetryLog.objects.filter(id__in=selected[start:start + 1000]).update(is_anomaly=value)
@@ -0,0 +1,224 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Equipment, MachineTelemetryLog, Ticket
+
+
+BENCHMARK_INDEXES = {
+    MachineTelemetryLog: [
+        'telemetry_time_idx', 'telemetry_equipment_time_idx', 'telemetry_eq_param_time_idx',
+        'telemetry_anomaly_idx', 'telemetry_unprocessed_idx',
+    ],
+    Ticket: [
+        'ticket_created_idx', 'ticket_stage_created_idx', 'ticket_priority_created_idx',
+        'ticket_tech_created_idx', 'ticket_team_created_idx', 'ticket_equipment_created_idx',
+        'ticket_open_idx',
+    ],
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Show query plans and latencies of the hot telemetry/ticket queries '
+        'with and without the composite indexes. On SQLite it runs on a '
+        'temporary copy of the database. On PostgreSQL it drops the indexes of '
+        'the real tables in a transaction that is always rolled back, holding '
+        'ACCESS EXCLUSIVE locks on the ticket and telemetry tables until it '
+        'ends: every read and write of them waits for the whole benchmark. It '
+        'therefore refuses to run there unless the database is a test database '
+        'or --i-know-this-locks-tables is given. Synthetic rows and dropped '
+        'indexes never persist.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--telemetry-rows', type=int, default=0,
+                            help='Synthetic telemetry rows to insert before measuring')
+        parser.add_argument('--ticket-rows', type=int, default=0,
+                            help='Synthetic tickets to insert before measuring')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Executions per query when timing')
+        parser.add_argument('--i-know-this-locks-tables', action='store_true', dest='allow_locks',
+                            help='Run on a PostgreSQL database that is not a test database, '
+                                 'locking the ticket and telemetry tables for the whole run')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            with self._scratch_copy():
+                self._benchmark(options)
+            return
+        if not (options['allow_locks'] or self._is_test_database()):
+            raise CommandError(
+                f'Refusing to drop indexes on {connection.settings_dict["NAME"]}: the ticket and '
+                'telemetry tables stay locked until the benchmark ends. Run it on a test or '
+                'scratch database, or pass --i-know-this-locks-tables.'
+            )
+        try:
+            with transaction.atomic():
+                self._benchmark(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    @staticmethod
+    def _is_test_database():
+        name = connection.settings_dict['NAME']
+        test_name = connection.settings_dict.get('TEST', {}).get('NAME')
+        return name == test_name or name.startswith('test_')
+
+    @contextmanager
+    def _scratch_copy(self):
+        """
+        Point the connection at a temporary copy of the SQLite database.
+
+        Dropped indexes must be committed so the "without" phase can run on
+        a new connection: the sqlite3 module caches prepared statements per
+        connection, and a cached EXPLAIN keeps reporting the dropped index.
+        """
+        source = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            target = os.path.join(directory, 'benchmark.sqlite3')
+            connection.ensure_connection()
+            copy = sqlite3.connect(target)
+            connection.connection.backup(copy)
+            copy.close()
+            connection.close()
+            connection.settings_dict['NAME'] = target
+            try:
+                yield
+            finally:
+                connection.close()
+                connection.settings_dict['NAME'] = source
+
+    def _benchmark(self, options):
+        self._seed(options['telemetry_rows'], options['ticket_rows'])
+        queries = self._queries()
+        if not queries:
+            self.stdout.write('No equipment available; use --telemetry-rows to seed.')
+            return
+
+        self._analyze()
+        self.stdout.write(self.style.MIGRATE_HEADING('With indexes'))
+        after = self._run(queries, options['repeat'])
+
+        self._drop_indexes()
+        if connection.vendor == 'sqlite':
+            connection.close()
+            queries = self._queries()
+        self._analyze()
+        self.stdout.write(self.style.MIGRATE_HEADING('Without indexes'))
+        before = self._run(queries, options['repeat'])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Summary (ms per query)'))
+        for label in queries:
+            self.stdout.write(
+                f'{label:<40} before {before[label]:>9.3f}   after {after[label]:>9.3f}'
+            )
+
+    def _seed(self, telemetry_rows, ticket_rows):
+        if not (telemetry_rows or ticket_rows):
+            return
+        equipment = list(Equipment.objects.all()[:50])
+        if not equipment:
+            equipment = Equipment.objects.bulk_create([
+                Equipment(name=f'Benchmark {i}', serial_number=f'BENCH-{i:04d}')
+                for i in range(50)
+            ])
+        now = timezone.now()
+        parameters = ['Temperature', 'Vibration', 'Running_Hours', 'Cycle_Count']
+
+        batch = []
+        for i in range(telemetry_rows):
+            value = random.uniform(20, 130)
+            batch.append(MachineTelemetryLog(
+                equipment=random.choice(equipment),
+                parameter_type=random.choice(parameters),
+                value=round(value, 4),
+                reading_date_time=now - timedelta(seconds=i),
+                processed_flag=random.random() > 0.01,
+                is_anomaly=value > 125,
+            ))
+            if len(batch) >= 5000:
+                MachineTelemetryLog.objects.bulk_create(batch)
+                batch = []
+        MachineTelemetryLog.objects.bulk_create(batch)
+
+        tickets = [
+            Ticket(
+                title=f'Benchmark ticket {i}',
+                equipment=random.choice(equipment),
+                stage=random.choice(['New', 'In Progress', 'Repaired', 'Repaired', 'Repaired']),
+                priority=random.choice(['Low', 'Medium', 'High', 'Critical']),
+            )
+            for i in range(ticket_rows)
+        ]
+        Ticket.objects.bulk_create(tickets, batch_size=5000)
+
+    def _queries(self):
+        equipment_id = (
+            MachineTelemetryLog.objects.values_list('equipment_id', flat=True).first()
+            or Equipment.objects.values_list('id', flat=True).first()
+        )
+        if equipment_id is None:
+            return {}
+        telemetry = MachineTelemetryLog.objects.all()
+        tickets = Ticket.objects.all()
+        return {
+            'telemetry latest': telemetry.order_by('-reading_date_time')[:50],
+            'telemetry by equipment': telemetry.filter(equipment_id=equipment_id)[:50],
+            'telemetry by equipment+parameter': telemetry.filter(
+                equipment_id=equipment_id, parameter_type='Temperature'
+            )[:50],
+            'telemetry anomalies by equipment': telemetry.filter(
+                equipment_id=equipment_id, is_anomaly=True
+            )[:50],
+            'telemetry worker backlog': telemetry.filter(
+                processed_flag=False
+            ).order_by('reading_date_time', 'id')[:1000],
+            'tickets by stage': tickets.filter(stage='New')[:50],
+            'tickets by priority': tickets.filter(priority='Critical')[:50],
+            'tickets open for equipment': tickets.filter(
+                Q(stage__in=['New', 'In Progress']),
+                equipment_id=equipment_id, request_type='Condition_Based'
+            ),
+        }
+
+    def _run(self, queries, repeat):
+        timings = {}
+        for label, queryset in queries.items():
+            self.stdout.write(self.style.SQL_KEYWORD(label))
+            self.stdout.write(queryset.explain())
+            start = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            timings[label] = (time.perf_counter() - start) * 1000 / repeat
+            self.stdout.write(f'  {timings[label]:.3f} ms\n')
+        return timings
+
+    def _drop_indexes(self):
+        # DROP INDEX is transactional on PostgreSQL, so the rollback in
+        # handle() restores every index, but it keeps the tables locked until
+        # then; SQLite only ever drops them from the scratch copy.
+        with connection.cursor() as cursor:
+            for names in BENCHMARK_INDEXES.values():
+                for name in names:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+    def _analyze(self):
+        """Refresh planner statistics for the current set of indexes"""
+        with connection.cursor() as cursor:
+            for model in BENCHMARK_INDEXES:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
@@ -0,0 +1,121 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Equipment, MachineTelemetryLog, Ticket, User
+from core.views import MachineTelemetryLogViewSet, TicketViewSet
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Time /api/tickets/ and /api/telemetry/ list pages rendered by the '
+        'regular serializers and by the fast path (core/fastpath.py), and check '
+        'that both produce the same bytes. Runs in a transaction that is always '
+        'rolled back, so synthetic rows never persist.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--telemetry-rows', type=int, default=0,
+                            help='Synthetic telemetry rows to insert before measuring')
+        parser.add_argument('--ticket-rows', type=int, default=0,
+                            help='Synthetic tickets to insert before measuring')
+        parser.add_argument('--page-size', type=int, default=1000,
+                            help='Rows per list page (at most 1000)')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Requests per endpoint and path when timing')
+
+    def handle(self, *args, **options):
+        page_size = min(max(options['page_size'], 1), 1000)
+        try:
+            with transaction.atomic():
+                self._seed(options['telemetry_rows'], options['ticket_rows'])
+                user = User.objects.filter(is_superuser=True).first() or User.objects.create_user(
+                    username='benchmark-serializers'
+                )
+                endpoints = {
+                    'tickets': (TicketViewSet, '/api/tickets/'),
+                    'tickets ?fields=': (TicketViewSet, '/api/tickets/?fields=id,title,stage,equipment_name'),
+                    'telemetry': (MachineTelemetryLogViewSet, '/api/telemetry/'),
+                }
+                self.stdout.write(self.style.MIGRATE_HEADING(f'Summary (ms per page of {page_size})'))
+                for label, (viewset, url) in endpoints.items():
+                    regular, regular_ms = self._run(viewset, url, user, page_size, options['repeat'], False)
+                    fast, fast_ms = self._run(viewset, url, user, page_size, options['repeat'], True)
+                    if regular != fast:
+                        raise CommandError(f'{label}: fast path output differs from the serializer')
+                    self.stdout.write(
+                        f'{label:<20} serializer {regular_ms:>9.3f}   fast {fast_ms:>9.3f}   '
+                        f'x{regular_ms / fast_ms:.1f}   {len(fast)} bytes'
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, telemetry_rows, ticket_rows):
+        if not (telemetry_rows or ticket_rows):
+            return
+        equipment = list(Equipment.objects.all()[:50])
+        if not equipment:
+            equipment = Equipment.objects.bulk_create([
+                Equipment(name=f'Benchmark {i}', serial_number=f'BENCH-{i:04d}')
+                for i in range(50)
+            ])
+        now = timezone.now()
+        parameters = ['Temperature', 'Vibration', 'Running_Hours', 'Cycle_Count']
+
+        batch = []
+        for i in range(telemetry_rows):
+            value = random.uniform(20, 130)
+            batch.append(MachineTelemetryLog(
+                equipment=random.choice(equipment),
+                parameter_type=random.choice(parameters),
+                value=round(value, 4),
+                reading_date_time=now - timedelta(seconds=i),
+                processed_flag=True,
+                is_anomaly=value > 125,
+            ))
+            if len(batch) >= 5000:
+                MachineTelemetryLog.objects.bulk_create(batch)
+                batch = []
+        MachineTelemetryLog.objects.bulk_create(batch)
+
+        tickets = [
+            Ticket(
+                title=f'Benchmark ticket {i}',
+                description='Synthetic ticket for serializer benchmarks',
+                equipment=random.choice(equipment),
+                stage=random.choice(['New', 'In Progress', 'Repaired', 'Repaired', 'Repaired']),
+                priority=random.choice(['Low', 'Medium', 'High', 'Critical']),
+            )
+            for i in range(ticket_rows)
+        ]
+        Ticket.objects.bulk_create(tickets, batch_size=5000)
+
+    def _run(self, viewset, url, user, page_size, repeat, fast):
+        """``(response body, ms per request)`` with the fast path on or off"""
+        view = viewset.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+        separator = '&' if '?' in url else '?'
+        with override_settings(FAST_LIST_SERIALIZATION=fast):
+            body = b''
+            start = time.perf_counter()
+            for _ in range(max(repeat, 1)):
+                request = factory.get(f'{url}{separator}page_size={page_size}')
+                force_authenticate(request, user=user)
+                response = view(request)
+                if response.streaming:
+                    body = b''.join(response.streaming_content)
+                else:
+                    body = response.render().content
+            elapsed = (time.perf_counter() - start) * 1000 / max(repeat, 1)
+        return body, elapsed
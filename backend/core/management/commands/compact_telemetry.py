@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from core.columnar import compact_readings
+from core.models import TelemetryChunk
+
+
+class Command(BaseCommand):
+    help = 'Move processed telemetry older than N days into compressed columnar chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=None,
+            help='Compact whole UTC days older than this (default TELEMETRY_COMPACT_AFTER_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.TELEMETRY_COLUMNAR_STORAGE:
+            raise CommandError(
+                'TELEMETRY_COLUMNAR_STORAGE is off; compacted readings would disappear from the API'
+            )
+        days = options['older_than_days']
+        if days is None:
+            days = settings.TELEMETRY_COMPACT_AFTER_DAYS
+        if days < 1:
+            raise CommandError('--older-than-days must be at least 1')
+
+        moved, chunks = compact_readings(timezone.now() - timedelta(days=days))
+        stored = TelemetryChunk.objects.aggregate(
+            readings=Sum('reading_count'),
+            size=Sum(Length('timestamps') + Length('values') + Length('anomalies')),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted {moved} readings into {chunks} chunks; '
+            f'{stored["readings"] or 0} archived readings use {stored["size"] or 0} bytes'
+        ))
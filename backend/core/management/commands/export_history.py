@@ -0,0 +1,82 @@
+import sys
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import DATASETS, FORMATS, TELEMETRY, encode, parquet_available, parse_bound, telemetry_rows
+from core.models import MachineTelemetryLog, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream telemetry or ticket history as CSV, NDJSON or Parquet to a file '
+        'or stdout. Rows are read through a server-side cursor and written a '
+        'batch at a time, so memory stays flat for any export size.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', dest='file_format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--from', dest='start', help='ISO date or datetime to start at')
+        parser.add_argument('--to', dest='end', help='ISO date or datetime to stop before')
+        parser.add_argument('--equipment', help='Only this equipment id')
+        parser.add_argument('--parameter', help='Telemetry: only this parameter type')
+        parser.add_argument('--anomaly', action='store_true', help='Telemetry: only anomalous readings')
+        parser.add_argument('--stage', help='Tickets: only this stage')
+        parser.add_argument('--priority', help='Tickets: only this priority')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Rows per cursor fetch and write (default: EXPORT_CHUNK_SIZE)')
+
+    def handle(self, *args, **options):
+        file_format = options['file_format']
+        if file_format == 'parquet' and not parquet_available():
+            raise CommandError('Parquet export requires pyarrow (pip install -r requirements-optional.txt)')
+        try:
+            start = parse_bound(options['start'])
+            end = parse_bound(options['end'])
+        except ValueError as exc:
+            raise CommandError(f'Invalid date: {exc}')
+        if options['equipment']:
+            try:
+                uuid.UUID(options['equipment'])
+            except ValueError:
+                raise CommandError(f'Invalid equipment id: {options["equipment"]}')
+
+        dataset = DATASETS[options['dataset']]
+        if dataset is TELEMETRY:
+            readings = MachineTelemetryLog.objects.all()
+            if options['equipment']:
+                readings = readings.filter(equipment_id=options['equipment'])
+            if options['parameter']:
+                readings = readings.filter(parameter_type=options['parameter'])
+            if options['anomaly']:
+                readings = readings.filter(is_anomaly=True)
+            rows = telemetry_rows(
+                readings, start, end, equipment_id=options['equipment'],
+                parameter=options['parameter'], anomaly_only=options['anomaly'],
+                chunk_size=options['chunk_size'],
+            )
+        else:
+            tickets = Ticket.objects.all()
+            if options['equipment']:
+                tickets = tickets.filter(equipment_id=options['equipment'])
+            if options['stage']:
+                tickets = tickets.filter(stage=options['stage'])
+            if options['priority']:
+                tickets = tickets.filter(priority=options['priority'])
+            rows = dataset.rows(tickets, start, end, chunk_size=options['chunk_size'])
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in encode(dataset, file_format, rows, options['chunk_size']):
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} bytes to {options["output"]}'))
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import partitions
+from core.models import MachineTelemetryLog
+from core.retention import longest_retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming telemetry partitions (PostgreSQL). With --convert, '
+        'rebuild machine_telemetry_log as a range-partitioned table first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', action='store_true',
+            help='One-off conversion of the existing table; blocks writers while rows are copied'
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.supported():
+            raise CommandError('Native partitioning requires PostgreSQL')
+        now = timezone.now()
+
+        if options['convert']:
+            if partitions.is_partitioned():
+                raise CommandError('machine_telemetry_log is already partitioned')
+            days = longest_retention('raw')
+            since = now - timedelta(days=days) if days is not None else self._oldest_reading(now)
+            partitions.convert_to_partitioned(now, since)
+            self.stdout.write(self.style.SUCCESS('Converted machine_telemetry_log to a partitioned table'))
+        elif not partitions.is_partitioned():
+            raise CommandError('machine_telemetry_log is not partitioned; run with --convert first')
+
+        created = partitions.ensure_partitions(now)
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partitions'))
+        for name in created:
+            self.stdout.write(f'  {name}')
+
+    def _oldest_reading(self, now):
+        oldest = MachineTelemetryLog.objects.order_by('reading_date_time').values_list(
+            'reading_date_time', flat=True
+        ).first()
+        return oldest or now
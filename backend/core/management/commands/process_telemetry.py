@@ -0,0 +1,49 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.processing import drain_batch
+
+
+class Command(BaseCommand):
+    help = 'Drain unprocessed telemetry: detect anomalies, evaluate triggers and mark rows processed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TELEMETRY_WORKER_BATCH_SIZE,
+            help='Rows claimed per transaction'
+        )
+        parser.add_argument(
+            '--idle-sleep', type=float, default=settings.TELEMETRY_WORKER_IDLE_SLEEP,
+            help='Seconds to wait when there is nothing to process'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the backlog is empty instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        total_rows = total_tickets = 0
+        while self._running:
+            rows, tickets = drain_batch(options['batch_size'])
+            total_rows += rows
+            total_tickets += tickets
+            if rows:
+                self.stdout.write(f'Processed {rows} readings, opened {tickets} tickets')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['idle_sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Worker stopped after {total_rows} readings and {total_tickets} tickets'
+        ))
+
+    def _stop(self, signum, frame):
+        self._running = False
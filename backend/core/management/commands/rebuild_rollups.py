@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.rollups import rebuild_floor, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute telemetry rollups from raw readings (whole days, optionally within a range). '
+        'Days whose raw readings may have expired keep their rollups.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='ISO datetime; defaults to, and is never earlier than, the oldest day '
+                 'whose raw readings are all retained'
+        )
+        parser.add_argument('--end', help='ISO datetime; defaults to no upper bound')
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for name in ('start', 'end'):
+            if options[name]:
+                bounds[name] = parse_datetime(options[name])
+                if bounds[name] is None:
+                    raise CommandError(f'--{name} must be an ISO 8601 datetime')
+                if timezone.is_naive(bounds[name]):
+                    bounds[name] = timezone.make_aware(bounds[name])
+
+        now = timezone.now()
+        floor = rebuild_floor(now)
+        if floor is None:
+            self.stdout.write('No raw telemetry to rebuild from')
+            return
+        if 'start' not in bounds or bounds['start'] < floor:
+            self.stdout.write(f'Rebuilding from {floor:%Y-%m-%d}; older rollups are kept')
+
+        with transaction.atomic():
+            created = rebuild_rollups(now=now, **bounds)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} rollup buckets'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Re-index every ticket, equipment and message for full-text search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows indexed per statement')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        counts = rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            'Indexed ' + ', '.join(f'{count} {kind} rows' for kind, count in counts.items())
+        ))
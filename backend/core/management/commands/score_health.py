@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.health import score_pending
+
+
+class Command(BaseCommand):
+    help = 'Recompute Equipment.health_score for dirty and stale equipment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Equipment scored per batch (default HEALTH_BATCH_SIZE)')
+        parser.add_argument('--all', action='store_true',
+                            help='Rescore every piece of equipment, dirty or not')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        scored, changed = score_pending(options['batch_size'], rescore_all=options['all'])
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} equipment, {changed} scores changed'))
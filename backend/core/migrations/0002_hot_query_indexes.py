@@ -0,0 +1,93 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:07
+
+from django.db import migrations, models
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL so writes to the (large)
+    telemetry and ticket tables are not blocked while the index builds;
+    a plain AddIndex elsewhere.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='machinetelemetrylog',
+            index=models.Index(fields=['-reading_date_time', '-id'], name='telemetry_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='machinetelemetrylog',
+            index=models.Index(fields=['equipment', '-reading_date_time', '-id'], name='telemetry_equipment_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='machinetelemetrylog',
+            index=models.Index(fields=['equipment', 'parameter_type', '-reading_date_time', '-id'], name='telemetry_eq_param_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='machinetelemetrylog',
+            index=models.Index(condition=models.Q(('is_anomaly', True)), fields=['equipment', '-reading_date_time'], name='telemetry_anomaly_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='machinetelemetrylog',
+            index=models.Index(condition=models.Q(('processed_flag', False)), fields=['reading_date_time', 'id'], name='telemetry_unprocessed_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='message',
+            index=models.Index(fields=['created_at', 'id'], name='message_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='message',
+            index=models.Index(fields=['ticket', 'created_at', 'id'], name='message_ticket_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['-created_at', '-id'], name='ticket_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['stage', '-created_at', '-id'], name='ticket_stage_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['priority', '-created_at'], name='ticket_priority_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_technician', '-created_at'], name='ticket_tech_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_team', '-created_at'], name='ticket_team_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['equipment', '-created_at'], name='ticket_equipment_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('stage__in', ['New', 'In Progress'])), fields=['equipment', 'request_type', 'title'], name='ticket_open_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('parameter_type', models.CharField(max_length=100)),
+                ('resolution', models.CharField(choices=[('1m', '1 Minute'), ('1h', '1 Hour'), ('1d', '1 Day')], max_length=2)),
+                ('bucket_start', models.DateTimeField()),
+                ('reading_count', models.PositiveIntegerField(default=0)),
+                ('value_sum', models.FloatField(default=0)),
+                ('value_min', models.FloatField()),
+                ('value_max', models.FloatField()),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_rollups', to='core.equipment')),
+            ],
+            options={
+                'db_table': 'telemetry_rollups',
+                'ordering': ['bucket_start'],
+                'constraints': [models.UniqueConstraint(fields=('equipment', 'parameter_type', 'resolution', 'bucket_start'), name='telemetry_rollup_bucket_uniq')],
+            },
+        ),
+    ]
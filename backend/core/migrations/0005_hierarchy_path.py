@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    AssetHierarchy = apps.get_model('core', 'AssetHierarchy')
+    nodes = {node.id: node for node in AssetHierarchy.objects.all()}
+
+    def resolve(node):
+        if not node.path:
+            parent = nodes.get(node.parent_id)
+            parent_path = resolve(parent) if parent else '/'
+            node.path = f'{parent_path}{node.id.hex}/'
+            node.depth = node.path.count('/') - 2
+        return node.path
+
+    for node in nodes.values():
+        resolve(node)
+    AssetHierarchy.objects.bulk_update(nodes.values(), ['path', 'depth'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_telemetry_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assethierarchy',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='assethierarchy',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='assethierarchy',
+            index=models.Index(fields=['path'], name='hierarchy_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
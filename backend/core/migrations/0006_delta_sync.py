@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:16
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_hierarchy_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('model_name', models.CharField(max_length=50)),
+                ('object_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'sync_tombstones',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='assethierarchy',
+            index=models.Index(fields=['updated_at', 'id'], name='hierarchy_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['updated_at', 'id'], name='equipment_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceteam',
+            index=models.Index(fields=['updated_at', 'id'], name='team_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['updated_at', 'id'], name='ticket_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['model_name', 'deleted_at', 'id'], name='tombstone_model_deleted_idx'),
+        ),
+    ]
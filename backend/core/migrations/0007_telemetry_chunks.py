@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:23
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_delta_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryChunk',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('parameter_type', models.CharField(max_length=100)),
+                ('day', models.DateField()),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('reading_count', models.PositiveIntegerField()),
+                ('value_type', models.CharField(choices=[('float32', 'Float32'), ('float64', 'Float64')], default='float64', max_length=7)),
+                ('timestamps', models.BinaryField()),
+                ('values', models.BinaryField()),
+                ('anomalies', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_chunks', to='core.equipment')),
+            ],
+            options={
+                'db_table': 'telemetry_chunks',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='telemetry_chunk_day_idx'), models.Index(fields=['equipment', 'day'], name='telemetry_chunk_eq_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('equipment', 'parameter_type', 'day'), name='telemetry_chunk_day_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:27
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_telemetry_chunks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomalyState',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('parameter_type', models.CharField(max_length=100)),
+                ('reading_count', models.PositiveBigIntegerField(default=0)),
+                ('ewma_mean', models.FloatField(default=0)),
+                ('ewma_variance', models.FloatField(default=0)),
+                ('window', models.BinaryField(default=bytes)),
+                ('last_reading_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomaly_states', to='core.equipment')),
+            ],
+            options={
+                'db_table': 'anomaly_states',
+                'constraints': [models.UniqueConstraint(fields=('equipment', 'parameter_type'), name='anomaly_state_series_uniq')],
+            },
+        ),
+    ]
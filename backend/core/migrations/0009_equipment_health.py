@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_anomaly_states'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HealthDirtyMark',
+            fields=[
+                ('equipment_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('marked_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'equipment_health_dirty',
+            },
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='health_scored_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['health_scored_at'], name='equipment_health_scored_idx'),
+        ),
+    ]
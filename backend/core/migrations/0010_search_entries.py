@@ -0,0 +1,97 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:34
+
+from django.db import migrations, models
+
+
+FTS_TABLE = 'search_entries_fts'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "ALTER TABLE search_entries ADD COLUMN document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english'::regconfig, title), 'A') || "
+            "setweight(to_tsvector('english'::regconfig, body), 'B')) STORED"
+        )
+        schema_editor.execute('CREATE INDEX search_entries_document_idx ON search_entries USING GIN (document)')
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, body, content='search_entries', "
+            f"content_rowid='id', tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER search_entries_ai AFTER INSERT ON search_entries BEGIN '
+            f'INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END'
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER search_entries_ad AFTER DELETE ON search_entries BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER search_entries_au AFTER UPDATE ON search_entries BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+            f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for trigger in ('search_entries_ai', 'search_entries_ad', 'search_entries_au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def populate_entries(apps, schema_editor):
+    SearchEntry = apps.get_model('core', 'SearchEntry')
+    documents = {
+        'ticket': (
+            apps.get_model('core', 'Ticket'),
+            lambda ticket: {'title': ticket.title, 'body': ticket.description or ''},
+        ),
+        'equipment': (
+            apps.get_model('core', 'Equipment'),
+            lambda item: {'title': item.name, 'body': ' '.join(filter(None, [
+                item.serial_number, item.model, item.manufacturer, item.department
+            ]))},
+        ),
+        'message': (
+            apps.get_model('core', 'Message'),
+            lambda message: {'body': message.content, 'parent_id': message.ticket_id},
+        ),
+    }
+    for kind, (model, document) in documents.items():
+        entries = []
+        for instance in model.objects.iterator(chunk_size=1000):
+            entries.append(SearchEntry(kind=kind, object_id=instance.pk, **document(instance)))
+            if len(entries) == 1000:
+                SearchEntry.objects.bulk_create(entries)
+                entries = []
+        SearchEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_equipment_health'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('ticket', 'Ticket'), ('equipment', 'Equipment'), ('message', 'Message')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('parent_id', models.UUIDField(blank=True, null=True)),
+                ('title', models.TextField(blank=True, default='')),
+                ('body', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'search_entries',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_entry_object_uniq')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_entries, migrations.RunPython.noop),
+    ]
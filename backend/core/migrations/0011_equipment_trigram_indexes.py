@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-17 19:36
+
+from django.db import migrations
+
+
+INDEXES = {
+    'equipment_serial_trgm_idx': 'serial_number',
+    'equipment_name_trgm_idx': 'name',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Other databases autocomplete from the in-process prefix index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON equipment USING GIN (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_search_entries'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:00
+
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    # Existing messages were never edited; without this every one of them
+    # would look changed at migration time and be re-sent to sync clients
+    Message = apps.get_model('core', 'Message')
+    Message.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_equipment_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['updated_at', 'id'], name='message_updated_idx'),
+        ),
+    ]
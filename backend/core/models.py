@@ -1,8 +1,12 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
 import uuid
 
+from .hierarchy import build_path, path_depth, subtree_q
+
 
 class User(AbstractUser):
     """
@@ -45,6 +49,9 @@ class MaintenanceTeam(models.Model):
     
     class Meta:
         db_table = 'maintenance_teams'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='team_updated_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -69,15 +76,44 @@ class AssetHierarchy(models.Model):
         blank=True,
         related_name='children'
     )
+    # Materialized path of ancestor ids ("/<site>/<area>/<self>/"), kept in
+    # sync on save so subtree lookups are a single indexed prefix scan
+    path = models.CharField(max_length=512, blank=True, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'asset_hierarchy'
         verbose_name_plural = 'Asset Hierarchies'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='hierarchy_updated_idx'),
+            models.Index(fields=['path'], name='hierarchy_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def __str__(self):
         return f"{self.level_type}: {self.name}"
+    
+    def save(self, *args, **kwargs):
+        old_path = self.path
+        parent_path = self.parent.path if self.parent_id else None
+        if old_path and parent_path and parent_path.startswith(old_path):
+            raise ValueError('An asset cannot be moved under its own subtree')
+        
+        self.path = build_path(parent_path, self.id)
+        self.depth = path_depth(self.path)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'path', 'depth'}
+        super().save(*args, **kwargs)
+        
+        if old_path and old_path != self.path:
+            # Re-root every descendant in one UPDATE
+            AssetHierarchy.objects.filter(subtree_q(old_path)).exclude(pk=self.pk).update(
+                path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (path_depth(self.path) - path_depth(old_path)),
+                # update() skips auto_now; delta sync must still see the move
+                updated_at=timezone.now(),
+            )
 
 
 class Equipment(models.Model):
@@ -139,14 +175,38 @@ class Equipment(models.Model):
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set by `manage.py score_health` (see core/health.py)
+    health_scored_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     class Meta:
         db_table = 'equipment'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='equipment_updated_idx'),
+            models.Index(fields=['health_scored_at'], name='equipment_health_scored_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.serial_number})"
 
 
+class HealthDirtyMark(models.Model):
+    """
+    Equipment whose health inputs changed since it was last scored.
+
+    Deliberately not a foreign key: marks are written from signals that can
+    fire while the equipment itself is being deleted, and the scorer simply
+    drops marks for equipment that no longer exists.
+    """
+    equipment_id = models.UUIDField(primary_key=True)
+    marked_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'equipment_health_dirty'
+    
+    def __str__(self):
+        return f"{self.equipment_id} dirty since {self.marked_at}"
+
+
 class MaintenanceTrigger(models.Model):
     """
     Automation rules for triggering maintenance based on telemetry
@@ -209,11 +269,162 @@ class MachineTelemetryLog(models.Model):
     class Meta:
         db_table = 'machine_telemetry_log'
         ordering = ['-reading_date_time']
+        indexes = [
+            models.Index(fields=['-reading_date_time', '-id'], name='telemetry_time_idx'),
+            models.Index(fields=['equipment', '-reading_date_time', '-id'], name='telemetry_equipment_time_idx'),
+            models.Index(
+                fields=['equipment', 'parameter_type', '-reading_date_time', '-id'],
+                name='telemetry_eq_param_time_idx'
+            ),
+            # Partial indexes: anomaly feeds and the processing worker backlog
+            models.Index(
+                fields=['equipment', '-reading_date_time'],
+                condition=models.Q(is_anomaly=True),
+                name='telemetry_anomaly_idx'
+            ),
+            models.Index(
+                fields=['reading_date_time', 'id'],
+                condition=models.Q(processed_flag=False),
+                name='telemetry_unprocessed_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.equipment.name} - {self.parameter_type}: {self.value}"
 
 
+class TelemetryRollup(models.Model):
+    """
+    Pre-aggregated telemetry per equipment, parameter and time bucket
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='telemetry_rollups'
+    )
+    parameter_type = models.CharField(max_length=100)
+    
+    RESOLUTION_CHOICES = [
+        ('1m', '1 Minute'),
+        ('1h', '1 Hour'),
+        ('1d', '1 Day'),
+    ]
+    resolution = models.CharField(max_length=2, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+    
+    reading_count = models.PositiveIntegerField(default=0)
+    value_sum = models.FloatField(default=0)
+    value_min = models.FloatField()
+    value_max = models.FloatField()
+    
+    class Meta:
+        db_table = 'telemetry_rollups'
+        ordering = ['bucket_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['equipment', 'parameter_type', 'resolution', 'bucket_start'],
+                name='telemetry_rollup_bucket_uniq'
+            ),
+        ]
+    
+    @property
+    def value_avg(self):
+        return self.value_sum / self.reading_count if self.reading_count else None
+    
+    def __str__(self):
+        return f"{self.equipment_id} - {self.parameter_type} [{self.resolution}] {self.bucket_start}"
+
+
+class AnomalyState(models.Model):
+    """
+    Rolling statistics of one equipment/parameter series used to score
+    incoming readings (see core/anomaly.py)
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='anomaly_states'
+    )
+    parameter_type = models.CharField(max_length=100)
+    
+    reading_count = models.PositiveBigIntegerField(default=0)
+    ewma_mean = models.FloatField(default=0)
+    ewma_variance = models.FloatField(default=0)
+    # Most recent values (packed float64, oldest first) for median/MAD scoring
+    window = models.BinaryField(default=bytes)
+    last_reading_at = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'anomaly_states'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['equipment', 'parameter_type'],
+                name='anomaly_state_series_uniq'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipment_id} - {self.parameter_type} (n={self.reading_count})"
+
+
+class TelemetryChunk(models.Model):
+    """
+    Compressed columnar block of processed readings for one equipment,
+    parameter and UTC day (see core/columnar.py)
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='telemetry_chunks'
+    )
+    parameter_type = models.CharField(max_length=100)
+    day = models.DateField()
+    
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    reading_count = models.PositiveIntegerField()
+    
+    VALUE_TYPE_CHOICES = [
+        ('float32', 'Float32'),
+        ('float64', 'Float64'),
+    ]
+    value_type = models.CharField(max_length=7, choices=VALUE_TYPE_CHOICES, default='float64')
+    # zlib-compressed little-endian arrays: int64 microsecond timestamps
+    # (first absolute, then deltas), values, and int32 anomaly positions
+    timestamps = models.BinaryField()
+    values = models.BinaryField()
+    anomalies = models.BinaryField()
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'telemetry_chunks'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['equipment', 'parameter_type', 'day'],
+                name='telemetry_chunk_day_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='telemetry_chunk_day_idx'),
+            models.Index(fields=['equipment', 'day'], name='telemetry_chunk_eq_day_idx'),
+        ]
+    
+    @property
+    def stored_bytes(self):
+        return len(self.timestamps) + len(self.values) + len(self.anomalies)
+    
+    def __str__(self):
+        return f"{self.equipment_id} - {self.parameter_type} {self.day} ({self.reading_count})"
+
+
 class Ticket(models.Model):
     """
     Maintenance ticket/request model
@@ -289,6 +500,21 @@ class Ticket(models.Model):
     class Meta:
         db_table = 'tickets'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='ticket_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='ticket_updated_idx'),
+            models.Index(fields=['stage', '-created_at', '-id'], name='ticket_stage_created_idx'),
+            models.Index(fields=['priority', '-created_at'], name='ticket_priority_created_idx'),
+            models.Index(fields=['assigned_technician', '-created_at'], name='ticket_tech_created_idx'),
+            models.Index(fields=['assigned_team', '-created_at'], name='ticket_team_created_idx'),
+            models.Index(fields=['equipment', '-created_at'], name='ticket_equipment_created_idx'),
+            # Partial index: the Kanban board and trigger dedupe only read open tickets
+            models.Index(
+                fields=['equipment', 'request_type', 'title'],
+                condition=models.Q(stage__in=['New', 'In Progress']),
+                name='ticket_open_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"[{self.stage}] {self.title}"
@@ -320,10 +546,65 @@ class Message(models.Model):
     type = models.CharField(max_length=20, choices=MESSAGE_TYPE_CHOICES, default='text')
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'messages'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='message_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='message_updated_idx'),
+            models.Index(fields=['ticket', 'created_at', 'id'], name='message_ticket_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username if self.user else 'System'}: {self.content[:50]}"
+
+
+class SearchEntry(models.Model):
+    """
+    Searchable text of a ticket, equipment or message, indexed by the
+    database's full-text engine (see core/search.py)
+    """
+    KIND_CHOICES = [
+        ('ticket', 'Ticket'),
+        ('equipment', 'Equipment'),
+        ('message', 'Message'),
+    ]
+    # Integer key: SQLite's FTS5 table maps its rowid onto it
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    # Ticket of a message, so results can link to the conversation
+    parent_id = models.UUIDField(null=True, blank=True)
+    title = models.TextField(blank=True, default='')
+    body = models.TextField(blank=True, default='')
+    
+    class Meta:
+        db_table = 'search_entries'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_entry_object_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class SyncTombstone(models.Model):
+    """
+    Record of a deleted row so offline clients can drop it on their next sync
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    model_name = models.CharField(max_length=50)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'sync_tombstones'
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['model_name', 'deleted_at', 'id'], name='tombstone_model_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_name} {self.object_id} deleted {self.deleted_at}"
@@ -0,0 +1,173 @@
+"""
+Keyset (seek) pagination for large, append-mostly tables
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates on ``(ordering field, id)`` instead of OFFSET.
+
+    Each page is a range scan starting right after the last row of the
+    previous page, so page 1000 costs the same as page 1 and no COUNT(*) is
+    issued. The ordering field comes from the view's OrderingFilter (or its
+    ``ordering`` attribute) and ``id`` breaks ties between equal values.
+    """
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['reverse'])
+        # Walking backwards flips the sort and the comparison, then the page
+        # is reversed again before it is returned.
+        descending = self.descending != reverse
+        direction = '-' if descending else ''
+        queryset = queryset.order_by(f'{direction}{self.field}', f'{direction}id')
+
+        if cursor:
+            queryset = queryset.filter(self.seek_filter(cursor, descending))
+
+        rows = self.fetch_rows(queryset, cursor, descending, self.page_size + 1)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def fetch_rows(self, queryset, cursor, descending, limit):
+        return list(queryset[:limit])
+
+    def seek_filter(self, cursor, descending):
+        comparison = 'lt' if descending else 'gt'
+        position, pk = cursor['position'], cursor['id']
+        # The inclusive bound on the leading column keeps this an index range scan
+        bound = 'lte' if descending else 'gte'
+        return Q(**{f'{self.field}__{bound}': position}) & (
+            Q(**{f'{self.field}__{comparison}': position})
+            | Q(**{self.field: position, f'id__{comparison}': pk})
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'ordering', None) or queryset.model._meta.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        field = ordering[0]
+        return field.lstrip('-'), field.startswith('-')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return {
+                'position': model._meta.get_field(self.field).to_python(payload['p']),
+                'id': model._meta.pk.to_python(payload['i']),
+                'reverse': bool(payload.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        value = getattr(row, self.field)
+        position = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        # Rows are model instances or named values_list() tuples
+        payload = {'p': position, 'i': str(row.id)}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        return self.encode_cursor(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_row is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first_row, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class TelemetryPagination(KeysetPagination):
+    """
+    Keyset pagination over live telemetry rows and, with
+    ``TELEMETRY_COLUMNAR_STORAGE``, the compacted chunks as well.
+
+    Both stores are read from the cursor on with the same limit and merged
+    on ``(reading_date_time, id)``, so pages are seamless across the
+    boundary. Ordering by ``created_at`` only covers live rows.
+    """
+
+    def fetch_rows(self, queryset, cursor, descending, limit):
+        rows = super().fetch_rows(queryset, cursor, descending, limit)
+        if not settings.TELEMETRY_COLUMNAR_STORAGE or self.field != 'reading_date_time':
+            return rows
+        archived = self.view.get_archived_readings(
+            cursor['position'] if cursor else None,
+            cursor['id'] if cursor else None,
+            descending, limit,
+        )
+        if not archived:
+            return rows
+        rows = sorted(rows + archived, key=lambda row: (row.reading_date_time, row.id), reverse=descending)
+        return rows[:limit]
@@ -0,0 +1,195 @@
+"""
+Native PostgreSQL range partitioning of machine_telemetry_log
+
+The table is partitioned on ``reading_date_time`` by day or month
+(``TELEMETRY_PARTITION_INTERVAL``), with partitions named
+``machine_telemetry_log_p<YYYYMMDD|YYYYMM>`` created
+``TELEMETRY_PARTITION_PREMAKE`` intervals ahead, plus a default partition
+that catches anything outside them. Expired partitions are detached and
+dropped, which replaces a long DELETE with a catalog update.
+
+PostgreSQL requires unique keys of a partitioned table to include the
+partition key, so after conversion the primary key is
+``(id, reading_date_time)``; ids are random UUIDs, so lookups by id alone
+are unaffected. Nothing here runs on other databases.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import MachineTelemetryLog
+
+
+TABLE = MachineTelemetryLog._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_PREFIX = f'{TABLE}_p'
+NAME_FORMATS = {'day': '%Y%m%d', 'month': '%Y%m'}
+
+
+def _qn(name):
+    return connection.ops.quote_name(name)
+
+
+def _literal(moment):
+    # Bounds are generated here, never taken from input
+    return f"'{moment.isoformat()}'"
+
+
+def supported():
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned():
+    if not supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def interval_start(moment, interval=None):
+    interval = interval or settings.TELEMETRY_PARTITION_INTERVAL
+    moment = moment.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(day=1) if interval == 'month' else moment
+
+
+def next_start(start, interval=None):
+    interval = interval or settings.TELEMETRY_PARTITION_INTERVAL
+    if interval == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def partition_name(start, interval=None):
+    interval = interval or settings.TELEMETRY_PARTITION_INTERVAL
+    return f'{PARTITION_PREFIX}{start.strftime(NAME_FORMATS[interval])}'
+
+
+def list_partitions():
+    """``(name, start, end)`` of every range partition, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)', [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        suffix = name[len(PARTITION_PREFIX):] if name.startswith(PARTITION_PREFIX) else ''
+        interval = {8: 'day', 6: 'month'}.get(len(suffix))
+        if interval is None or not suffix.isdigit():
+            continue
+        start = datetime.strptime(suffix, NAME_FORMATS[interval]).replace(tzinfo=dt_timezone.utc)
+        partitions.append((name, start, next_start(start, interval)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def partition_ddl(start, end, name):
+    """
+    Statements creating and attaching the partition for ``[start, end)``,
+    first moving any rows the default partition caught for that range
+    """
+    return [
+        f'CREATE TABLE {_qn(name)} (LIKE {_qn(TABLE)} INCLUDING DEFAULTS)',
+        f'WITH moved AS (DELETE FROM {_qn(DEFAULT_PARTITION)} '
+        f'WHERE reading_date_time >= {_literal(start)} AND reading_date_time < {_literal(end)} '
+        f'RETURNING *) INSERT INTO {_qn(name)} SELECT * FROM moved',
+        f'ALTER TABLE {_qn(TABLE)} ATTACH PARTITION {_qn(name)} '
+        f'FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})',
+    ]
+
+
+def create_partition(start, end, name):
+    with transaction.atomic(), connection.cursor() as cursor:
+        for statement in partition_ddl(start, end, name):
+            cursor.execute(statement)
+
+
+def ensure_partitions(now, since=None):
+    """Create missing partitions from ``since`` (default: now) to the premake horizon"""
+    existing = {name for name, _, _ in list_partitions()}
+    created = []
+    start = interval_start(since or now)
+    horizon = interval_start(now)
+    for _ in range(settings.TELEMETRY_PARTITION_PREMAKE):
+        horizon = next_start(horizon)
+    while start <= horizon:
+        end = next_start(start)
+        name = partition_name(start)
+        if name not in existing:
+            create_partition(start, end, name)
+            created.append(name)
+        start = end
+    return created
+
+
+def drop_expired_partitions(cutoff):
+    """
+    Detach and drop every partition that ends at or before ``cutoff``.
+
+    A partition still holding unprocessed readings is kept; its expired
+    processed rows are left to the batched delete.
+    """
+    dropped = []
+    for name, _, end in list_partitions():
+        if end > cutoff:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {_qn(name)} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {_qn(name)} WHERE NOT processed_flag)')
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f'ALTER TABLE {_qn(TABLE)} DETACH PARTITION {_qn(name)}')
+            cursor.execute(f'DROP TABLE {_qn(name)}')
+        dropped.append(name)
+    return dropped
+
+
+def convert_to_partitioned(now, since):
+    """
+    Rebuild machine_telemetry_log as a partitioned table in one transaction.
+
+    Range partitions are created from ``since``; older rows land in the
+    default partition, where retention deletes them in batches. Secondary
+    indexes and the equipment foreign key are recreated under their
+    original names. Writers are blocked while rows are copied, so run it in
+    a maintenance window.
+    """
+    old = f'{TABLE}_unpartitioned'
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {_qn(TABLE)} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(
+                'SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s '
+                'AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))',
+                [TABLE, TABLE]
+            )
+            indexes = cursor.fetchall()
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [TABLE]
+            )
+            foreign_keys = cursor.fetchall()
+
+            cursor.execute(f'ALTER TABLE {_qn(TABLE)} RENAME TO {_qn(old)}')
+            cursor.execute(
+                f'CREATE TABLE {_qn(TABLE)} (LIKE {_qn(old)} INCLUDING DEFAULTS) '
+                f'PARTITION BY RANGE (reading_date_time)'
+            )
+            cursor.execute(f'CREATE TABLE {_qn(DEFAULT_PARTITION)} PARTITION OF {_qn(TABLE)} DEFAULT')
+
+        ensure_partitions(now, since=since)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO {_qn(TABLE)} SELECT * FROM {_qn(old)}')
+            cursor.execute(f'DROP TABLE {_qn(old)}')
+            cursor.execute(f'ALTER TABLE {_qn(TABLE)} ADD PRIMARY KEY (id, reading_date_time)')
+            for name, definition in foreign_keys:
+                cursor.execute(f'ALTER TABLE {_qn(TABLE)} ADD CONSTRAINT {_qn(name)} {definition}')
+            # Definitions were read before the rename, so they target the new table
+            for _, definition in indexes:
+                cursor.execute(definition)
@@ -0,0 +1,122 @@
+"""
+Telemetry processing pipeline shared by the API and the background worker
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .analytics import invalidate_months
+from .anomaly import detect_anomalies
+from .events import equipment_routes, publish, routing_channels
+from .health import mark_dirty
+from .models import MachineTelemetryLog
+from .rollups import update_rollups
+from .search import index_objects
+from .triggers import engine as trigger_engine
+
+
+def process_readings(readings):
+    """
+    Run anomaly detection, trigger evaluation and rollup maintenance on a
+    batch of readings.
+
+    Readings are updated in memory (``is_anomaly``) and the Condition_Based
+    tickets opened for trigger violations are returned. Persisting the
+    readings is left to the caller. Each reading must pass through here
+    exactly once, otherwise it is counted twice in the rollups and the
+    anomaly statistics. Equipment that received readings is marked for
+    health rescoring.
+
+    With ``TELEMETRY_ANOMALY_DETECTION`` the flag comes from the statistical
+    detector; otherwise a caller-supplied flag is kept and trigger
+    violations are flagged too.
+    """
+    violations = trigger_engine.find_violations(readings)
+    if settings.TELEMETRY_ANOMALY_DETECTION:
+        detect_anomalies(readings)
+    else:
+        for _, reading in violations:
+            reading.is_anomaly = True
+    update_rollups(readings)
+    mark_dirty(reading.equipment_id for reading in readings)
+    publish_anomalies(readings)
+    tickets = trigger_engine.create_tickets(violations)
+    # bulk_create sends no signals, so refresh the KPI buckets and index here
+    invalidate_months(ticket.created_at for ticket in tickets)
+    index_objects(tickets)
+    return tickets
+
+
+def publish_anomalies(readings):
+    """Push anomalous readings to real-time subscribers once committed"""
+    anomalies = [reading for reading in readings if reading.is_anomaly]
+    if not anomalies:
+        return
+    routes = equipment_routes(reading.equipment_id for reading in anomalies)
+    for reading in anomalies:
+        team_id, hierarchy_path = routes.get(reading.equipment_id, (None, None))
+        publish(
+            'telemetry.anomaly',
+            routing_channels(reading.equipment_id, team_id, hierarchy_path),
+            {
+                'reading': reading.id,
+                'equipment': reading.equipment_id,
+                'parameter_type': reading.parameter_type,
+                'value': reading.value,
+                'reading_date_time': reading.reading_date_time,
+            },
+        )
+
+
+@contextmanager
+def claim_transaction():
+    """
+    ``transaction.atomic()`` that takes the SQLite write lock at ``BEGIN``.
+
+    SQLite has no row locks. Starting the claim with ``BEGIN IMMEDIATE``
+    makes concurrent workers wait for each other instead of reading the
+    same batch. Other transactions keep the default deferred mode.
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic():
+            yield
+        return
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic():
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
+
+
+def drain_batch(batch_size):
+    """
+    Claim up to ``batch_size`` unprocessed readings, process and mark them.
+
+    On backends with ``SKIP LOCKED`` (PostgreSQL) concurrent workers claim
+    disjoint batches. On SQLite the claim runs in ``claim_transaction``, which
+    serializes workers on the database write lock. Returns ``(rows, tickets)``
+    counts.
+    """
+    with claim_transaction():
+        queryset = MachineTelemetryLog.objects.filter(
+            processed_flag=False
+        ).order_by('reading_date_time', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        readings = list(queryset[:batch_size])
+        if not readings:
+            return 0, 0
+
+        tickets = process_readings(readings)
+        for reading in readings:
+            reading.processed_flag = True
+        MachineTelemetryLog.objects.bulk_update(
+            readings, ['processed_flag', 'is_anomaly'], batch_size=batch_size
+        )
+    return len(readings), len(tickets)
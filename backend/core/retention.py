@@ -0,0 +1,120 @@
+"""
+Telemetry retention: expire raw readings and rollup tiers per parameter
+
+``TELEMETRY_RETENTION`` maps each tier ('raw', '1m', '1h', '1d') to the
+number of days to keep, with ``None`` meaning forever. The 'default'
+policy applies to every parameter that has no entry of its own. Raw data
+covers both live rows and compacted chunks; coarser tiers are the rollup
+tables, which the processing pipeline keeps up to date, so downsampling
+has already happened by the time raw data expires.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import MachineTelemetryLog, SyncTombstone, TelemetryChunk, TelemetryRollup
+from .rollups import RESOLUTIONS
+
+
+TIERS = ('raw', *RESOLUTIONS)
+
+
+def tier_days(tier):
+    """``{parameter or 'default': days}`` for one tier"""
+    return {
+        parameter: policy[tier]
+        for parameter, policy in settings.TELEMETRY_RETENTION.items()
+        if tier in policy
+    }
+
+
+def longest_retention(tier):
+    """Days the longest-lived parameter keeps ``tier`` for; None if forever"""
+    days = tier_days(tier).values()
+    return None if None in days or not days else max(days)
+
+
+def expired_q(tier, field, now, as_date=False):
+    """
+    Q matching rows of ``tier`` older than their parameter's retention, or
+    None when nothing in the tier ever expires.
+    """
+    days = tier_days(tier)
+    overrides = [parameter for parameter in days if parameter != 'default']
+
+    def older_than(number):
+        cutoff = now - timedelta(days=number)
+        return Q(**{f'{field}__lt': cutoff.date() if as_date else cutoff})
+
+    conditions = []
+    if days.get('default') is not None:
+        conditions.append(older_than(days['default']) & ~Q(parameter_type__in=overrides))
+    for parameter in overrides:
+        if days[parameter] is not None:
+            conditions.append(older_than(days[parameter]) & Q(parameter_type=parameter))
+    if not conditions:
+        return None
+    combined = conditions[0]
+    for condition in conditions[1:]:
+        combined |= condition
+    return combined
+
+
+def delete_in_batches(queryset, order_field, batch_size=None, pause=0):
+    """
+    Delete ``queryset`` oldest first, ``batch_size`` primary keys at a time.
+
+    Each batch is its own short statement (and transaction under
+    autocommit), so row locks and WAL bursts stay bounded and concurrent
+    writers are never blocked for long. Returns the number of rows deleted.
+    """
+    batch_size = batch_size or settings.TELEMETRY_RETENTION_BATCH_SIZE
+    model = queryset.model
+    total = 0
+    while True:
+        ids = list(queryset.order_by(order_field).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        deleted, _ = model.objects.filter(pk__in=ids).delete()
+        total += deleted
+        if pause:
+            time.sleep(pause)
+
+
+def expired_querysets(now):
+    """``(label, queryset, order field)`` for everything past its retention"""
+    targets = []
+
+    # Unprocessed readings have not reached the rollups yet; keep them
+    raw = expired_q('raw', 'reading_date_time', now)
+    if raw is not None:
+        targets.append((
+            'raw readings',
+            MachineTelemetryLog.objects.filter(raw, processed_flag=True),
+            'reading_date_time',
+        ))
+    chunks = expired_q('raw', 'day', now, as_date=True)
+    if chunks is not None:
+        targets.append(('raw chunks', TelemetryChunk.objects.filter(chunks), 'day'))
+
+    for resolution in RESOLUTIONS:
+        expired = expired_q(resolution, 'bucket_start', now)
+        if expired is not None:
+            targets.append((
+                f'{resolution} rollups',
+                TelemetryRollup.objects.filter(expired, resolution=resolution),
+                'bucket_start',
+            ))
+
+    if settings.SYNC_TOMBSTONE_RETENTION_DAYS is not None:
+        targets.append((
+            'sync tombstones',
+            SyncTombstone.objects.filter(
+                deleted_at__lt=now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+            ),
+            'deleted_at',
+        ))
+    return targets
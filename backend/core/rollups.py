@@ -0,0 +1,213 @@
+"""
+Incrementally maintained telemetry rollups (1 minute, 1 hour, 1 day)
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection
+from django.db.models import Count, FloatField, Max, Min, Sum
+from django.db.models.functions import Cast, TruncDay, TruncHour, TruncMinute
+
+from .columnar import iter_chunk_readings
+from .models import MachineTelemetryLog, TelemetryChunk, TelemetryRollup
+
+
+RESOLUTIONS = {
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+
+TRUNCATE = {
+    '1m': TruncMinute,
+    '1h': TruncHour,
+    '1d': TruncDay,
+}
+
+
+def bucket_start(moment, resolution):
+    """Floor a timestamp to the start of its (UTC) bucket"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    moment = moment.replace(second=0, microsecond=0)
+    if resolution in ('1h', '1d'):
+        moment = moment.replace(minute=0)
+    if resolution == '1d':
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def choose_resolution(start, end, max_points):
+    """
+    Pick the finest resolution whose bucket count over [start, end) fits
+    the point budget, falling back to daily buckets for very long ranges.
+    """
+    span = end - start
+    for resolution, width in RESOLUTIONS.items():
+        if span / width <= max_points:
+            return resolution
+    return '1d'
+
+
+def _aggregate(readings):
+    buckets = {}
+    for reading in readings:
+        value = float(reading.value)
+        for resolution in RESOLUTIONS:
+            key = (
+                reading.equipment_id, reading.parameter_type, resolution,
+                bucket_start(reading.reading_date_time, resolution),
+            )
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [1, value, value, value]
+            else:
+                bucket[0] += 1
+                bucket[1] += value
+                bucket[2] = min(bucket[2], value)
+                bucket[3] = max(bucket[3], value)
+    return buckets
+
+
+def _upsert_sql():
+    table = connection.ops.quote_name(TelemetryRollup._meta.db_table)
+    least, greatest = ('LEAST', 'GREATEST') if connection.vendor == 'postgresql' else ('MIN', 'MAX')
+    return (
+        f'INSERT INTO {table} (id, equipment_id, parameter_type, resolution, bucket_start, '
+        f'reading_count, value_sum, value_min, value_max) '
+        f'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) '
+        f'ON CONFLICT (equipment_id, parameter_type, resolution, bucket_start) DO UPDATE SET '
+        f'reading_count = {table}.reading_count + excluded.reading_count, '
+        f'value_sum = {table}.value_sum + excluded.value_sum, '
+        f'value_min = {least}({table}.value_min, excluded.value_min), '
+        f'value_max = {greatest}({table}.value_max, excluded.value_max)'
+    )
+
+
+def update_rollups(readings):
+    """
+    Merge a batch of readings into the rollup tables.
+
+    The batch is pre-aggregated in memory and merged with a single
+    ``INSERT ... ON CONFLICT DO UPDATE`` per bucket, which is atomic, so
+    concurrent writers never lose counts. Keys are written in sorted order
+    to keep row-lock acquisition consistent across workers.
+    """
+    buckets = _aggregate(readings)
+    if not buckets:
+        return 0
+
+    fields = {name: TelemetryRollup._meta.get_field(name) for name in (
+        'id', 'equipment', 'bucket_start'
+    )}
+    params = []
+    for key in sorted(buckets, key=lambda k: (str(k[0]), k[1], k[2], k[3])):
+        equipment_id, parameter_type, resolution, start = key
+        count, total, low, high = buckets[key]
+        params.append((
+            fields['id'].get_db_prep_value(uuid.uuid4(), connection),
+            fields['equipment'].get_db_prep_value(equipment_id, connection),
+            parameter_type,
+            resolution,
+            fields['bucket_start'].get_db_prep_value(start, connection),
+            count, total, low, high,
+        ))
+    with connection.cursor() as cursor:
+        cursor.executemany(_upsert_sql(), params)
+    return len(params)
+
+
+def rebuild_floor(now=None):
+    """
+    Start of the oldest UTC day whose raw readings are all still stored, or
+    None when there are none.
+
+    That is the day of the oldest surviving reading or chunk, but never
+    before the first whole day inside the shortest raw retention: earlier
+    days may already have lost readings to ``apply_retention``, and their
+    rollups are the only record left.
+    """
+    # retention imports this module
+    from .retention import tier_days
+
+    oldest = [
+        moment for moment in (
+            MachineTelemetryLog.objects.filter(processed_flag=True).order_by('reading_date_time')
+            .values_list('reading_date_time', flat=True).first(),
+            TelemetryChunk.objects.order_by('start_time').values_list('start_time', flat=True).first(),
+        ) if moment is not None
+    ]
+    if not oldest:
+        return None
+    floor = bucket_start(min(oldest), '1d')
+
+    retained = [days for days in tier_days('raw').values() if days is not None]
+    if retained:
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=min(retained))
+        horizon = bucket_start(cutoff, '1d')
+        if horizon < cutoff:
+            horizon += RESOLUTIONS['1d']
+        floor = max(floor, horizon)
+    return floor
+
+
+def rebuild_rollups(start=None, end=None, now=None):
+    """
+    Recompute rollups from raw telemetry with database-side aggregation.
+
+    Used to backfill history or repair buckets. The range is widened to
+    whole days, starts no earlier than ``rebuild_floor``, and existing
+    rollups inside it are replaced. Readings already compacted into
+    columnar chunks are decoded and merged in as well.
+    """
+    floor = rebuild_floor(now)
+    if floor is None:
+        return 0
+    start = max(bucket_start(start, '1d'), floor) if start else floor
+    if end and bucket_start(end, '1d') < start:
+        return 0
+
+    # Unprocessed rows are merged by the pipeline later; counting them here
+    # would add them twice
+    raw = MachineTelemetryLog.objects.filter(
+        processed_flag=True, reading_date_time__gte=start
+    ).order_by()
+    rollups = TelemetryRollup.objects.filter(bucket_start__gte=start)
+    chunks = TelemetryChunk.objects.filter(day__gte=start.date()).order_by('day')
+    if end:
+        raw = raw.filter(reading_date_time__lt=bucket_start(end, '1d') + RESOLUTIONS['1d'])
+        rollups = rollups.filter(bucket_start__lt=bucket_start(end, '1d') + RESOLUTIONS['1d'])
+        chunks = chunks.filter(day__lte=bucket_start(end, '1d').date())
+    rollups.delete()
+
+    created = 0
+    for resolution, truncate in TRUNCATE.items():
+        rows = raw.annotate(bucket=truncate('reading_date_time')).values(
+            'equipment_id', 'parameter_type', 'bucket'
+        ).annotate(
+            reading_count=Count('id'),
+            value_sum=Sum(Cast('value', FloatField())),
+            value_min=Min(Cast('value', FloatField())),
+            value_max=Max(Cast('value', FloatField())),
+        )
+        batch = []
+        for row in rows.iterator(chunk_size=2000):
+            batch.append(TelemetryRollup(
+                equipment_id=row['equipment_id'],
+                parameter_type=row['parameter_type'],
+                resolution=resolution,
+                bucket_start=row['bucket'],
+                reading_count=row['reading_count'],
+                value_sum=row['value_sum'],
+                value_min=row['value_min'],
+                value_max=row['value_max'],
+            ))
+            if len(batch) >= 2000:
+                created += len(TelemetryRollup.objects.bulk_create(batch))
+                batch = []
+        created += len(TelemetryRollup.objects.bulk_create(batch))
+
+    for chunk in chunks.iterator(chunk_size=50):
+        created += update_rollups(iter_chunk_readings([chunk]))
+    return created
@@ -0,0 +1,213 @@
+"""
+Full-text search over tickets, equipment and messages
+
+Every searchable row has a ``SearchEntry`` (title + body) kept in sync by
+the model signals. The database's own engine indexes it:
+
+* PostgreSQL: a generated ``tsvector`` column (title weighted above body)
+  with a GIN index, ranked with ``ts_rank_cd``;
+* SQLite: an external-content FTS5 table kept in step by triggers, ranked
+  with ``bm25``.
+
+Other databases fall back to ``icontains`` on the entries. Queries are
+reduced to word terms, all of which must match, each as a prefix.
+``manage.py rebuild_search_index`` re-indexes everything.
+"""
+
+import re
+import uuid
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Equipment, Message, SearchEntry, Ticket
+
+
+# Fixed text search configuration of the generated tsvector column
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'search_entries_fts'
+EXCERPT_LENGTH = 160
+
+
+def ticket_document(ticket):
+    return {'title': ticket.title, 'body': ticket.description or ''}
+
+
+def equipment_document(equipment):
+    return {
+        'title': equipment.name,
+        'body': ' '.join(filter(None, [
+            equipment.serial_number, equipment.model, equipment.manufacturer, equipment.department
+        ])),
+    }
+
+
+def message_document(message):
+    return {'body': message.content, 'parent_id': message.ticket_id}
+
+
+DOCUMENTS = {
+    Ticket: ('ticket', ticket_document),
+    Equipment: ('equipment', equipment_document),
+    Message: ('message', message_document),
+}
+DOCUMENTS_BY_KIND = {kind: model for model, (kind, _) in DOCUMENTS.items()}
+
+
+def index_objects(instances):
+    """Create or refresh the entries of ``instances`` (all of one model)"""
+    entries = []
+    for instance in instances:
+        kind, document = DOCUMENTS[type(instance)]
+        entries.append(SearchEntry(kind=kind, object_id=instance.pk, **{
+            'title': '', 'body': '', 'parent_id': None, **document(instance)
+        }))
+    if entries:
+        SearchEntry.objects.bulk_create(
+            entries, update_conflicts=True,
+            unique_fields=['kind', 'object_id'], update_fields=['parent_id', 'title', 'body'],
+        )
+
+
+def remove_objects(model, ids):
+    kind, _ = DOCUMENTS[model]
+    SearchEntry.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def query_terms(text):
+    return re.findall(r'\w+', (text or '').lower())[:settings.SEARCH_MAX_TERMS]
+
+
+def _match(terms):
+    """``(SQL selecting matching entry ids, params)`` for the current database"""
+    if connection.vendor == 'postgresql':
+        return (
+            'SELECT id FROM search_entries WHERE document @@ to_tsquery(%s::regconfig, %s)',
+            [SEARCH_CONFIG, ' & '.join(f'{term}:*' for term in terms)],
+        )
+    return (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [' '.join(f'"{term}"*' for term in terms)],
+    )
+
+
+def _fallback_q(terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(body__icontains=term)
+    return condition
+
+
+def matching_entries(text, kind):
+    """Entries of ``kind`` matching ``text``, as a queryset usable in subqueries"""
+    terms = query_terms(text)
+    entries = SearchEntry.objects.filter(kind=kind)
+    if not terms:
+        return entries.none()
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        return entries.filter(_fallback_q(terms))
+    sql, params = _match(terms)
+    return entries.filter(id__in=RawSQL(sql, params))
+
+
+def search(text, kinds=None, limit=None):
+    """
+    Ranked matches for ``text``: dicts with kind, id, ticket (for
+    messages), title, excerpt and rank, best first.
+    """
+    terms = query_terms(text)
+    if not terms:
+        return []
+    kinds = list(kinds or DOCUMENTS_BY_KIND)
+    limit = min(limit or settings.SEARCH_RESULTS_LIMIT, settings.SEARCH_MAX_RESULTS)
+
+    if connection.vendor == 'postgresql':
+        sql = (
+            'SELECT kind, object_id, parent_id, title, substr(body, 1, %s), ts_rank_cd(document, query) '
+            'FROM search_entries, to_tsquery(%s::regconfig, %s) query '
+            'WHERE document @@ query AND kind = ANY(%s) ORDER BY 6 DESC, id LIMIT %s'
+        )
+        params = [EXCERPT_LENGTH, SEARCH_CONFIG, ' & '.join(f'{term}:*' for term in terms), kinds, limit]
+    elif connection.vendor == 'sqlite':
+        placeholders = ', '.join(['%s'] * len(kinds))
+        sql = (
+            f'SELECT e.kind, e.object_id, e.parent_id, e.title, substr(e.body, 1, %s), '
+            f'-bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'JOIN search_entries e ON e.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND e.kind IN ({placeholders}) ORDER BY 6 DESC, e.id LIMIT %s'
+        )
+        params = [EXCERPT_LENGTH, ' '.join(f'"{term}"*' for term in terms), *kinds, limit]
+    else:
+        rows = SearchEntry.objects.filter(_fallback_q(terms), kind__in=kinds).order_by('id').values_list(
+            'kind', 'object_id', 'parent_id', 'title', 'body'
+        )[:limit]
+        return [_result(*row[:4], row[4][:EXCERPT_LENGTH], 0.0) for row in rows]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [_result(*row) for row in cursor.fetchall()]
+
+
+def _uuid(value):
+    # SQLite hands raw queries back the stored hex string
+    return str(value if isinstance(value, uuid.UUID) else uuid.UUID(value)) if value else None
+
+
+def _result(kind, object_id, parent_id, title, excerpt, rank):
+    return {
+        'kind': kind,
+        'id': _uuid(object_id),
+        'ticket': _uuid(parent_id),
+        'title': title,
+        'excerpt': excerpt,
+        'rank': round(float(rank), 6),
+    }
+
+
+def rebuild(batch_size=1000):
+    """Re-index every searchable row and drop orphaned entries; returns counts per kind"""
+    counts = {}
+    for model, (kind, _) in DOCUMENTS.items():
+        counts[kind] = 0
+        batch = []
+        for instance in model.objects.order_by().iterator(chunk_size=batch_size):
+            batch.append(instance)
+            if len(batch) >= batch_size:
+                index_objects(batch)
+                counts[kind] += len(batch)
+                batch = []
+        index_objects(batch)
+        counts[kind] += len(batch)
+        SearchEntry.objects.filter(kind=kind).exclude(object_id__in=model.objects.values('pk')).delete()
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # Re-read the content table and merge index segments
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute('ANALYZE search_entries')
+    return counts
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    ``?search=`` backed by the full-text index instead of ``ILIKE``.
+
+    Views set ``search_kind`` to the entry kind of their model and may map
+    foreign keys to other kinds in ``search_related`` (e.g. tickets also
+    match on their equipment's name).
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        if not query_terms(text):
+            return queryset
+        condition = Q(pk__in=matching_entries(text, view.search_kind).values('object_id'))
+        for field, kind in getattr(view, 'search_related', {}).items():
+            condition |= Q(**{f'{field}__in': matching_entries(text, kind).values('object_id')})
+        return queryset.filter(condition)
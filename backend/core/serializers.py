@@ -6,7 +6,69 @@ from .models import (
 from django.contrib.auth.password_validation import validate_password
 
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsSerializerMixin:
+    """
+    Honours the ``fields`` and ``expand`` entries that SparseFieldsMixin puts
+    in the context: unlisted fields are dropped and relations named in
+    ``expand`` are rendered with their ``Meta.expandable_fields`` serializer
+    instead of a primary key. Nested serializers are left alone.
+    """
+    
+    def is_outermost(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_outermost():
+            return fields
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in self.context.get('expand', ()):
+            fields[name] = expandable[name](read_only=True)
+        requested = self.context.get('fields')
+        if requested is not None:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        return fields
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact user rendered by ?expand="""
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'avatar']
+
+
+class TeamSummarySerializer(serializers.ModelSerializer):
+    """Compact team rendered by ?expand="""
+    class Meta:
+        model = MaintenanceTeam
+        fields = ['id', 'name']
+
+
+class AssetHierarchySummarySerializer(serializers.ModelSerializer):
+    """Compact hierarchy node rendered by ?expand="""
+    class Meta:
+        model = AssetHierarchy
+        fields = ['id', 'name', 'level_type', 'path']
+
+
+class EquipmentSummarySerializer(serializers.ModelSerializer):
+    """Compact equipment rendered by ?expand="""
+    class Meta:
+        model = Equipment
+        fields = ['id', 'name', 'serial_number', 'status']
+
+
+class TicketSummarySerializer(serializers.ModelSerializer):
+    """Compact ticket rendered by ?expand="""
+    class Meta:
+        model = Ticket
+        fields = ['id', 'title', 'stage', 'priority']
+
+
+class UserSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     class Meta:
         model = User
@@ -40,7 +102,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class MaintenanceTeamSerializer(serializers.ModelSerializer):
+class MaintenanceTeamSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for MaintenanceTeam model"""
     lead_manager_name = serializers.CharField(source='lead_manager.get_full_name', read_only=True)
     
@@ -48,24 +110,39 @@ class MaintenanceTeamSerializer(serializers.ModelSerializer):
         model = MaintenanceTeam
         fields = ['id', 'name', 'lead_manager', 'lead_manager_name', 'description', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {'lead_manager': UserSummarySerializer}
 
 
-class AssetHierarchySerializer(serializers.ModelSerializer):
+class AssetHierarchySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for AssetHierarchy model"""
     children = serializers.SerializerMethodField()
     
     class Meta:
         model = AssetHierarchy
-        fields = ['id', 'name', 'level_type', 'parent', 'children', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'level_type', 'parent', 'path', 'depth', 'children', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'path', 'depth', 'created_at', 'updated_at']
+        expandable_fields = {'parent': AssetHierarchySummarySerializer}
     
     def get_children(self, obj):
-        if hasattr(obj, 'children'):
-            return AssetHierarchySerializer(obj.children.all(), many=True).data
-        return []
+        # Views pass a parent -> children index built from one query; without
+        # it every level costs a query per node
+        children_by_parent = self.context.get('children_by_parent')
+        if children_by_parent is not None:
+            children = children_by_parent.get(obj.id, [])
+        else:
+            children = obj.children.all()
+        # Children keep the requested fields; their parent is this node, so
+        # there is nothing to expand
+        context = {key: value for key, value in self.context.items() if key != 'expand'}
+        return AssetHierarchySerializer(children, many=True, context=context).data
+    
+    def validate_parent(self, parent):
+        if parent and self.instance and self.instance.path and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError('An asset cannot be moved under its own subtree.')
+        return parent
 
 
-class EquipmentSerializer(serializers.ModelSerializer):
+class EquipmentSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for Equipment model"""
     assigned_team_name = serializers.CharField(source='assigned_team.name', read_only=True)
     assigned_technician_name = serializers.CharField(source='assigned_technician.get_full_name', read_only=True)
@@ -83,9 +160,14 @@ class EquipmentSerializer(serializers.ModelSerializer):
             'image', 'description', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {
+            'asset_hierarchy': AssetHierarchySummarySerializer,
+            'assigned_team': TeamSummarySerializer,
+            'assigned_technician': UserSummarySerializer,
+        }
 
 
-class MaintenanceTriggerSerializer(serializers.ModelSerializer):
+class MaintenanceTriggerSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for MaintenanceTrigger model"""
     equipment_name = serializers.CharField(source='equipment.name', read_only=True)
     
@@ -97,9 +179,10 @@ class MaintenanceTriggerSerializer(serializers.ModelSerializer):
             'associated_task_template', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {'equipment': EquipmentSummarySerializer}
 
 
-class MachineTelemetryLogSerializer(serializers.ModelSerializer):
+class MachineTelemetryLogSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for MachineTelemetryLog model"""
     equipment_name = serializers.CharField(source='equipment.name', read_only=True)
     
@@ -110,9 +193,10 @@ class MachineTelemetryLogSerializer(serializers.ModelSerializer):
             'reading_date_time', 'processed_flag', 'is_anomaly', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        expandable_fields = {'equipment': EquipmentSummarySerializer}
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for Message model"""
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     user_avatar = serializers.CharField(source='user.avatar', read_only=True)
@@ -121,18 +205,19 @@ class MessageSerializer(serializers.ModelSerializer):
         model = Message
         fields = [
             'id', 'ticket', 'user', 'user_name', 'user_avatar',
-            'content', 'type', 'created_at'
+            'content', 'type', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {'ticket': TicketSummarySerializer, 'user': UserSummarySerializer}
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Serializer for Ticket model"""
     equipment_name = serializers.CharField(source='equipment.name', read_only=True)
     assigned_team_name = serializers.CharField(source='assigned_team.name', read_only=True)
     assigned_technician_name = serializers.CharField(source='assigned_technician.get_full_name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
-    messages_count = serializers.IntegerField(source='messages.count', read_only=True)
+    messages_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Ticket
@@ -146,6 +231,21 @@ class TicketSerializer(serializers.ModelSerializer):
             'messages_count', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {
+            'equipment': EquipmentSummarySerializer,
+            'assigned_team': TeamSummarySerializer,
+            'assigned_technician': UserSummarySerializer,
+            'created_by': UserSummarySerializer,
+        }
+        # values() source of method fields for the fast list path (core/fastpath.py)
+        fast_sources = {'messages_count': 'message_count'}
+    
+    def get_messages_count(self, obj):
+        # Querysets from TicketViewSet carry a message_count annotation
+        count = getattr(obj, 'message_count', None)
+        if count is None:
+            count = obj.messages.count()
+        return count
 
 
 class TicketDetailSerializer(TicketSerializer):
@@ -0,0 +1,155 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .analytics import invalidate_months
+from .autocomplete import index as autocomplete_index
+from .cache import bump_generation
+from .events import equipment_routes, publish, routing_channels
+from .health import mark_dirty
+from .search import DOCUMENTS as SEARCH_DOCUMENTS, index_objects, remove_objects
+from .models import (
+    AssetHierarchy, Equipment, MaintenanceTeam, MaintenanceTrigger, Message, SyncTombstone, Ticket, User
+)
+from .sync import TOMBSTONE_MODELS
+from .triggers import engine
+
+
+@receiver(post_save, sender=MaintenanceTrigger)
+@receiver(post_delete, sender=MaintenanceTrigger)
+def invalidate_trigger_index(sender, **kwargs):
+    """Reload the trigger evaluation index after any rule change"""
+    engine.index.invalidate()
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def invalidate_autocomplete_index(sender, **kwargs):
+    """Reload the equipment autocomplete index after any equipment change"""
+    autocomplete_index.invalidate()
+
+
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+def touch_ticket(sender, instance, **kwargs):
+    """A new or removed message changes the ticket's messages_count"""
+    Ticket.objects.filter(pk=instance.ticket_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+@receiver(post_save, sender=Equipment)
+def mark_health_dirty(sender, instance, **kwargs):
+    """Tickets and maintenance dates feed the equipment health score"""
+    mark_dirty([instance.pk if sender is Equipment else instance.equipment_id])
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_state(sender, instance, **kwargs):
+    """Keep the stored stage and dates so post_save can tell what changed"""
+    previous = None
+    if not instance._state.adding:
+        previous = Ticket.objects.filter(pk=instance.pk).values_list(
+            'stage', 'created_at', 'completion_date'
+        ).first()
+    instance._previous_stage = previous[0] if previous else None
+    instance._previous_dates = previous[1:] if previous else ()
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_ticket_analytics(sender, instance, **kwargs):
+    """Refresh the KPI buckets of every month the ticket counts in, before and after"""
+    invalidate_months([
+        instance.created_at, instance.completion_date, *getattr(instance, '_previous_dates', ())
+    ])
+
+
+@receiver(post_save, sender=Ticket)
+def publish_ticket_event(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_stage', None)
+    if not created and previous == instance.stage:
+        return
+    _, hierarchy_path = equipment_routes([instance.equipment_id]).get(instance.equipment_id, (None, None))
+    publish(
+        'ticket.created' if created else 'ticket.stage_changed',
+        routing_channels(instance.equipment_id, instance.assigned_team_id, hierarchy_path),
+        {
+            'ticket': instance.id,
+            'title': instance.title,
+            'equipment': instance.equipment_id,
+            'priority': instance.priority,
+            'from_stage': previous,
+            'stage': instance.stage,
+            'updated_at': instance.updated_at,
+        },
+    )
+
+
+@receiver(post_save, sender=Message)
+def publish_message_event(sender, instance, created, **kwargs):
+    if not created:
+        return
+    ticket = Ticket.objects.filter(pk=instance.ticket_id).values(
+        'equipment_id', 'assigned_team_id', 'equipment__asset_hierarchy__path'
+    ).first()
+    if ticket is None:
+        return
+    publish(
+        'message.created',
+        routing_channels(
+            ticket['equipment_id'], ticket['assigned_team_id'],
+            ticket['equipment__asset_hierarchy__path'],
+        ),
+        {
+            'message': instance.id,
+            'ticket': instance.ticket_id,
+            'user': instance.user_id,
+            'type': instance.type,
+            'content': instance.content,
+            'created_at': instance.created_at,
+        },
+    )
+
+
+CACHE_SCOPES = {
+    User: 'users',
+    MaintenanceTeam: 'teams',
+    AssetHierarchy: 'hierarchy',
+    Equipment: 'equipment',
+}
+
+
+def invalidate_response_cache(sender, update_fields=None, **kwargs):
+    """Bump the cache generation of the changed model"""
+    # Logins only touch last_login, which no cached response renders
+    if sender is User and update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_generation(CACHE_SCOPES[sender])
+
+
+for model in CACHE_SCOPES:
+    post_save.connect(invalidate_response_cache, sender=model, dispatch_uid=f'cache-save-{model.__name__}')
+    post_delete.connect(invalidate_response_cache, sender=model, dispatch_uid=f'cache-delete-{model.__name__}')
+
+
+def record_tombstone(sender, instance, **kwargs):
+    """Remember deletions for delta sync clients"""
+    SyncTombstone.objects.create(model_name=TOMBSTONE_MODELS[sender], object_id=instance.pk)
+
+
+for model in TOMBSTONE_MODELS:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f'tombstone-{model.__name__}')
+
+
+def update_search_entry(sender, instance, **kwargs):
+    index_objects([instance])
+
+
+def remove_search_entry(sender, instance, **kwargs):
+    remove_objects(sender, [instance.pk])
+
+
+for model in SEARCH_DOCUMENTS:
+    post_save.connect(update_search_entry, sender=model, dispatch_uid=f'search-save-{model.__name__}')
+    post_delete.connect(remove_search_entry, sender=model, dispatch_uid=f'search-delete-{model.__name__}')
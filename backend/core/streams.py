@@ -0,0 +1,88 @@
+"""
+Server-Sent Events stream of ticket and telemetry events
+
+Runs as a native async view so an open connection costs one coroutine,
+not a worker thread; serve it under ASGI (config/asgi.py).
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .events import channel_name, format_sse, get_broker
+
+
+def authenticate(request):
+    """
+    Resolve the user from a Bearer header or ``?token=`` (browsers'
+    EventSource cannot set headers).
+    """
+    authentication = JWTAuthentication()
+    raw_token = request.GET.get('token')
+    if raw_token is None:
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError):
+        return None
+
+
+def _requested_channels(request):
+    channels = []
+    for kind in ('equipment', 'team', 'hierarchy'):
+        for object_id in request.GET.getlist(kind):
+            channels.append(channel_name(kind, object_id))
+    return channels
+
+
+async def _stream(channels):
+    # Subscribe on first iteration: a generator that is never started never
+    # reaches its finally, so subscribing in the view would leak the queue
+    # whenever the client disconnects before streaming begins
+    broker = get_broker()
+    subscription = broker.subscribe(channels)
+    heartbeat = settings.EVENTS_HEARTBEAT_SECONDS
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+                continue
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@require_GET
+async def events(request):
+    """
+    Stream ticket and telemetry events.
+
+    Filter with repeatable ``equipment``, ``team`` and ``hierarchy`` ids;
+    a hierarchy id also matches everything below that node. Without
+    filters every event is sent.
+    """
+    user = await sync_to_async(authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid'}, status=401)
+
+    try:
+        channels = _requested_channels(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid equipment, team or hierarchy id'}, status=400)
+
+    response = StreamingHttpResponse(_stream(channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
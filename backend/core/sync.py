@@ -0,0 +1,167 @@
+"""
+Delta sync for offline-capable clients
+"""
+
+import base64
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AssetHierarchy, Equipment, MaintenanceTeam, Message, SyncTombstone, Ticket
+from .serializers import (
+    AssetHierarchySerializer, EquipmentSerializer, MaintenanceTeamSerializer,
+    MessageSerializer, TicketSerializer
+)
+
+
+ZERO_ID = uuid.UUID(int=0)
+
+SYNC_MODELS = {
+    'teams': (
+        lambda: MaintenanceTeam.objects.select_related('lead_manager'),
+        MaintenanceTeamSerializer, 'updated_at',
+    ),
+    'hierarchy': (
+        lambda: AssetHierarchy.objects.all(),
+        AssetHierarchySerializer, 'updated_at',
+    ),
+    'equipment': (
+        lambda: Equipment.objects.select_related('asset_hierarchy', 'assigned_team', 'assigned_technician'),
+        EquipmentSerializer, 'updated_at',
+    ),
+    'tickets': (
+        lambda: Ticket.objects.select_related(
+            'equipment', 'assigned_team', 'assigned_technician', 'created_by'
+        ).annotate(message_count=Count('messages')),
+        TicketSerializer, 'updated_at',
+    ),
+    'messages': (
+        lambda: Message.objects.select_related('user'),
+        MessageSerializer, 'updated_at',
+    ),
+}
+
+TOMBSTONE_MODELS = {
+    MaintenanceTeam: 'teams',
+    AssetHierarchy: 'hierarchy',
+    Equipment: 'equipment',
+    Ticket: 'tickets',
+    Message: 'messages',
+}
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+class ExpiredSyncToken(InvalidSyncToken):
+    """The token predates pruned tombstones, so deletions may have been missed"""
+
+
+def encode_token(positions):
+    payload = {
+        group: {name: [moment.isoformat(), str(pk)] for name, (moment, pk) in marks.items()}
+        for group, marks in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_token(token):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        positions = {}
+        for group in ('changes', 'deleted'):
+            positions[group] = {}
+            for name, (moment, pk) in payload.get(group, {}).items():
+                moment = parse_datetime(moment)
+                if moment is None:
+                    raise InvalidSyncToken(token)
+                positions[group][name] = (moment, uuid.UUID(pk))
+        return positions
+    except (TypeError, ValueError, AttributeError) as exc:
+        raise InvalidSyncToken(token) from exc
+
+
+def _after(field, position):
+    """Keyset predicate ``(field, id) > position`` with an indexable leading bound"""
+    moment, pk = position
+    return Q(**{f'{field}__gte': moment}) & (
+        Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk})
+    )
+
+
+def _next_position(rows, field, previous, settled):
+    """
+    Advance past the last row returned, but never beyond ``settled``.
+
+    Rows stamped within the settle window may belong to transactions that
+    have not committed yet; holding the watermark back re-sends them on the
+    next sync instead of skipping rows that commit late.
+    """
+    if not rows:
+        # Everything up to the settle point has been seen; advancing keeps
+        # idle cursors inside the tombstone retention window
+        return settled
+    last = (getattr(rows[-1], field), rows[-1].pk)
+    return min(last, settled)
+
+
+def _is_full_page(rows, limit, position):
+    # A full page held back by the settle window is re-read on the next
+    # regular sync; reporting it as "more" would make the client spin
+    return len(rows) == limit and position[1] != ZERO_ID
+
+
+def collect_changes(token=None, limit=None):
+    """
+    Return created/updated rows and tombstones since ``token``.
+
+    Each model is read with one ``(timestamp, id)`` range query capped at
+    ``limit`` rows; ``has_more`` tells the client to call again with the
+    returned token.
+    """
+    limit = limit or settings.SYNC_PAGE_SIZE
+    positions = decode_token(token) if token else {'changes': {}, 'deleted': {}}
+    now = timezone.now()
+    settled = (now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS), ZERO_ID)
+    horizon = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    if any(moment < horizon for moment, _ in positions['deleted'].values()):
+        raise ExpiredSyncToken(token)
+    initial = token is None
+
+    changes, deleted, has_more = {}, {}, False
+    next_positions = {'changes': {}, 'deleted': {}}
+
+    for name, (queryset_factory, serializer_class, field) in SYNC_MODELS.items():
+        queryset = queryset_factory()
+        previous = positions['changes'].get(name)
+        if previous:
+            queryset = queryset.filter(_after(field, previous))
+        rows = list(queryset.order_by(field, 'id')[:limit])
+        # Sync is flat: clients rebuild the tree from each node's parent
+        context = {'children_by_parent': {}} if serializer_class is AssetHierarchySerializer else {}
+        changes[name] = serializer_class(rows, many=True, context=context).data
+        next_positions['changes'][name] = _next_position(rows, field, previous, settled)
+        has_more = has_more or _is_full_page(rows, limit, next_positions['changes'][name])
+
+        # A first sync downloads current rows, so older deletions are irrelevant
+        previous = settled if initial else positions['deleted'].get(name, settled)
+        tombstones = list(
+            SyncTombstone.objects.filter(model_name=name).filter(_after('deleted_at', previous))
+            .order_by('deleted_at', 'id')[:limit]
+        )
+        deleted[name] = [tombstone.object_id for tombstone in tombstones]
+        next_positions['deleted'][name] = _next_position(tombstones, 'deleted_at', previous, settled)
+        has_more = has_more or _is_full_page(tombstones, limit, next_positions['deleted'][name])
+
+    return {
+        'cursor': encode_token(next_positions),
+        'has_more': has_more,
+        'changes': changes,
+        'deleted': deleted,
+    }
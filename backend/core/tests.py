@@ -1,3 +1,1851 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import json
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import (
+    User, MaintenanceTeam, AssetHierarchy, Equipment, AnomalyState, HealthDirtyMark,
+    MaintenanceTrigger, MachineTelemetryLog, SearchEntry, SyncTombstone, TelemetryChunk, TelemetryRollup,
+    Ticket, Message
+)
+from .columnar import compact_day, compact_readings, iter_chunk_readings
+from .analytics import dashboard_summary, report
+from .events import RedisBroker, channel_name, get_broker
+from .exports import parquet_available
+from .health import compute_scores, score_pending
+from .ingest_queue import get_queue, shutdown
+from .parsers import NDJSONParser
+from .processing import claim_transaction, drain_batch
+from .partitions import next_start, partition_ddl, partition_name
+from .rollups import choose_resolution, rebuild_rollups, update_rollups
+from .streams import _stream, events
+from .sync import ZERO_ID, encode_token
+from .triggers import engine
+
+
+class ListQueryCountTests(APITestCase):
+    """
+    List endpoints must run a fixed number of queries no matter how many
+    rows end up on the page. Each test renders a small page, adds more
+    rows and checks that the query count did not change.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='tester', role='admin')
+        cls.counter = 0
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def _next(self):
+        type(self).counter += 1
+        return self.counter
+
+    def make_user(self):
+        n = self._next()
+        return User.objects.create(username=f'user{n}', first_name='F', last_name=f'L{n}')
+
+    def make_team(self):
+        return MaintenanceTeam.objects.create(name=f'Team {self._next()}', lead_manager=self.make_user())
+
+    def make_hierarchy(self):
+        site = AssetHierarchy.objects.create(name=f'Site {self._next()}', level_type='Site')
+        area = AssetHierarchy.objects.create(name=f'Area {self._next()}', level_type='Area', parent=site)
+        AssetHierarchy.objects.create(name=f'WC {self._next()}', level_type='Work Center', parent=area)
+        return site
+
+    def make_equipment(self):
+        n = self._next()
+        return Equipment.objects.create(
+            name=f'Equipment {n}', serial_number=f'SN-{n}',
+            asset_hierarchy=self.make_hierarchy(),
+            assigned_team=self.make_team(),
+            assigned_technician=self.make_user(),
+        )
+
+    def make_trigger(self):
+        return MaintenanceTrigger.objects.create(
+            equipment=self.make_equipment(), trigger_name=f'Trigger {self._next()}',
+            parameter_type='Temperature', operation_type='Greater_Than', threshold_value=100,
+        )
+
+    def make_telemetry(self):
+        return MachineTelemetryLog.objects.create(
+            equipment=self.make_equipment(), parameter_type='Temperature', value=42,
+        )
+
+    def make_ticket(self):
+        ticket = Ticket.objects.create(
+            title=f'Ticket {self._next()}', equipment=self.make_equipment(),
+            assigned_team=self.make_team(), assigned_technician=self.make_user(),
+            created_by=self.make_user(),
+        )
+        for _ in range(2):
+            Message.objects.create(ticket=ticket, user=self.make_user(), content='note')
+        return ticket
+
+    def make_message(self):
+        ticket = Ticket.objects.create(title=f'Ticket {self._next()}', equipment=self.make_equipment())
+        return Message.objects.create(ticket=ticket, user=self.make_user(), content='note')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(context.captured_queries)
+
+    def assert_constant_queries(self, url, factory, small=2, large=8):
+        for _ in range(small):
+            factory()
+        baseline = self.count_queries(url)
+        for _ in range(large - small):
+            factory()
+        self.assertEqual(
+            self.count_queries(url), baseline,
+            f'{url} issues more queries as the page grows'
+        )
+
+    def test_users(self):
+        self.assert_constant_queries('/api/users/', self.make_user)
+
+    def test_teams(self):
+        self.assert_constant_queries('/api/teams/', self.make_team)
+
+    def test_hierarchy(self):
+        self.assert_constant_queries('/api/hierarchy/', self.make_hierarchy)
+
+    def test_hierarchy_tree(self):
+        self.assert_constant_queries('/api/hierarchy/tree/', self.make_hierarchy)
+
+    def test_equipment(self):
+        self.assert_constant_queries('/api/equipment/', self.make_equipment)
+
+    def test_equipment_tickets(self):
+        equipment = self.make_equipment()
+
+        def factory():
+            ticket = self.make_ticket()
+            ticket.equipment = equipment
+            ticket.save()
+
+        self.assert_constant_queries(f'/api/equipment/{equipment.id}/tickets/', factory)
+
+    def test_triggers(self):
+        self.assert_constant_queries('/api/triggers/', self.make_trigger)
+
+    def test_telemetry(self):
+        self.assert_constant_queries('/api/telemetry/', self.make_telemetry)
+
+    def test_tickets(self):
+        self.assert_constant_queries('/api/tickets/', self.make_ticket)
+
+    def test_messages(self):
+        self.assert_constant_queries('/api/messages/', self.make_message)
+
+
+class TicketMessageCountTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+
+    def test_list_reports_annotated_message_count(self):
+        ticket = Ticket.objects.create(title='Leak', equipment=self.equipment)
+        Message.objects.create(ticket=ticket, user=self.user, content='a')
+        Message.objects.create(ticket=ticket, user=self.user, content='b')
+
+        response = self.client.get('/api/tickets/')
+
+        self.assertEqual(response.data['results'][0]['messages_count'], 2)
+        self.assertNotIn('messages', response.data['results'][0])
+
+    def test_detail_includes_messages(self):
+        ticket = Ticket.objects.create(title='Leak', equipment=self.equipment)
+        Message.objects.create(ticket=ticket, user=self.user, content='a')
+
+        response = self.client.get(f'/api/tickets/{ticket.id}/')
+
+        self.assertEqual(response.data['messages_count'], 1)
+        self.assertEqual(len(response.data['messages']), 1)
+
+
+class BulkIngestTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+
+    def reading(self, **overrides):
+        return {'equipment': str(self.equipment.id), 'parameter_type': 'Temperature', 'value': 42, **overrides}
+
+    def test_valid_rows_are_created_and_invalid_rows_reported_by_index(self):
+        response = self.client.post('/api/telemetry/bulk/', [
+            self.reading(),
+            self.reading(equipment='not-a-uuid'),
+            self.reading(reading_date_time=5),
+            self.reading(value='abc'),
+            self.reading(equipment=str(uuid.uuid4())),
+        ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], 1)
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertEqual(errors[1]['equipment'], ['Must be a valid UUID.'])
+        self.assertIn('invalid format', errors[2]['reading_date_time'][0])
+        self.assertIn('decimal number', errors[3]['value'][0])
+        self.assertIn('does not exist', errors[4]['equipment'][0])
+        self.assertEqual(MachineTelemetryLog.objects.count(), 1)
+
+    def test_chunk_size_must_be_positive(self):
+        for chunk_size in ('0', '-5', 'x'):
+            response = self.client.post(
+                f'/api/telemetry/bulk/?chunk_size={chunk_size}', [self.reading()], format='json'
+            )
+            self.assertEqual(response.status_code, 400, chunk_size)
+        self.assertEqual(MachineTelemetryLog.objects.count(), 0)
+
+    def test_objects_must_wrap_a_readings_list(self):
+        response = self.client.post('/api/telemetry/bulk/', {'readings': [self.reading()]}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post('/api/telemetry/bulk/', self.reading(), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Expected a list of readings'})
+        self.assertEqual(MachineTelemetryLog.objects.count(), 1)
+
+    def test_ndjson_body(self):
+        body = '\n'.join(json.dumps(self.reading(value=value)) for value in (1, 2, 3)) + '\n\n'
+        response = self.client.post(
+            '/api/telemetry/bulk/?chunk_size=2', body, content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+
+    def test_ndjson_parse_errors_are_400(self):
+        for body in (b'{"equipment": 1}\n{broken\n', b'\xff\xfe\n'):
+            response = self.client.post(
+                '/api/telemetry/bulk/', body, content_type='application/x-ndjson'
+            )
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('line', response.data['detail'])
+
+
+class NDJSONParserTests(TestCase):
+
+    def parse(self, body):
+        return NDJSONParser().parse(io.BytesIO(body))
+
+    def test_one_object_per_line_skipping_blank_lines(self):
+        self.assertEqual(self.parse(b'{"a": 1}\n\n{"a": 2}\n'), [{'a': 1}, {'a': 2}])
+
+    def test_errors_name_the_line(self):
+        with self.assertRaisesMessage(ParseError, 'line 2'):
+            self.parse(b'{"a": 1}\n{"a": \n')
+        with self.assertRaisesMessage(ParseError, 'decode error on line 1'):
+            self.parse(b'{"a": "\xff"}\n')
+
+
+class TriggerEngineTests(TestCase):
+
+    def setUp(self):
+        engine.index.invalidate()
+        self.team = MaintenanceTeam.objects.create(name='Mechanics')
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1', assigned_team=self.team)
+        self.trigger = MaintenanceTrigger.objects.create(
+            equipment=self.equipment, trigger_name='Overheat', parameter_type='Temperature',
+            operation_type='Greater_Than', threshold_value=100, associated_task_template='Check cooling',
+        )
+
+    def reading(self, value, parameter='Temperature'):
+        return MachineTelemetryLog(equipment=self.equipment, parameter_type=parameter, value=value)
+
+    def test_violation_opens_condition_based_ticket(self):
+        tickets = engine.evaluate([self.reading(99), self.reading(150, 'Vibration'), self.reading(101)])
+
+        self.assertEqual(len(tickets), 1)
+        ticket = Ticket.objects.get()
+        self.assertEqual(ticket.title, 'Overheat')
+        self.assertEqual(ticket.request_type, 'Condition_Based')
+        self.assertEqual(ticket.priority, 'High')
+        self.assertEqual(ticket.assigned_team, self.team)
+        self.assertEqual(ticket.description, 'Check cooling [Reading: 101, Threshold: 100.00]')
+
+    def test_open_ticket_is_not_duplicated(self):
+        engine.evaluate([self.reading(101), self.reading(102)])
+        engine.evaluate([self.reading(103)])
+        self.assertEqual(Ticket.objects.count(), 1)
+
+        Ticket.objects.update(stage='Repaired')
+        engine.evaluate([self.reading(104)])
+        self.assertEqual(Ticket.objects.filter(stage='New').count(), 1)
+
+    def test_rule_changes_are_picked_up(self):
+        engine.evaluate([self.reading(50)])
+        self.trigger.threshold_value = 10
+        self.trigger.save()
+        self.assertEqual(len(engine.evaluate([self.reading(50)])), 1)
+
+        self.trigger.is_active = False
+        self.trigger.save()
+        Ticket.objects.all().delete()
+        self.assertEqual(engine.evaluate([self.reading(500)]), [])
+
+    def test_index_expires_without_a_shared_version_bump(self):
+        engine.evaluate([self.reading(50)])
+        # A queryset update sends no signal, like an edit made in another process
+        MaintenanceTrigger.objects.update(threshold_value=10)
+        self.assertEqual(engine.evaluate([self.reading(50)]), [])
+
+        with override_settings(TRIGGER_INDEX_MAX_AGE=0):
+            self.assertEqual(len(engine.evaluate([self.reading(50)])), 1)
+
+
+class RollupTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        self.start = datetime(2026, 3, 2, 8, 0, tzinfo=dt_timezone.utc)
+
+    def reading(self, minutes, value, parameter='Temperature'):
+        return MachineTelemetryLog(
+            equipment=self.equipment, parameter_type=parameter, value=value,
+            reading_date_time=self.start + timedelta(minutes=minutes),
+        )
+
+    def test_choose_resolution_fits_the_point_budget(self):
+        start = self.start
+        self.assertEqual(choose_resolution(start, start + timedelta(hours=2), 500), '1m')
+        self.assertEqual(choose_resolution(start, start + timedelta(days=2), 500), '1h')
+        self.assertEqual(choose_resolution(start, start + timedelta(days=60), 500), '1d')
+        self.assertEqual(choose_resolution(start, start + timedelta(days=6000), 500), '1d')
+        self.assertEqual(choose_resolution(start, start + timedelta(minutes=61), 60), '1h')
+
+    def test_aggregate_merges_batches_into_buckets(self):
+        update_rollups([self.reading(0, 10), self.reading(0.5, 30), self.reading(61, 5)])
+        update_rollups([self.reading(0.2, 20), self.reading(1, 99, 'Vibration')])
+
+        response = self.client.get('/api/telemetry/aggregate/', {
+            'equipment': str(self.equipment.id), 'parameter': 'Temperature', 'resolution': '1h',
+            'start': '2026-03-02T00:00:00Z', 'end': '2026-03-03T00:00:00Z',
+        })
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['resolution'], '1h')
+        self.assertEqual(
+            [(row['bucket'], row['count'], row['min'], row['max'], row['avg']) for row in response.data['results']],
+            [(self.start, 3, 10, 30, 20), (self.start + timedelta(hours=1), 1, 5, 5, 5)],
+        )
+
+    def test_aggregate_picks_the_resolution_from_points(self):
+        update_rollups([self.reading(0, 10), self.reading(1, 20)])
+
+        response = self.client.get('/api/telemetry/aggregate/', {
+            'equipment': str(self.equipment.id), 'points': 100,
+            'start': '2026-03-02T08:00:00Z', 'end': '2026-03-02T09:00:00Z',
+        })
+
+        self.assertEqual(response.data['resolution'], '1m')
+        self.assertEqual([row['count'] for row in response.data['results']], [1, 1])
+
+    def test_aggregate_rejects_bad_parameters(self):
+        for params in (
+            {},
+            {'equipment': 'nope'},
+            {'equipment': str(self.equipment.id), 'points': 'many'},
+            {'equipment': str(self.equipment.id), 'start': '2026-03-02T09:00:00Z', 'end': '2026-03-02T08:00:00Z'},
+        ):
+            response = self.client.get('/api/telemetry/aggregate/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.data)
+
+
+class AssetHierarchyTests(TestCase):
+    def setUp(self):
+        self.site = AssetHierarchy.objects.create(name='Site', level_type='Site')
+        self.other = AssetHierarchy.objects.create(name='Other', level_type='Site')
+        self.area = AssetHierarchy.objects.create(name='Area', level_type='Area', parent=self.site)
+        self.cell = AssetHierarchy.objects.create(name='Cell', level_type='Work Center', parent=self.area)
+
+    def test_moving_a_node_re_roots_and_touches_descendants(self):
+        before = AssetHierarchy.objects.get(pk=self.cell.pk).updated_at
+
+        self.area.parent = self.other
+        self.area.save()
+
+        cell = AssetHierarchy.objects.get(pk=self.cell.pk)
+        self.assertEqual(cell.path, f'/{self.other.id.hex}/{self.area.id.hex}/{self.cell.id.hex}/')
+        self.assertEqual(cell.depth, 2)
+        self.assertGreater(cell.updated_at, before)
+
+    def test_moving_a_node_under_its_subtree_is_rejected(self):
+        self.site.parent = self.cell
+        with self.assertRaises(ValueError):
+            self.site.save()
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester', role='admin')
+        self.client.force_authenticate(self.user)
+        self.lead = User.objects.create(username='lead', first_name='Ada', last_name='King')
+        self.team = MaintenanceTeam.objects.create(name='Mechanics', lead_manager=self.lead)
+        self.site = AssetHierarchy.objects.create(name='Site', level_type='Site')
+        self.equipment = Equipment.objects.create(
+            name='Press', serial_number='P-1', asset_hierarchy=self.site, assigned_team=self.team,
+        )
+
+    def stats(self, name):
+        return self.client.get('/api/cache/stats/').data[name]
+
+    def test_repeated_requests_are_served_from_the_cache(self):
+        first = self.client.get('/api/teams/')
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get('/api/teams/')
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(self.stats('teams'), {'hit': 1, 'miss': 1, 'hit_ratio': 0.5})
+
+    def test_changing_a_dependency_bumps_the_generation(self):
+        self.client.get('/api/teams/')
+
+        self.lead.first_name = 'Grace'
+        self.lead.save()
+
+        response = self.client.get('/api/teams/')
+        self.assertEqual(response.data['results'][0]['lead_manager_name'], 'Grace King')
+        self.assertEqual(self.stats('teams')['miss'], 2)
+
+    def test_related_names_in_equipment_detail_are_refreshed(self):
+        url = f'/api/equipment/{self.equipment.id}/'
+        self.assertEqual(self.client.get(url).data['hierarchy_name'], 'Site')
+
+        self.site.name = 'Plant'
+        self.site.save()
+
+        self.assertEqual(self.client.get(url).data['hierarchy_name'], 'Plant')
+
+    def test_logins_do_not_invalidate_users(self):
+        self.client.get('/api/users/')
+
+        self.lead.last_login = self.lead.date_joined
+        self.lead.save(update_fields=['last_login'])
+        self.client.get('/api/users/')
+
+        self.assertEqual(self.stats('users')['hit'], 1)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_disabled_cache_always_runs_the_view(self):
+        self.client.get('/api/teams/')
+        self.client.get('/api/teams/')
+
+        self.assertEqual(self.stats('teams'), {'hit': 0, 'miss': 0, 'hit_ratio': None})
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.lead = User.objects.create(username='lead', first_name='Ada', last_name='King')
+        self.team = MaintenanceTeam.objects.create(name='Mechanics', lead_manager=self.lead)
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_list_answers_304(self):
+        response = self.client.get('/api/teams/')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        again = self.revalidate('/api/teams/', response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], response['ETag'])
+
+    def test_list_tag_changes_with_rows_and_filters(self):
+        etag = self.client.get('/api/teams/')['ETag']
+        self.assertNotEqual(self.client.get('/api/teams/', {'search': 'Mech'})['ETag'], etag)
+
+        MaintenanceTeam.objects.create(name='Electricians')
+        response = self.revalidate('/api/teams/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_detail_tag_follows_the_object_and_related_names(self):
+        url = f'/api/teams/{self.team.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        self.lead.first_name = 'Grace'
+        self.lead.save()
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['lead_manager_name'], 'Grace King')
+
+        etag = response['ETag']
+        self.team.description = 'Night shift'
+        self.team.save()
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+    def test_messages_answer_304_until_edited(self):
+        equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        ticket = Ticket.objects.create(title='Leak', equipment=equipment)
+        message = Message.objects.create(ticket=ticket, user=self.lead, content='On it')
+        url = f'/api/messages/?ticket={ticket.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+        detail = f'/api/messages/{message.id}/'
+        detail_etag = self.client.get(detail)['ETag']
+        self.assertEqual(self.revalidate(detail, detail_etag).status_code, 304)
+
+        message.content = 'Done'
+        message.save()
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+        self.assertEqual(self.revalidate(detail, detail_etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        self.lead.first_name = 'Grace'
+        self.lead.save()
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+    def test_expanded_ticket_edits_change_the_message_tags(self):
+        equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        ticket = Ticket.objects.create(title='Leak', equipment=equipment)
+        message = Message.objects.create(ticket=ticket, user=self.lead, content='On it')
+        url = '/api/messages/?expand=ticket'
+        detail = f'/api/messages/{message.id}/?expand=ticket'
+        etag, detail_etag = self.client.get(url)['ETag'], self.client.get(detail)['ETag']
+
+        ticket.stage = 'Repaired'
+        ticket.save()
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['ticket']['stage'], 'Repaired')
+        self.assertEqual(self.revalidate(detail, detail_etag).status_code, 200)
+
+    def test_cached_tree_still_answers_304(self):
+        AssetHierarchy.objects.create(name='Site', level_type='Site')
+        etag = self.client.get('/api/hierarchy/tree/')['ETag']
+
+        self.assertEqual(self.revalidate('/api/hierarchy/tree/', etag).status_code, 304)
+        self.assertEqual(
+            self.client.get('/api/hierarchy/tree/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT').status_code,
+            304,
+        )
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.site = AssetHierarchy.objects.create(name='Site', level_type='Site')
+        self.other = AssetHierarchy.objects.create(name='Other', level_type='Site')
+        self.area = AssetHierarchy.objects.create(name='Area', level_type='Area', parent=self.site)
+        self.cell = AssetHierarchy.objects.create(name='Cell', level_type='Work Center', parent=self.area)
+        self.team = MaintenanceTeam.objects.create(name='Mechanics')
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        self.ticket = Ticket.objects.create(title='Leak', equipment=self.equipment)
+        self.message = Message.objects.create(ticket=self.ticket, user=self.user, content='first')
+
+    def sync(self, cursor=None):
+        response = self.client.get('/api/sync/', {'since': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def ids(self, rows):
+        return {str(row['id']) for row in rows}
+
+    def test_initial_sync_returns_every_row_and_no_tombstones(self):
+        MaintenanceTeam.objects.create(name='Gone').delete()
+
+        data = self.sync()
+
+        self.assertEqual(len(data['changes']['hierarchy']), 4)
+        self.assertEqual(self.ids(data['changes']['messages']), {str(self.message.id)})
+        self.assertEqual(data['deleted'], {name: [] for name in data['changes']})
+        self.assertFalse(data['has_more'])
+
+    def test_cursor_returns_only_later_changes(self):
+        cursor = self.sync()['cursor']
+        self.assertEqual(self.sync(cursor)['changes']['tickets'], [])
+
+        self.team.name = 'Millwrights'
+        self.team.save()
+        data = self.sync(cursor)
+
+        self.assertEqual([row['name'] for row in data['changes']['teams']], ['Millwrights'])
+        self.assertEqual(data['changes']['equipment'], [])
+
+    def test_edited_messages_are_resent(self):
+        cursor = self.sync()['cursor']
+
+        response = self.client.patch(f'/api/messages/{self.message.id}/', {'content': 'edited'})
+        self.assertEqual(response.status_code, 200, response.content)
+        data = self.sync(cursor)
+
+        self.assertEqual([row['content'] for row in data['changes']['messages']], ['edited'])
+        # The ticket's message count changed with it
+        self.assertEqual(self.ids(data['changes']['tickets']), {str(self.ticket.id)})
+
+    def test_deletions_arrive_as_tombstones_once(self):
+        cursor = self.sync()['cursor']
+        team_id = self.team.id
+        self.team.delete()
+
+        data = self.sync(cursor)
+        self.assertEqual(data['deleted']['teams'], [team_id])
+        self.assertEqual(self.sync(data['cursor'])['deleted']['teams'], [])
+
+    def test_moving_a_node_resends_its_subtree(self):
+        cursor = self.sync()['cursor']
+
+        self.area.parent = self.other
+        self.area.save()
+        rows = {row['name']: row for row in self.sync(cursor)['changes']['hierarchy']}
+
+        self.assertEqual(set(rows), {'Area', 'Cell'})
+        self.assertEqual(rows['Cell']['path'], f'/{self.other.id.hex}/{self.area.id.hex}/{self.cell.id.hex}/')
+
+    @override_settings(SYNC_PAGE_SIZE=3)
+    def test_full_pages_continue_from_the_cursor(self):
+        seen, cursor = set(), None
+        for _ in range(3):
+            data = self.sync(cursor)
+            seen |= self.ids(data['changes']['hierarchy'])
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+
+        self.assertFalse(data['has_more'])
+        self.assertEqual(len(seen), 4)
+
+    def test_bad_and_expired_cursors(self):
+        response = self.client.get('/api/sync/', {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+        stale = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+        cursor = encode_token({'changes': {}, 'deleted': {'teams': (stale, ZERO_ID)}})
+        response = self.client.get('/api/sync/', {'since': cursor})
+        self.assertEqual(response.status_code, 410)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.site = AssetHierarchy.objects.create(name='Site', level_type='Site')
+        self.area = AssetHierarchy.objects.create(name='Area', level_type='Area', parent=self.site)
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1', asset_hierarchy=self.area)
+        self.broker = get_broker()
+
+    def event(self, channel):
+        return {'type': 'ticket.created', 'channels': [channel], 'data': {'title': 'Leak'}}
+
+    def create_ticket(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(title='Leak', equipment=self.equipment)
+
+    async def next_chunk(self, stream):
+        return await asyncio.wait_for(anext(stream), timeout=1)
+
+    async def test_only_matching_events_are_streamed(self):
+        stream = _stream([channel_name('equipment', self.equipment.id)])
+        self.assertEqual(await self.next_chunk(stream), 'retry: 3000\n\n')
+
+        self.broker.publish(self.event(channel_name('equipment', uuid.uuid4())))
+        self.broker.publish(self.event(channel_name('equipment', self.equipment.id)))
+        chunk = await self.next_chunk(stream)
+
+        self.assertTrue(chunk.startswith('event: ticket.created\n'))
+        self.assertEqual(json.loads(chunk.split('data: ')[1])['data'], {'title': 'Leak'})
+        await stream.aclose()
+        self.assertEqual(self.broker._subscriptions, set())
+
+    async def test_hierarchy_subscribers_receive_subtree_events_after_commit(self):
+        stream = _stream([channel_name('hierarchy', self.site.id)])
+        await self.next_chunk(stream)
+
+        await sync_to_async(self.create_ticket)()
+        chunk = await self.next_chunk(stream)
+
+        payload = json.loads(chunk.split('data: ')[1])
+        self.assertEqual(payload['type'], 'ticket.created')
+        self.assertEqual(payload['data']['equipment'], str(self.equipment.id))
+        await stream.aclose()
+
+    async def test_idle_streams_send_keep_alives(self):
+        with override_settings(EVENTS_HEARTBEAT_SECONDS=0):
+            stream = _stream([])
+            await self.next_chunk(stream)
+            self.assertEqual(await self.next_chunk(stream), ': keep-alive\n\n')
+            await stream.aclose()
+
+    async def test_unstarted_streams_hold_no_subscription(self):
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        request = AsyncRequestFactory().get('/api/events/', {'token': str(token)})
+
+        response = await events(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(self.broker._subscriptions, set())
+
+    async def test_rejects_anonymous_clients_and_bad_ids(self):
+        response = await self.async_client.get('/api/events/')
+        self.assertEqual(response.status_code, 401)
+
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        response = await self.async_client.get('/api/events/', {'token': str(token), 'equipment': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+
+class QueuedIngestTests(TestCase):
+    """/api/telemetry/ingest/: queued under ASGI (AsyncClient), stored inline under WSGI (Client)"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def readings(self, count, **overrides):
+        return [
+            {'equipment': str(self.equipment.id), 'parameter_type': 'Temperature', 'value': value, **overrides}
+            for value in range(count)
+        ]
+
+    async def post(self, rows):
+        return await self.async_client.post(
+            '/api/telemetry/ingest/', json.dumps(rows), content_type='application/json', headers=self.auth
+        )
+
+    async def wait_for_created(self, queue, count):
+        for _ in range(100):
+            if queue.stats['created'] >= count:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f'queue stats stuck at {queue.stats}')
+
+    def test_wsgi_fallback_reports_created_and_dropped_rows(self):
+        rows = self.readings(2) + self.readings(1, equipment=str(uuid.uuid4())) + self.readings(1, value='x')
+        response = self.client.post(
+            '/api/telemetry/ingest/', json.dumps(rows), content_type='application/json', headers=self.auth
+        )
+
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual(
+            (body['received'], body['accepted'], body['created'], body['dropped']), (4, 3, 2, 1)
+        )
+        self.assertEqual([error['index'] for error in body['errors']], [3])
+        self.assertEqual(MachineTelemetryLog.objects.count(), 2)
+
+    def test_body_shapes_match_the_bulk_endpoint(self):
+        for body, expected in (({'readings': self.readings(1)}, 201), (self.readings(1)[0], 400)):
+            response = self.client.post(
+                '/api/telemetry/ingest/', json.dumps(body), content_type='application/json', headers=self.auth
+            )
+            self.assertEqual(response.status_code, expected, body)
+        self.assertEqual(response.json(), {'error': 'Expected a list of readings'})
+        self.assertEqual(MachineTelemetryLog.objects.count(), 1)
+
+    def test_wsgi_fallback_with_only_unknown_equipment_is_400(self):
+        response = self.client.post(
+            '/api/telemetry/ingest/', json.dumps(self.readings(1, equipment=str(uuid.uuid4()))),
+            content_type='application/json', headers=self.auth
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['dropped'], 1)
+
+    @override_settings(TELEMETRY_ASYNC_BATCH_SIZE=2, TELEMETRY_ASYNC_FLUSH_INTERVAL=0.01)
+    async def test_queued_readings_are_flushed_in_batches(self):
+        response = await self.post(self.readings(3))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['accepted'], 3)
+
+        queue = get_queue()
+        await self.wait_for_created(queue, 3)
+        self.assertEqual(queue.stats['flushes'], 2)
+        self.assertEqual(await MachineTelemetryLog.objects.acount(), 3)
+        await shutdown()
+
+    @override_settings(TELEMETRY_ASYNC_QUEUE_SIZE=2, TELEMETRY_ASYNC_FLUSH_INTERVAL=0.5)
+    async def test_full_queue_answers_429(self):
+        response = await self.post(self.readings(3))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(get_queue().stats['accepted'], 0)
+        await shutdown()
+
+    async def test_failing_storage_answers_503(self):
+        get_queue().failing = True
+        response = await self.post(self.readings(1))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        await shutdown()
+
+    async def test_shutdown_flushes_what_is_still_queued(self):
+        with override_settings(TELEMETRY_ASYNC_FLUSH_INTERVAL=60, TELEMETRY_ASYNC_BATCH_SIZE=10):
+            await self.post(self.readings(3))
+            queue = get_queue()
+            await shutdown()
+
+        self.assertEqual(queue.stats['created'], 3)
+        self.assertEqual(await MachineTelemetryLog.objects.acount(), 3)
+
+
+class ColumnarStorageTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        self.day = datetime(2026, 3, 2, tzinfo=dt_timezone.utc)
+
+    def log(self, minutes, value, parameter='Temperature', **fields):
+        return MachineTelemetryLog.objects.create(
+            equipment=self.equipment, parameter_type=parameter, value=value,
+            reading_date_time=self.day + timedelta(minutes=minutes),
+            processed_flag=fields.pop('processed_flag', True), **fields
+        )
+
+    def archived(self, parameter='Temperature'):
+        return list(iter_chunk_readings(TelemetryChunk.objects.filter(parameter_type=parameter)))
+
+    def summary(self, readings):
+        return sorted((r.reading_date_time, r.value, r.is_anomaly) for r in readings)
+
+    def test_compaction_round_trips_readings(self):
+        readings = [self.log(1, '10.5'), self.log(1, '11.25', is_anomaly=True), self.log(5, '-3.0001')]
+        self.log(2, 7, parameter='Pressure')
+        self.log(6, 99, processed_flag=False)
+
+        self.assertEqual(compact_day(self.day), (4, 2))
+
+        self.assertEqual(
+            self.summary(self.archived()),
+            sorted((r.reading_date_time, Decimal(r.value), r.is_anomaly) for r in readings),
+        )
+        self.assertEqual(MachineTelemetryLog.objects.get().value, 99)
+        ids = [reading.id for reading in self.archived()]
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual([reading.id for reading in self.archived()], ids)
+
+    def test_compacting_again_merges_into_the_days_chunk(self):
+        self.log(10, 1)
+        compact_day(self.day)
+        self.log(5, 2)
+        compact_day(self.day)
+
+        chunk = TelemetryChunk.objects.get()
+        self.assertEqual(chunk.reading_count, 2)
+        self.assertEqual([reading.value for reading in self.archived()], [2, 1])
+        self.assertEqual(chunk.start_time, self.day + timedelta(minutes=5))
+
+    @override_settings(TELEMETRY_CHUNK_VALUE_TYPE='float32')
+    def test_float32_chunks_keep_four_decimals(self):
+        self.log(0, '12.3456')
+        compact_day(self.day)
+
+        self.assertEqual(self.archived()[0].value, Decimal('12.3456'))
+
+    @override_settings(TELEMETRY_COLUMNAR_STORAGE=True)
+    def test_list_pages_seamlessly_across_both_stores(self):
+        for minutes in (0, 0, 30):
+            self.log(minutes, minutes + 1)
+        for minutes in (1440, 1500):
+            self.log(minutes, minutes + 1)
+        self.assertEqual(compact_readings(self.day + timedelta(days=1, hours=12)), (3, 1))
+
+        values, url = [], '/api/telemetry/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            values.extend(Decimal(row['value']) for row in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(values, [1501, 1441, 31, 1, 1])
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        self.now = datetime(2026, 3, 20, 12, tzinfo=dt_timezone.utc)
+
+    def log(self, days, parameter='Temperature', processed_flag=True, value=1):
+        return MachineTelemetryLog.objects.create(
+            equipment=self.equipment, parameter_type=parameter, value=value, processed_flag=processed_flag,
+            reading_date_time=self.now - timedelta(days=days),
+        )
+
+    def unsaved(self, days, value=1):
+        return MachineTelemetryLog(
+            equipment_id=self.equipment.id, parameter_type='Temperature', value=value,
+            reading_date_time=self.now - timedelta(days=days),
+        )
+
+    def counts(self, days, resolution='1d'):
+        return list(TelemetryRollup.objects.filter(
+            resolution=resolution, bucket_start__lte=self.now - timedelta(days=days),
+            bucket_start__gt=self.now - timedelta(days=days + 1),
+        ).values_list('reading_count', flat=True))
+
+    @override_settings(TELEMETRY_RETENTION={
+        'default': {'raw': 14, '1m': 90, '1h': 730, '1d': None},
+        'Vibration': {'raw': 3},
+    })
+    def test_apply_retention_expires_each_tier(self):
+        self.now = timezone.now()
+        self.log(20)
+        self.log(5, parameter='Vibration')
+        kept = [self.log(20, processed_flag=False), self.log(10), self.log(1, parameter='Vibration')]
+        update_rollups([self.unsaved(100)])
+        SyncTombstone.objects.create(
+            model_name='teams', object_id=uuid.uuid4(), deleted_at=self.now - timedelta(days=200)
+        )
+        fresh = SyncTombstone.objects.create(model_name='teams', object_id=uuid.uuid4())
+
+        out = io.StringIO()
+        call_command('apply_retention', batch_size=1, stdout=out)
+
+        self.assertEqual(set(MachineTelemetryLog.objects.values_list('pk', flat=True)), {r.pk for r in kept})
+        self.assertEqual(sorted(TelemetryRollup.objects.values_list('resolution', flat=True)), ['1d', '1h'])
+        self.assertEqual(list(SyncTombstone.objects.values_list('pk', flat=True)), [fresh.pk])
+        self.assertIn('raw readings: deleted 2', out.getvalue())
+
+    def test_dry_run_only_counts(self):
+        self.now = timezone.now()
+        self.log(20)
+
+        out = io.StringIO()
+        call_command('apply_retention', dry_run=True, stdout=out)
+
+        self.assertIn('raw readings: 1 expired', out.getvalue())
+        self.assertEqual(MachineTelemetryLog.objects.count(), 1)
+
+    def test_rebuild_replaces_recent_buckets_and_keeps_expired_history(self):
+        update_rollups([self.unsaved(30)])
+        recent = self.log(2, value=5)
+        update_rollups([recent, recent])
+
+        rebuild_rollups(now=self.now)
+
+        self.assertEqual(self.counts(30), [1])
+        self.assertEqual(self.counts(2), [1])
+        self.assertEqual(self.counts(2, '1m'), [1])
+
+    def test_rebuild_never_touches_days_retention_may_have_trimmed(self):
+        old = self.log(20)
+        update_rollups([old, old])
+        self.log(2)
+
+        rebuild_rollups(start=self.now - timedelta(days=40), now=self.now)
+
+        self.assertEqual(self.counts(20), [2])
+        self.assertEqual(self.counts(2), [1])
+
+    def test_rebuild_without_raw_data_keeps_every_rollup(self):
+        update_rollups([self.unsaved(30)])
+
+        self.assertEqual(rebuild_rollups(now=self.now), 0)
+        self.assertEqual(TelemetryRollup.objects.count(), 3)
+
+    def test_rebuild_merges_compacted_chunks(self):
+        day = datetime(2026, 3, 17, tzinfo=dt_timezone.utc)
+        for minutes in (0, 1):
+            MachineTelemetryLog.objects.create(
+                equipment=self.equipment, parameter_type='Temperature', value=minutes,
+                processed_flag=True, reading_date_time=day + timedelta(minutes=minutes),
+            )
+        compact_day(day)
+
+        rebuild_rollups(now=self.now)
+
+        self.assertEqual(TelemetryRollup.objects.get(resolution='1d').reading_count, 2)
+        self.assertEqual(TelemetryRollup.objects.filter(resolution='1m').count(), 2)
+
+    def test_rebuild_command_reports_the_clamped_start(self):
+        self.now = timezone.now()
+        self.log(2)
+        out = io.StringIO()
+        call_command('rebuild_rollups', start='2000-01-01T00:00:00Z', stdout=out)
+
+        self.assertIn('older rollups are kept', out.getvalue())
+        self.assertIn('Rebuilt 3 rollup buckets', out.getvalue())
+
+
+class PartitionTests(TestCase):
+    def test_partition_names_and_bounds(self):
+        day = datetime(2026, 12, 31, tzinfo=dt_timezone.utc)
+        month = datetime(2026, 12, 1, tzinfo=dt_timezone.utc)
+
+        self.assertEqual(partition_name(day, 'day'), 'machine_telemetry_log_p20261231')
+        self.assertEqual(next_start(day, 'day'), datetime(2027, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partition_name(month, 'month'), 'machine_telemetry_log_p202612')
+        self.assertEqual(next_start(month, 'month'), datetime(2027, 1, 1, tzinfo=dt_timezone.utc))
+
+    def test_partition_ddl_moves_default_rows_then_attaches(self):
+        start = datetime(2026, 3, 2, tzinfo=dt_timezone.utc)
+        create, move, attach = partition_ddl(start, next_start(start, 'day'), partition_name(start, 'day'))
+
+        self.assertIn('CREATE TABLE "machine_telemetry_log_p20260302" (LIKE "machine_telemetry_log"', create)
+        self.assertIn('DELETE FROM "machine_telemetry_log_default"', move)
+        self.assertIn("reading_date_time >= '2026-03-02T00:00:00+00:00'", move)
+        self.assertIn("reading_date_time < '2026-03-03T00:00:00+00:00'", move)
+        self.assertTrue(attach.endswith(
+            "FOR VALUES FROM ('2026-03-02T00:00:00+00:00') TO ('2026-03-03T00:00:00+00:00')"
+        ))
+
+    def test_partitioning_requires_postgresql(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('runs on PostgreSQL')
+        with self.assertRaises(CommandError):
+            call_command('partition_telemetry')
+
+
+class BackfillAnomaliesTests(TestCase):
+    def setUp(self):
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        start = datetime(2026, 3, 2, tzinfo=dt_timezone.utc)
+        # Alternating noise with one spike; index 5 carries a stale flag
+        self.readings = MachineTelemetryLog.objects.bulk_create([
+            MachineTelemetryLog(
+                equipment=self.equipment, parameter_type='Temperature', processed_flag=True,
+                value=100 if index == 35 else 10 + index % 2, is_anomaly=index == 5,
+                reading_date_time=start + timedelta(minutes=index),
+            )
+            for index in range(40)
+        ])
+        HealthDirtyMark.objects.all().delete()
+
+    def flagged(self):
+        return [
+            index for index, reading in enumerate(self.readings)
+            if MachineTelemetryLog.objects.get(pk=reading.pk).is_anomaly
+        ]
+
+    def test_rescoring_in_chunks_flags_outliers_and_marks_health_dirty(self):
+        call_command('backfill_anomalies', chunk_size=7, stdout=io.StringIO())
+
+        self.assertEqual(self.flagged(), [35])
+        state = AnomalyState.objects.get(equipment=self.equipment, parameter_type='Temperature')
+        self.assertEqual(state.reading_count, 40)
+        self.assertEqual(state.last_reading_at, self.readings[-1].reading_date_time)
+        self.assertTrue(HealthDirtyMark.objects.filter(equipment_id=self.equipment.id).exists())
+
+    def test_chunk_size_does_not_change_the_result(self):
+        call_command('backfill_anomalies', chunk_size=7, stdout=io.StringIO())
+        chunked = AnomalyState.objects.values_list('ewma_mean', 'ewma_variance').get()
+        call_command('backfill_anomalies', chunk_size=1000, stdout=io.StringIO())
+
+        for value, expected in zip(AnomalyState.objects.values_list('ewma_mean', 'ewma_variance').get(), chunked):
+            self.assertAlmostEqual(value, expected)
+        self.assertEqual(self.flagged(), [35])
+
+    def test_unknown_equipment_is_an_error(self):
+        for equipment in ('nope', str(uuid.uuid4())):
+            with self.assertRaises(CommandError):
+                call_command('backfill_anomalies', equipment=equipment, stdout=io.StringIO())
+
+
+class HealthScoreTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+
+    def score(self):
+        self.equipment.refresh_from_db()
+        return compute_scores([self.equipment], self.now)[self.equipment.id]
+
+    def test_healthy_equipment_scores_100(self):
+        self.assertEqual(self.score(), 100)
+
+    def test_anomaly_rate_uses_the_hourly_rollups(self):
+        TelemetryRollup.objects.create(
+            equipment=self.equipment, parameter_type='Temperature', resolution='1h',
+            bucket_start=self.now - timedelta(hours=1), reading_count=100,
+            value_sum=0, value_min=0, value_max=0,
+        )
+        for _ in range(5):
+            MachineTelemetryLog.objects.create(
+                equipment=self.equipment, parameter_type='Temperature', value=1, is_anomaly=True,
+                reading_date_time=self.now - timedelta(minutes=30),
+            )
+
+        # 5% of the 10% ceiling takes half of the 40 point anomaly penalty
+        self.assertEqual(self.score(), 80)
+
+    def test_tickets_and_maintenance_age(self):
+        Ticket.objects.create(
+            title='Overheat', equipment=self.equipment, request_type='Condition_Based', priority='Critical'
+        )
+        Ticket.objects.create(title='Done', equipment=self.equipment, priority='High', stage='Repaired')
+        self.equipment.last_maintenance = self.now - timedelta(days=365)
+        self.equipment.save()
+
+        # 5 for the violation, 15 for the open critical ticket, 15 for a year without maintenance
+        self.assertEqual(self.score(), 65)
+
+    def test_score_pending_rescores_dirty_equipment_only(self):
+        self.assertEqual(score_pending(), (1, 0))
+        self.assertFalse(HealthDirtyMark.objects.exists())
+        other = Equipment.objects.create(name='Lathe', serial_number='L-1')
+        score_pending()
+        scored_at = Equipment.objects.get(pk=other.pk).health_scored_at
+
+        Ticket.objects.create(title='Leak', equipment=self.equipment, priority='Critical')
+        self.assertEqual(score_pending(), (1, 1))
+
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.health_score, 85)
+        self.assertEqual(Equipment.objects.get(pk=other.pk).health_scored_at, scored_at)
+
+    def test_unchanged_scores_leave_updated_at_alone(self):
+        score_pending()
+        updated_at = Equipment.objects.get(pk=self.equipment.pk).updated_at
+
+        out = io.StringIO()
+        call_command('score_health', '--all', stdout=out)
+
+        self.assertIn('Scored 1 equipment, 0 scores changed', out.getvalue())
+        self.assertEqual(Equipment.objects.get(pk=self.equipment.pk).updated_at, updated_at)
+
+
+class AnalyticsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.tech = User.objects.create(username='tech', first_name='Ada', last_name='King', role='technician')
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        Equipment.objects.update(created_at=datetime(2025, 12, 1, tzinfo=dt_timezone.utc))
+        self.now = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        self.repair = self.ticket('Corrective', (2026, 2, 1), completed=(2026, 2, 1, 10), hours=8)
+        self.ticket('Preventive', (2026, 2, 10), completed=(2026, 2, 10, 2), hours=1)
+        self.open = self.ticket('Condition_Based', (2026, 2, 20))
+
+    def ticket(self, request_type, created, completed=None, hours=None):
+        ticket = Ticket.objects.create(
+            title=request_type, equipment=self.equipment, request_type=request_type,
+            assigned_technician=self.tech, duration_hours=hours or 0,
+            stage='Repaired' if completed else 'New',
+            completion_date=datetime(*completed, tzinfo=dt_timezone.utc) if completed else None,
+        )
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=datetime(*created, tzinfo=dt_timezone.utc))
+        ticket.refresh_from_db()
+        return ticket
+
+    def test_month_kpis(self):
+        data = report('2026-02', '2026-02', now=self.now)
+
+        self.assertEqual(data['summary'], {
+            'tickets_created': 3,
+            'tickets_repaired': 2,
+            'failures': 2,
+            'mttr_hours': 10.0,
+            'mtbf_hours': 336.0,
+            'downtime_hours': 10.0,
+            'availability': 0.9851,
+            'work_hours': 9.0,
+        })
+        self.assertEqual(data['previous']['tickets_created'], 0)
+        self.assertEqual(data['monthly'][0]['failure_rate'], 2.0)
+        self.assertEqual(data['technicians'], [{
+            'technician': str(self.tech.id), 'name': 'Ada King',
+            'tasks_closed': 2, 'avg_repair_hours': 6.0, 'work_hours': 9.0,
+        }])
+        self.assertEqual(data['backlog']['open_tickets'], 1)
+        self.assertEqual(data['backlog']['oldest_age_hours'], 216.0)
+        self.assertEqual(data['backlog']['by_age'], {'under_1d': 0, '1_7d': 0, '7_30d': 1, 'over_30d': 0})
+
+    def test_ticket_changes_refresh_only_their_months(self):
+        report('2026-01', '2026-02', now=self.now)
+
+        self.open.stage = 'Repaired'
+        self.open.completion_date = datetime(2026, 2, 20, 5, tzinfo=dt_timezone.utc)
+        self.open.save()
+        with CaptureQueriesContext(connection) as context:
+            data = report('2026-02', '2026-02', now=self.now)
+
+        self.assertEqual(data['summary']['tickets_repaired'], 3)
+        self.assertEqual(data['summary']['mttr_hours'], 7.5)
+        bucket_queries = [q for q in context.captured_queries if 'GROUP BY' in q['sql'] and 'tickets' in q['sql']]
+        self.assertEqual(len(bucket_queries), 2)
+
+    def test_endpoint_validates_the_range(self):
+        response = self.client.get('/api/analytics/', {'from': '2026-01', 'to': '2026-02'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['month'] for row in response.data['monthly']], ['2026-01', '2026-02'])
+
+        for params in ({'months': 0}, {'months': 'x'}, {'from': '2026-03', 'to': '2026-01'},
+                       {'from': '1900-01', 'to': '2026-01'}, {'from': 'January'}):
+            self.assertEqual(self.client.get('/api/analytics/', params).status_code, 400, params)
+
+
+class DashboardTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+
+    def test_summary_counts(self):
+        now = timezone.now()
+        busy = User.objects.create(username='busy', role='technician')
+        User.objects.create(username='idle', role='technician')
+        User.objects.create(username='gone', role='technician', is_active=False)
+        press = Equipment.objects.create(name='Press', serial_number='P-1', health_score=30)
+        Equipment.objects.create(name='Lathe', serial_number='L-1', status='Under Maintenance')
+        Equipment.objects.create(name='Old', serial_number='O-1', status='Scrapped', health_score=10)
+        Ticket.objects.create(title='A', equipment=press, assigned_technician=busy,
+                              scheduled_date=now - timedelta(days=1))
+        Ticket.objects.create(title='B', equipment=press, stage='In Progress', assigned_technician=busy)
+        Ticket.objects.create(title='C', equipment=press, stage='Repaired', assigned_technician=busy)
+
+        response = self.client.get('/api/dashboard/summary/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['equipment'], {'total': 2, 'under_maintenance': 1, 'critical': 2})
+        self.assertEqual(response.data['tickets'], {
+            'open': 2, 'pending': 1, 'in_progress': 1, 'overdue': 1, 'assigned': 2,
+        })
+        self.assertEqual(response.data['technicians'], {'total': 2, 'busy': 1, 'utilization': 0.2})
+
+    def test_summary_is_cached_for_a_short_time(self):
+        dashboard_summary()
+        Equipment.objects.create(name='Press', serial_number='P-1')
+
+        self.assertEqual(dashboard_summary()['equipment']['total'], 0)
+        cache.clear()
+        self.assertEqual(dashboard_summary()['equipment']['total'], 1)
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.press = Equipment.objects.create(name='Hydraulic press', serial_number='HP-1')
+        self.lathe = Equipment.objects.create(name='Lathe', serial_number='L-1', manufacturer='Acme')
+        self.titled = Ticket.objects.create(title='Hydraulic leak', equipment=self.lathe)
+        self.described = Ticket.objects.create(
+            title='Noise', description='Check the hydraulic pump and the valves', equipment=self.lathe
+        )
+        self.message = Message.objects.create(ticket=self.described, user=self.user, content='Replaced the pump seal')
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(row['kind'], row['id']) for row in response.data['results']]
+
+    def test_title_matches_rank_above_body_matches(self):
+        results = self.search(q='hydraulic', type='ticket')
+        self.assertEqual(results, [('ticket', str(self.titled.id)), ('ticket', str(self.described.id))])
+
+    def test_terms_are_prefixes_and_all_must_match(self):
+        self.assertEqual(len(self.search(q='hydr')), 3)
+        self.assertEqual(self.search(q='hydraulic pump', type='ticket'), [('ticket', str(self.described.id))])
+        self.assertEqual(self.search(q='hydraulic acme'), [])
+
+    def test_messages_point_at_their_ticket(self):
+        response = self.client.get('/api/search/', {'q': 'seal'})
+        (result,) = response.data['results']
+        self.assertEqual((result['kind'], result['ticket']), ('message', str(self.described.id)))
+
+    def test_unknown_type_is_rejected(self):
+        response = self.client.get('/api/search/', {'q': 'pump', 'type': 'ticket,robot'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.titled.title = 'Pneumatic leak'
+        self.titled.save()
+        self.lathe.delete()
+
+        self.assertEqual(self.search(q='hydraulic'), [('equipment', str(self.press.id))])
+        self.assertEqual(self.search(q='pneumatic'), [])
+
+    def test_list_search_uses_the_index_and_related_names(self):
+        response = self.client.get('/api/tickets/', {'search': 'lath'})
+        self.assertEqual({row['id'] for row in response.data['results']}, {str(self.titled.id), str(self.described.id)})
+
+        response = self.client.get('/api/equipment/', {'search': 'acm'})
+        self.assertEqual([row['id'] for row in response.data['results']], [str(self.lathe.id)])
+
+    def test_rebuild_restores_missing_entries(self):
+        SearchEntry.objects.filter(kind='ticket').delete()
+        self.assertEqual(self.search(q='hydraulic', type='ticket'), [])
+
+        call_command('rebuild_search_index', stdout=io.StringIO())
+
+        self.assertEqual(len(self.search(q='hydraulic', type='ticket')), 2)
+
+
+class AutocompleteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.pump = Equipment.objects.create(name='Hydraulic Pump 3', serial_number='PU-300')
+        self.press = Equipment.objects.create(name='Press', serial_number='PR-100')
+        self.spare = Equipment.objects.create(name='Spare pump', serial_number='SP-1')
+
+    def lookup(self, q, **params):
+        response = self.client.get('/api/equipment/autocomplete/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['serial_number'] for row in response.data]
+
+    def test_serial_prefixes_rank_before_name_words(self):
+        self.assertEqual(self.lookup('pr'), ['PR-100'])
+        self.assertEqual(self.lookup('p'), ['PR-100', 'PU-300', 'SP-1'])
+        self.assertEqual(self.lookup('pump 3'), ['PU-300'])
+        self.assertEqual(self.lookup('PUMP'), ['SP-1', 'PU-300'])
+
+    def test_limit_and_empty_query(self):
+        self.assertEqual(len(self.lookup('p', limit=1)), 1)
+        self.assertEqual(self.lookup(''), [])
+
+    def test_index_follows_equipment_changes(self):
+        self.assertEqual(self.lookup('lathe'), [])
+        Equipment.objects.create(name='Lathe', serial_number='LA-1')
+        self.assertEqual(self.lookup('lathe'), ['LA-1'])
+
+    def test_index_expires_without_a_shared_version_bump(self):
+        self.assertEqual(self.lookup('drill'), [])
+        # A queryset update sends no signal, like an edit made in another process
+        Equipment.objects.filter(pk=self.press.pk).update(name='Drill')
+        self.assertEqual(self.lookup('drill'), [])
+
+        with override_settings(AUTOCOMPLETE_INDEX_MAX_AGE=0):
+            self.assertEqual(self.lookup('drill'), ['PR-100'])
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='tester', first_name='Ada', last_name='Lovelace')
+        self.client.force_authenticate(self.user)
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        self.ticket = Ticket.objects.create(title='Leak', equipment=self.equipment, created_by=self.user)
+
+    def test_fields_limits_the_rendered_keys(self):
+        response = self.client.get('/api/tickets/', {'fields': 'id, title,stage'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'id': str(self.ticket.id), 'title': 'Leak', 'stage': 'New'}])
+
+        response = self.client.get(f'/api/tickets/{self.ticket.id}/', {'fields': 'title'})
+        self.assertEqual(response.data, {'title': 'Leak'})
+
+    def test_sparse_lists_skip_unused_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/tickets/', {'fields': 'id,title'})
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('JOIN', sql)
+
+    def test_expand_renders_the_relation_inline(self):
+        response = self.client.get('/api/tickets/', {'fields': 'id', 'expand': 'equipment,created_by'})
+        self.assertEqual(response.status_code, 200)
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'equipment', 'created_by'})
+        self.assertEqual(row['equipment'], {
+            'id': str(self.equipment.id), 'name': 'Press', 'serial_number': 'P-1', 'status': 'Active',
+        })
+        self.assertEqual(row['created_by']['username'], 'tester')
+
+        response = self.client.get('/api/tickets/')
+        self.assertEqual(response.data['results'][0]['equipment'], self.equipment.id)
+
+    def test_unknown_fields_and_expansions_are_rejected(self):
+        response = self.client.get('/api/tickets/', {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', str(response.data['error']))
+
+        response = self.client.get('/api/tickets/', {'expand': 'title'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Cannot expand', str(response.data['error']))
+
+    def test_writes_ignore_the_parameters(self):
+        response = self.client.patch(f'/api/tickets/{self.ticket.id}/?fields=bogus', {'title': 'Big leak'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Big leak')
+        self.assertIn('equipment_name', response.data)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class FastListTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester', first_name='Ada', last_name='Lovelace')
+        self.client.force_authenticate(self.user)
+        self.team = MaintenanceTeam.objects.create(name='Mechanics')
+        self.equipment = Equipment.objects.create(name='Presse "Nord" ü', serial_number='P-1')
+        Ticket.objects.create(
+            title='Leak ', equipment=self.equipment, assigned_team=self.team,
+            assigned_technician=self.user, created_by=self.user, duration_hours=Decimal('1.5'),
+            scheduled_date=timezone.now(),
+        )
+        # No technician or team: DRF leaves their *_name fields out
+        ticket = Ticket.objects.create(title='Noise', equipment=self.equipment, created_by=self.user)
+        Message.objects.create(ticket=ticket, user=self.user, content='On it')
+        for value in ('1', '2.5', '-0.0001'):
+            MachineTelemetryLog.objects.create(
+                equipment=self.equipment, parameter_type='Temperature', value=Decimal(value), is_anomaly=value == '1',
+            )
+
+    def body(self, url, params, fast):
+        with override_settings(FAST_LIST_SERIALIZATION=fast):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.streaming, fast)
+        return b''.join(response.streaming_content) if fast else response.content
+
+    def assertSameBytes(self, url, params=None):
+        params = params or {}
+        self.assertEqual(self.body(url, params, fast=True), self.body(url, params, fast=False))
+
+    def test_tickets_match_the_serializer(self):
+        self.assertSameBytes('/api/tickets/')
+        self.assertSameBytes('/api/tickets/', {'page_size': 1})
+        self.assertSameBytes('/api/tickets/', {'fields': 'id,assigned_technician_name,messages_count'})
+
+    def test_telemetry_matches_the_serializer(self):
+        self.assertSameBytes('/api/telemetry/')
+        self.assertSameBytes('/api/telemetry/', {'page_size': 2, 'ordering': 'reading_date_time'})
+        self.assertSameBytes('/api/telemetry/', {'fields': 'value,equipment_name'})
+
+    def test_expand_falls_back_to_the_serializer(self):
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            response = self.client.get('/api/tickets/', {'expand': 'equipment'})
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.data['results'][0]['equipment']['serial_number'], 'P-1')
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        self.day = datetime(2026, 3, 2, tzinfo=dt_timezone.utc)
+        for minutes, value in ((1, '10.5'), (2, '-3.0001')):
+            MachineTelemetryLog.objects.create(
+                equipment=self.equipment, parameter_type='Temperature', value=value,
+                reading_date_time=self.day + timedelta(minutes=minutes), processed_flag=True,
+            )
+        MachineTelemetryLog.objects.create(
+            equipment=self.equipment, parameter_type='Temperature', value='7',
+            reading_date_time=self.day + timedelta(days=1), processed_flag=True, is_anomaly=True,
+        )
+
+    def export(self, path, **params):
+        response = self.client.get(f'/api/{path}/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export('telemetry/export/csv').decode('utf-8'))))
+        self.assertEqual(rows[0], [
+            'id', 'equipment', 'equipment_name', 'parameter_type', 'value', 'reading_date_time', 'is_anomaly',
+        ])
+        self.assertEqual([row[4] for row in rows[1:]], ['10.5000', '-3.0001', '7.0000'])
+        self.assertEqual(rows[3][5:], ['2026-03-03T00:00:00+00:00', 'true'])
+
+    def test_ndjson_and_filters(self):
+        body = self.export('telemetry/export/ndjson', **{'from': '2026-03-02', 'to': '2026-03-03'})
+        rows = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        self.assertEqual([row['value'] for row in rows], ['10.5000', '-3.0001'])
+        self.assertEqual(rows[0]['equipment'], str(self.equipment.id))
+        self.assertIs(rows[0]['is_anomaly'], False)
+
+        body = self.export('telemetry/export/ndjson', anomaly='true')
+        self.assertEqual([json.loads(line)['value'] for line in body.splitlines()], ['7.0000'])
+
+    @skipUnless(parquet_available(), 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        Ticket.objects.create(title='Leak', equipment=self.equipment, duration_hours=Decimal('1.5'))
+        table = pq.read_table(io.BytesIO(self.export('tickets/export/parquet')))
+        self.assertEqual(table.column('title').to_pylist(), ['Leak'])
+        self.assertEqual(table.column('duration_hours').to_pylist(), [Decimal('1.50')])
+        self.assertEqual(table.column('assigned_team').to_pylist(), [None])
+
+        table = pq.read_table(io.BytesIO(self.export('telemetry/export/parquet')))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column('value').to_pylist()[1], Decimal('-3.0001'))
+
+    @override_settings(TELEMETRY_COLUMNAR_STORAGE=True)
+    def test_archived_chunks_come_first(self):
+        compact_day(self.day)
+        self.assertEqual(MachineTelemetryLog.objects.count(), 1)
+
+        body = self.export('telemetry/export/ndjson', equipment=str(self.equipment.id))
+        rows = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        self.assertEqual([Decimal(row['value']) for row in rows], [Decimal('10.5'), Decimal('-3.0001'), 7])
+        self.assertEqual(rows[0]['equipment_name'], 'Press')
+
+        body = self.export('telemetry/export/ndjson', **{'from': '2026-03-02T00:01:30Z'})
+        self.assertEqual(len(body.splitlines()), 2)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'equipment': 'bad'}, {'from': 'yesterday'}, {'from': '2026-03-03', 'to': '2026-03-02'}):
+            response = self.client.get('/api/telemetry/export/csv/', params)
+            self.assertEqual(response.status_code, 400, params)
+        response = self.client.get('/api/tickets/export/csv/', {'team': 'bad'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/telemetry.ndjson'
+            call_command(
+                'export_history', 'telemetry', '--format', 'ndjson', '--chunk-size', '1',
+                '--from', '2026-03-03', '--output', path, stdout=io.StringIO(),
+            )
+            with open(path, encoding='utf-8') as output:
+                self.assertEqual([json.loads(line)['value'] for line in output], ['7.0000'])
+
+        with self.assertRaises(CommandError):
+            call_command('export_history', 'telemetry', '--equipment', 'bad', stdout=io.StringIO())
+
+
+class AsyncExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        for value in range(3):
+            MachineTelemetryLog.objects.create(equipment=self.equipment, parameter_type='Temperature', value=value)
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    async def test_asgi_exports_stream_chunk_by_chunk(self):
+        response = await self.async_client.get('/api/telemetry/export/csv/', headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(b''.join(chunks).decode('utf-8').splitlines()[0].split(',')[0], 'id')
+
+
+@override_settings(TELEMETRY_INLINE_PROCESSING=False)
+class TelemetryWorkerTests(TestCase):
+    def setUp(self):
+        engine.index.invalidate()
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        MaintenanceTrigger.objects.create(
+            equipment=self.equipment, trigger_name='Overheat', parameter_type='Temperature',
+            operation_type='Greater_Than', threshold_value=100,
+        )
+        start = timezone.now() - timedelta(minutes=10)
+        self.readings = [
+            MachineTelemetryLog.objects.create(
+                equipment=self.equipment, parameter_type='Temperature', value=value,
+                reading_date_time=start + timedelta(minutes=minute),
+            )
+            for minute, value in enumerate((50, 150, 60))
+        ]
+
+    def unprocessed(self):
+        return MachineTelemetryLog.objects.filter(processed_flag=False).count()
+
+    def test_batches_are_claimed_once_in_reading_order(self):
+        self.assertEqual(drain_batch(2), (2, 1))
+        self.assertEqual(
+            list(MachineTelemetryLog.objects.filter(processed_flag=True).values_list('id', flat=True).order_by('id')),
+            sorted(reading.id for reading in self.readings[:2]),
+        )
+        self.assertEqual(drain_batch(2), (1, 0))
+        self.assertEqual(drain_batch(2), (0, 0))
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(TelemetryRollup.objects.filter(resolution='1m').count(), 3)
+
+    def test_failed_processing_leaves_rows_unclaimed(self):
+        with mock.patch('core.processing.update_rollups', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                drain_batch(10)
+        self.assertEqual(self.unprocessed(), 3)
+        self.assertFalse(Ticket.objects.exists())
+
+        self.assertEqual(drain_batch(10), (3, 1))
+        self.assertEqual(self.unprocessed(), 0)
+
+    def test_once_exits_when_the_backlog_is_empty(self):
+        stdout = io.StringIO()
+        call_command('process_telemetry', '--once', '--batch-size', '2', stdout=stdout)
+        self.assertEqual(self.unprocessed(), 0)
+        self.assertIn('Worker stopped after 3 readings and 1 tickets', stdout.getvalue())
+
+
+class ClaimTransactionTests(TransactionTestCase):
+    def test_sqlite_claims_take_the_write_lock_up_front(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        mode = connection.transaction_mode
+        with CaptureQueriesContext(connection) as queries:
+            with claim_transaction():
+                MachineTelemetryLog.objects.exists()
+                # Nested atomic blocks stay plain savepoints
+                with claim_transaction():
+                    pass
+        self.assertEqual(queries.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
+        self.assertEqual(connection.transaction_mode, mode)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.equipment = Equipment.objects.create(name='Press', serial_number='P-1')
+        self.day = datetime(2026, 3, 2, tzinfo=dt_timezone.utc)
+        # Three readings share a timestamp, so only the id orders them
+        self.readings = [self.log(minutes, value) for value, minutes in enumerate((0, 5, 5, 5, 9))]
+
+    def log(self, minutes, value):
+        return MachineTelemetryLog.objects.create(
+            equipment=self.equipment, parameter_type='Temperature', value=value,
+            reading_date_time=self.day + timedelta(minutes=minutes), processed_flag=True,
+        )
+
+    def expected(self, descending=True):
+        readings = sorted(self.readings, key=lambda r: (r.reading_date_time, r.id), reverse=descending)
+        return [str(reading.id) for reading in readings]
+
+    def walk(self, url, link='next'):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_next_links_cover_every_row_once_across_ties(self):
+        pages = self.walk('/api/telemetry/?page_size=2')
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self.expected())
+
+    def test_previous_links_walk_back(self):
+        first = self.client.get('/api/telemetry/', {'page_size': 2})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        self.assertIsNone(third.data['next'])
+
+        back = self.client.get(third.data['previous'])
+        self.assertEqual(back.data['results'], second.data['results'])
+        back = self.client.get(back.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertEqual(self.client.get(back.data['next']).data['results'], second.data['results'])
+
+    def test_ordering_changes_the_keyset(self):
+        pages = self.walk('/api/telemetry/?page_size=2&ordering=reading_date_time')
+        self.assertEqual(sum(pages, []), self.expected(descending=False))
+
+        MachineTelemetryLog.objects.filter(pk=self.readings[0].pk).update(created_at=timezone.now() + timedelta(days=1))
+        pages = self.walk('/api/telemetry/?page_size=3&ordering=-created_at')
+        self.assertEqual(pages[0][0], str(self.readings[0].id))
+        self.assertEqual(len(sum(pages, [])), 5)
+
+    def test_tampered_cursors_are_not_found(self):
+        payload = base64.urlsafe_b64encode(json.dumps({'p': 'yesterday', 'i': 'x'}).encode()).decode()
+        for cursor in ('not-base64!', base64.urlsafe_b64encode(b'[1]').decode(), payload):
+            response = self.client.get('/api/telemetry/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+        response = self.client.get('/api/tickets/', {'cursor': payload})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(TELEMETRY_COLUMNAR_STORAGE=True)
+    def test_live_and_archived_rows_merge_in_both_directions(self):
+        self.assertEqual(compact_day(self.day), (5, 1))
+        # Live readings on both sides of, and tied with, the archived ones
+        for minutes, value in ((5, 10), (1440, 11), (-1, 12)):
+            self.log(minutes, value)
+
+        def rows(response):
+            return [(row['reading_date_time'], row['id'], Decimal(row['value'])) for row in response.data['results']]
+
+        everything = rows(self.client.get('/api/telemetry/', {'page_size': 100}))
+        self.assertEqual(everything, sorted(everything, reverse=True))
+        values = [value for *_, value in everything]
+        self.assertEqual(values[:2] + values[6:], [11, 4, 0, 12])
+        self.assertEqual(sorted(values[2:6]), [1, 2, 3, 10])
+
+        forward, url = [], '/api/telemetry/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            forward.extend(rows(response))
+            url = response.data['next']
+        self.assertEqual(forward, everything)
+
+        backward = rows(response)
+        url = response.data['previous']
+        while url:
+            response = self.client.get(url)
+            backward = rows(response) + backward
+            url = response.data['previous']
+        self.assertEqual(backward, everything)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class HierarchySubtreeFilterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.site = AssetHierarchy.objects.create(name='Site A', level_type='Site')
+        self.area = AssetHierarchy.objects.create(name='Area A1', level_type='Area', parent=self.site)
+        self.cell = AssetHierarchy.objects.create(name='Cell A1a', level_type='Work Center', parent=self.area)
+        self.sibling = AssetHierarchy.objects.create(name='Area A2', level_type='Area', parent=self.site)
+        other_site = AssetHierarchy.objects.create(name='Site B', level_type='Site')
+        other_area = AssetHierarchy.objects.create(name='Area B1', level_type='Area', parent=other_site)
+        self.equipment = {
+            node.name: Equipment.objects.create(name=node.name, serial_number=node.name, asset_hierarchy=node)
+            for node in (self.site, self.area, self.cell, self.sibling, other_area)
+        }
+        Equipment.objects.create(name='Loose', serial_number='Loose')
+        for equipment in self.equipment.values():
+            Ticket.objects.create(title=equipment.name, equipment=equipment)
+
+    def names(self, path, subtree):
+        response = self.client.get(f'/api/{path}/', {'hierarchy_subtree': subtree})
+        self.assertEqual(response.status_code, 200, response.content)
+        key = 'name' if path == 'equipment' else 'title'
+        return sorted(row[key] for row in response.data['results'])
+
+    def test_equipment_under_the_node_and_its_descendants(self):
+        self.assertEqual(self.names('equipment', self.area.id), ['Area A1', 'Cell A1a'])
+        self.assertEqual(self.names('equipment', self.site.id), ['Area A1', 'Area A2', 'Cell A1a', 'Site A'])
+        self.assertEqual(self.names('equipment', self.cell.id), ['Cell A1a'])
+
+    def test_tickets_are_filtered_through_their_equipment(self):
+        self.assertEqual(self.names('tickets', self.area.id), ['Area A1', 'Cell A1a'])
+        self.assertEqual(self.names('tickets', self.sibling.id), ['Area A2'])
+
+    def test_unknown_or_malformed_nodes_match_nothing(self):
+        for subtree in (uuid.uuid4(), 'not-a-uuid'):
+            self.assertEqual(self.names('equipment', subtree), [])
+            self.assertEqual(self.names('tickets', subtree), [])
+
+
+class FakePubSub:
+    """Pub/sub connection replaying ``messages``, then failing or blocking"""
+
+    def __init__(self, messages, error=None):
+        self.messages = messages
+        self.error = error
+        self.closed = False
+
+    async def listen(self):
+        for data in self.messages:
+            yield {'type': 'message', 'data': json.dumps(data)}
+        if self.error:
+            raise self.error
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FlakyRedisBroker(RedisBroker):
+    retry_delay = 0.01
+
+    def __init__(self, connections):
+        super().__init__()
+        self.connections = list(connections)
+
+    async def _open_pubsub(self):
+        connection = self.connections.pop(0)
+        if isinstance(connection, Exception):
+            raise connection
+        return connection, connection
+
+
+class RedisBrokerTests(TestCase):
+    def event(self, title):
+        return {'type': 'ticket.created', 'channels': ['equipment:1'], 'data': {'title': title}}
+
+    async def test_listener_resubscribes_after_a_dropped_connection(self):
+        dropped = FakePubSub([self.event('first')], error=ConnectionError('connection reset'))
+        resumed = FakePubSub([self.event('second')])
+        broker = FlakyRedisBroker([dropped, OSError('connection refused'), resumed])
+
+        with self.assertLogs('core.events', 'WARNING') as logs:
+            subscription = broker.subscribe(['equipment:1'])
+            first = await asyncio.wait_for(subscription.queue.get(), timeout=1)
+            second = await asyncio.wait_for(subscription.queue.get(), timeout=1)
+
+        self.assertEqual([first['data']['title'], second['data']['title']], ['first', 'second'])
+        self.assertTrue(dropped.closed)
+        self.assertIn('connection lost', logs.output[0])
+        self.assertIn('Cannot subscribe', logs.output[1])
+
+        broker.unsubscribe(subscription)
+        broker._listener.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await broker._listener
+        self.assertTrue(resumed.closed)
+
+    async def test_listener_stops_once_nobody_is_subscribed(self):
+        broker = FlakyRedisBroker([OSError('connection refused')])
+        with self.assertLogs('core.events', 'WARNING'):
+            subscription = broker.subscribe([])
+            await asyncio.sleep(0)
+            broker.unsubscribe(subscription)
+            await asyncio.wait_for(broker._listener, timeout=1)
+        self.assertEqual(broker.connections, [])
+
+
+@override_settings(TELEMETRY_COLUMNAR_STORAGE=True, FAST_LIST_SERIALIZATION=True)
+class FastListArchiveTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='tester')
+        self.client.force_authenticate(self.user)
+        self.day = datetime(2026, 3, 2, tzinfo=dt_timezone.utc)
+        for name in ('Press', 'Lathe'):
+            equipment = Equipment.objects.create(name=name, serial_number=name)
+            for minutes in range(5):
+                MachineTelemetryLog.objects.create(
+                    equipment=equipment, parameter_type='Temperature', value=minutes,
+                    reading_date_time=self.day + timedelta(minutes=minutes), processed_flag=True,
+                )
+        compact_day(self.day)
+        for equipment in Equipment.objects.all():
+            MachineTelemetryLog.objects.create(
+                equipment=equipment, parameter_type='Temperature', value=9,
+                reading_date_time=self.day + timedelta(days=1), processed_flag=True,
+            )
+
+    def test_mixed_pages_resolve_equipment_names_without_a_query_per_row(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/telemetry/', {'page_size': 8})
+            rows = json.loads(b''.join(response.streaming_content))['results']
+
+        self.assertEqual(len(rows), 8)
+        self.assertEqual({row['equipment_name'] for row in rows[2:]}, {'Press', 'Lathe'})
+
+        with override_settings(FAST_LIST_SERIALIZATION=False), self.assertNumQueries(2):
+            response = self.client.get('/api/telemetry/', {'page_size': 8})
+        self.assertEqual(json.loads(response.content)['results'], rows)
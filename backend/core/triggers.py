@@ -0,0 +1,136 @@
+"""
+Server-side evaluation of MaintenanceTrigger rules against telemetry
+"""
+
+import logging
+import operator
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from .models import Equipment, MaintenanceTrigger, Ticket
+from .versioned import VersionedIndex
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_KEY = 'core:trigger_index_version'
+
+OPERATIONS = {
+    'Greater_Than': operator.gt,
+    'Less_Than': operator.lt,
+    'Equals': operator.eq,
+}
+
+OPEN_STAGES = ['New', 'In Progress']
+
+Rule = namedtuple('Rule', ['trigger_id', 'name', 'compare', 'threshold', 'template'])
+Violation = namedtuple('Violation', ['rule', 'reading'])
+
+
+class TriggerIndex(VersionedIndex):
+    """
+    In-memory index of active triggers keyed by (equipment_id, parameter_type).
+
+    Trigger signals bump its version; web workers and ``process_telemetry``
+    see each other's edits right away only through a shared cache (Redis),
+    otherwise once their index is ``TRIGGER_INDEX_MAX_AGE`` seconds old.
+    """
+    version_key = INDEX_VERSION_KEY
+    max_age_setting = 'TRIGGER_INDEX_MAX_AGE'
+
+    def __init__(self):
+        super().__init__()
+        self._rules = {}
+
+    def load(self):
+        rules = {}
+        triggers = MaintenanceTrigger.objects.filter(is_active=True).values_list(
+            'id', 'equipment_id', 'parameter_type', 'trigger_name',
+            'operation_type', 'threshold_value', 'associated_task_template'
+        )
+        for trigger_id, equipment_id, parameter, name, op, threshold, template in triggers:
+            compare = OPERATIONS.get(op)
+            if compare is None:
+                continue
+            rules.setdefault((equipment_id, parameter), []).append(
+                Rule(trigger_id, name, compare, threshold, template)
+            )
+        self._rules = rules
+        logger.info('Loaded %d trigger keys into the evaluation index', len(rules))
+
+    def rules_for(self, equipment_id, parameter_type):
+        return self._rules.get((equipment_id, parameter_type), ())
+
+
+class TriggerEngine:
+    """
+    Evaluates readings against the trigger index and opens Condition_Based tickets.
+
+    Evaluation is a dictionary lookup per reading; the database is touched
+    once per batch and only when at least one rule fires.
+    """
+
+    def __init__(self, index=None):
+        self.index = index or TriggerIndex()
+
+    def find_violations(self, readings):
+        self.index.refresh()
+        violations = []
+        for reading in readings:
+            rules = self.index.rules_for(reading.equipment_id, reading.parameter_type)
+            if not rules:
+                continue
+            try:
+                value = Decimal(str(reading.value))
+            except (InvalidOperation, ValueError):
+                continue
+            for rule in rules:
+                if rule.compare(value, rule.threshold):
+                    violations.append(Violation(rule, reading))
+        return violations
+
+    def evaluate(self, readings):
+        """Evaluate readings and return the tickets that were created"""
+        return self.create_tickets(self.find_violations(readings))
+
+    def create_tickets(self, violations):
+        if not violations:
+            return []
+
+        equipment_ids = {violation.reading.equipment_id for violation in violations}
+        titles = {violation.rule.name for violation in violations}
+        open_tickets = set(
+            Ticket.objects.filter(
+                equipment_id__in=equipment_ids,
+                title__in=titles,
+                request_type='Condition_Based',
+                stage__in=OPEN_STAGES,
+            ).values_list('equipment_id', 'title')
+        )
+        teams = dict(
+            Equipment.objects.filter(id__in=equipment_ids).values_list('id', 'assigned_team_id')
+        )
+
+        tickets = []
+        for rule, reading in violations:
+            key = (reading.equipment_id, rule.name)
+            if key in open_tickets:
+                continue
+            open_tickets.add(key)
+            description = (
+                f'{rule.template or ""} '
+                f'[Reading: {reading.value}, Threshold: {rule.threshold}]'
+            ).strip()
+            tickets.append(Ticket(
+                title=rule.name,
+                description=description,
+                equipment_id=reading.equipment_id,
+                request_type='Condition_Based',
+                priority='High',
+                assigned_team_id=teams.get(reading.equipment_id),
+            ))
+
+        return Ticket.objects.bulk_create(tickets)
+
+
+engine = TriggerEngine()
@@ -2,11 +2,13 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
-    signup, login, current_user,
+    signup, login, current_user, cache_metrics, sync, analytics, dashboard, search,
     UserViewSet, MaintenanceTeamViewSet, AssetHierarchyViewSet,
     EquipmentViewSet, MaintenanceTriggerViewSet, MachineTelemetryLogViewSet,
     TicketViewSet, MessageViewSet
 )
+from .ingest_queue import ingest
+from .streams import events
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
@@ -25,6 +27,15 @@ urlpatterns = [
     path('auth/me/', current_user, name='current-user'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
+    # Operations
+    path('cache/stats/', cache_metrics, name='cache-stats'),
+    path('sync/', sync, name='sync'),
+    path('analytics/', analytics, name='analytics'),
+    path('dashboard/summary/', dashboard, name='dashboard-summary'),
+    path('search/', search, name='search'),
+    path('events/', events, name='events'),
+    path('telemetry/ingest/', ingest, name='telemetry-ingest'),
+    
     # API routes
     path('', include(router.urls)),
 ]
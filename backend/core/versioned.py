@@ -0,0 +1,61 @@
+"""
+In-process indexes rebuilt lazily when a version kept in the cache changes
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class VersionedIndex:
+    """
+    Base for per-process lookup structures over database rows.
+
+    Subclasses set ``version_key`` and ``max_age_setting`` and implement
+    ``load()``, which rebuilds the index from the database. ``invalidate()``
+    bumps the version stored under ``version_key`` and ``refresh()`` calls
+    ``load()`` under a lock once the version differs from the one last
+    loaded. Only a cache shared by every process (Redis) carries that bump
+    to other processes right away; with a per-process cache such as the
+    development LocMemCache they reload once their index is older than the
+    ``max_age_setting`` setting (in seconds).
+    """
+    version_key = None
+    max_age_setting = None
+
+    def __init__(self):
+        self._version = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Force a reload in this process and bump the shared version"""
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+        self._version = None
+
+    def _current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version, None):
+                version = cache.get(self.version_key, version)
+        return version
+
+    def _is_current(self, version):
+        age = time.monotonic() - self._loaded_at
+        return version == self._version and age < getattr(settings, self.max_age_setting)
+
+    def refresh(self):
+        """Reload the index if the shared version changed or it is too old"""
+        version = self._current_version()
+        if self._is_current(version):
+            return
+        with self._lock:
+            if self._is_current(version):
+                return
+            self.load()
+            self._version = version
+            self._loaded_at = time.monotonic()
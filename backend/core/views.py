@@ -1,13 +1,21 @@
+import uuid
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.parsers import JSONParser
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import authenticate
-from django.db.models import Q, Count
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q, Count, Max, Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from .models import (
     User, MaintenanceTeam, AssetHierarchy, Equipment,
-    MaintenanceTrigger, MachineTelemetryLog, Ticket, Message
+    MaintenanceTrigger, MachineTelemetryLog, TelemetryRollup, Ticket, Message
 )
 from .serializers import (
     UserSerializer, UserCreateSerializer, MaintenanceTeamSerializer,
@@ -15,6 +23,22 @@ from .serializers import (
     MachineTelemetryLogSerializer, TicketSerializer, TicketDetailSerializer,
     MessageSerializer
 )
+from .analytics import dashboard_summary, month_key, month_range, report, shift_months
+from .autocomplete import autocomplete
+from .cache import cache_stats, cached_response
+from .columnar import scan_chunks
+from .conditional import ConditionalGetMixin, make_validators, not_modified, set_validators
+from .exports import TELEMETRY, TICKETS, ExportMixin, telemetry_rows
+from .fastpath import FastListMixin
+from .fieldsets import SparseFieldsMixin
+from .hierarchy import children_index, subtree_q
+from .ingest import ingest_telemetry
+from .pagination import KeysetPagination, TelemetryPagination
+from .parsers import NDJSONParser
+from .processing import process_readings
+from .rollups import RESOLUTIONS, bucket_start, choose_resolution
+from .search import DOCUMENTS_BY_KIND, FullTextSearchFilter, search as search_entries
+from .sync import ExpiredSyncToken, InvalidSyncToken, collect_changes
 
 
 # Authentication Views
@@ -76,8 +100,106 @@ def current_user(request):
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cache_metrics(request):
+    """Response cache hit/miss counters (admins only)"""
+    if request.user.role != 'admin':
+        return Response(
+            {'error': 'Admin role required'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return Response(cache_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """Rows created, updated or deleted since an opaque sync cursor"""
+    try:
+        return Response(collect_changes(request.query_params.get('since', None) or None))
+    except ExpiredSyncToken:
+        return Response(
+            {'error': 'Sync cursor expired; start a full sync without since'},
+            status=status.HTTP_410_GONE
+        )
+    except InvalidSyncToken:
+        return Response(
+            {'error': 'Invalid sync cursor'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics(request):
+    """Maintenance KPIs for a range of months (``from``/``to`` as YYYY-MM, or ``months``)"""
+    first = request.query_params.get('from', None)
+    last = request.query_params.get('to', None) or month_key(timezone.now())
+    try:
+        if first is None:
+            months = int(request.query_params.get('months', settings.ANALYTICS_DEFAULT_MONTHS))
+            if months < 1:
+                raise ValueError
+            first = shift_months(last, 1 - months)
+        span = len(month_range(first, last))
+    except ValueError:
+        return Response(
+            {'error': 'Invalid range; use from/to as YYYY-MM or a positive months count'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not span or span > settings.ANALYTICS_MAX_MONTHS:
+        return Response(
+            {'error': f'Range must cover 1 to {settings.ANALYTICS_MAX_MONTHS} months'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(report(first, last))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """Headline equipment, ticket and technician counts for the dashboard"""
+    return Response(dashboard_summary())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search(request):
+    """Ranked full-text matches across tickets, equipment and messages"""
+    kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+    unknown = set(kinds) - set(DOCUMENTS_BY_KIND)
+    if unknown:
+        return Response(
+            {'error': f'Unknown type: {", ".join(sorted(unknown))}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = int(request.query_params.get('limit', settings.SEARCH_RESULTS_LIMIT))
+    except ValueError:
+        limit = settings.SEARCH_RESULTS_LIMIT
+    return Response({'results': search_entries(request.query_params.get('q', ''), kinds, max(1, limit))})
+
+
+def hierarchy_subtree_ids(node_id):
+    """
+    Subquery of the ids of a hierarchy node and all its descendants.
+
+    The node's materialized path is read once and descendants come from a
+    prefix scan on the path index, so plant-wide filters stay one query.
+    Returns None when the node does not exist.
+    """
+    try:
+        path = AssetHierarchy.objects.filter(pk=node_id).values_list('path', flat=True).first()
+    except ValidationError:
+        return None
+    if not path:
+        return None
+    return AssetHierarchy.objects.filter(subtree_q(path)).values('id')
+
+
 # ViewSets
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for User model"""
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -86,18 +208,27 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ['username', 'email', 'first_name', 'last_name', 'job_title']
     ordering_fields = ['username', 'date_joined']
     ordering = ['-date_joined']
+    
+    @cached_response('users', scopes=('users',))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
-class MaintenanceTeamViewSet(viewsets.ModelViewSet):
+class MaintenanceTeamViewSet(SparseFieldsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for MaintenanceTeam model"""
-    queryset = MaintenanceTeam.objects.all()
+    queryset = MaintenanceTeam.objects.select_related('lead_manager').all()
     serializer_class = MaintenanceTeamSerializer
     permission_classes = [IsAuthenticated]
+    validator_scopes = ('users',)
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
+    
+    @cached_response('teams', scopes=('teams', 'users'))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
-class AssetHierarchyViewSet(viewsets.ModelViewSet):
+class AssetHierarchyViewSet(SparseFieldsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for AssetHierarchy model"""
     queryset = AssetHierarchy.objects.all()
     serializer_class = AssetHierarchySerializer
@@ -113,23 +244,40 @@ class AssetHierarchyViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(level_type=level_type)
         return queryset
     
+    def get_serializer_context(self):
+        """Build the children index once so nested serialization is query-free"""
+        context = super().get_serializer_context()
+        if self.action == 'tree' or (self.action in ('list', 'retrieve') and self.field_requested('children')):
+            context['children_by_parent'] = children_index(AssetHierarchy.objects.all())
+        return context
+    
     @action(detail=False, methods=['get'])
+    @cached_response('hierarchy_tree', scopes=('hierarchy',))
     def tree(self, request):
         """Get complete hierarchy tree"""
-        roots = self.queryset.filter(parent__isnull=True)
-        serializer = self.get_serializer(roots, many=True)
-        return Response(serializer.data)
+        state = AssetHierarchy.objects.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        etag, last_modified = make_validators(
+            request, state['count'], state['last_modified'], last_modified=state['last_modified']
+        )
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            context = self.get_serializer_context()
+            roots = context['children_by_parent'].get(None, [])
+            serializer = self.get_serializer_class()(roots, many=True, context=context)
+            response = Response(serializer.data)
+        return set_validators(response, etag, last_modified)
 
 
-class EquipmentViewSet(viewsets.ModelViewSet):
+class EquipmentViewSet(SparseFieldsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Equipment model"""
     queryset = Equipment.objects.select_related(
         'asset_hierarchy', 'assigned_team', 'assigned_technician'
     ).all()
     serializer_class = EquipmentSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'serial_number', 'model', 'manufacturer', 'department']
+    validator_scopes = ('hierarchy', 'teams', 'users')
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_kind = 'equipment'
     ordering_fields = ['name', 'created_at', 'health_score']
     ordering = ['-created_at']
     
@@ -148,8 +296,28 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         if hierarchy_id:
             queryset = queryset.filter(asset_hierarchy_id=hierarchy_id)
         
+        subtree_id = self.request.query_params.get('hierarchy_subtree', None)
+        if subtree_id:
+            node_ids = hierarchy_subtree_ids(subtree_id)
+            if node_ids is None:
+                return queryset.none()
+            queryset = queryset.filter(asset_hierarchy_id__in=node_ids)
+        
         return queryset
     
+    @cached_response('equipment_detail', scopes=('equipment', 'hierarchy', 'teams', 'users'))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Top matches by serial number prefix or name, for type-ahead inputs"""
+        try:
+            limit = int(request.query_params.get('limit', settings.AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = settings.AUTOCOMPLETE_LIMIT
+        return Response(autocomplete(request.query_params.get('q', ''), max(1, limit)))
+    
     @action(detail=True, methods=['get'])
     def telemetry(self, request, pk=None):
         """Get telemetry logs for specific equipment"""
@@ -162,16 +330,19 @@ class EquipmentViewSet(viewsets.ModelViewSet):
     def tickets(self, request, pk=None):
         """Get tickets for specific equipment"""
         equipment = self.get_object()
-        tickets = equipment.tickets.all()
+        tickets = equipment.tickets.select_related(
+            'equipment', 'assigned_team', 'assigned_technician', 'created_by'
+        ).annotate(message_count=Count('messages'))
         serializer = TicketSerializer(tickets, many=True)
         return Response(serializer.data)
 
 
-class MaintenanceTriggerViewSet(viewsets.ModelViewSet):
+class MaintenanceTriggerViewSet(SparseFieldsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for MaintenanceTrigger model"""
     queryset = MaintenanceTrigger.objects.select_related('equipment').all()
     serializer_class = MaintenanceTriggerSerializer
     permission_classes = [IsAuthenticated]
+    validator_scopes = ('equipment',)
     
     def get_queryset(self):
         """Filter triggers by equipment"""
@@ -182,13 +353,17 @@ class MaintenanceTriggerViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class MachineTelemetryLogViewSet(viewsets.ModelViewSet):
+class MachineTelemetryLogViewSet(SparseFieldsMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
     """ViewSet for MachineTelemetryLog model"""
     queryset = MachineTelemetryLog.objects.select_related('equipment').all()
     serializer_class = MachineTelemetryLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TelemetryPagination
     filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['reading_date_time', 'created_at']
     ordering = ['-reading_date_time']
+    export_dataset = TELEMETRY
+    export_uuid_params = ('equipment',)
     
     def get_queryset(self):
         """Filter telemetry by equipment and parameter type"""
@@ -205,21 +380,161 @@ class MachineTelemetryLogViewSet(viewsets.ModelViewSet):
         if anomaly_only == 'true':
             queryset = queryset.filter(is_anomaly=True)
         
-        return queryset[:1000]  # Limit to 1000 most recent
+        return queryset
+    
+    def get_archived_readings(self, position, pk, descending, limit):
+        """Compacted readings matching the list filters (see core/columnar.py)"""
+        return scan_chunks(
+            equipment_id=self.request.query_params.get('equipment', None),
+            parameter=self.request.query_params.get('parameter', None),
+            anomaly_only=self.request.query_params.get('anomaly', None) == 'true',
+            position=position, pk=pk, descending=descending, limit=limit,
+        )
+    
+    def export_rows(self, start, end):
+        """Live and archived readings matching the list filters (see core/exports.py)"""
+        return telemetry_rows(
+            self.get_queryset(), start, end,
+            equipment_id=self.request.query_params.get('equipment', None),
+            parameter=self.request.query_params.get('parameter', None),
+            anomaly_only=self.request.query_params.get('anomaly', None) == 'true',
+        )
+    
+    def perform_create(self, serializer):
+        """Process the reading inline unless workers drain the backlog"""
+        if not settings.TELEMETRY_INLINE_PROCESSING:
+            serializer.save()
+            return
+        with transaction.atomic():
+            reading = serializer.save()
+            process_readings([reading])
+            reading.processed_flag = True
+            reading.save(update_fields=['processed_flag', 'is_anomaly'])
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Ingest a batch of readings as a JSON array or NDJSON"""
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get('readings')
+        if not isinstance(rows, list):
+            return Response(
+                {'error': 'Expected a list of readings'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > settings.TELEMETRY_BULK_MAX_ROWS:
+            return Response(
+                {'error': f'Batch exceeds {settings.TELEMETRY_BULK_MAX_ROWS} readings'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        chunk_size = request.query_params.get('chunk_size', None)
+        try:
+            chunk_size = int(chunk_size) if chunk_size else None
+        except ValueError:
+            chunk_size = 0
+        if chunk_size is not None and chunk_size < 1:
+            return Response(
+                {'error': 'chunk_size must be a positive integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        result = ingest_telemetry(rows, chunk_size=chunk_size)
+        if result['errors'] and not result['created']:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif result['errors']:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response(result, status=response_status)
+    
+    @action(detail=False, methods=['get'])
+    def aggregate(self, request):
+        """Min/max/avg/count per time bucket from the rollup tables"""
+        equipment_id = request.query_params.get('equipment', None)
+        parameter = request.query_params.get('parameter', None)
+        if not equipment_id:
+            return Response(
+                {'error': 'equipment is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            equipment_id = uuid.UUID(equipment_id)
+        except ValueError:
+            return Response(
+                {'error': 'equipment must be a valid UUID'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        end = parse_datetime(request.query_params.get('end', '')) or timezone.now()
+        start = parse_datetime(request.query_params.get('start', '')) or end - RESOLUTIONS['1d']
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+        if start >= end:
+            return Response(
+                {'error': 'start must be before end'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            points = min(int(request.query_params.get('points', 500)), 5000)
+        except ValueError:
+            return Response(
+                {'error': 'points must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        resolution = request.query_params.get('resolution', None)
+        if resolution not in RESOLUTIONS:
+            resolution = choose_resolution(start, end, max(points, 1))
+        
+        rollups = TelemetryRollup.objects.filter(
+            equipment_id=equipment_id,
+            resolution=resolution,
+            bucket_start__gte=bucket_start(start, resolution),
+            bucket_start__lt=end,
+        )
+        if parameter:
+            rollups = rollups.filter(parameter_type=parameter)
+        rollups = rollups.order_by('parameter_type', 'bucket_start').values_list(
+            'parameter_type', 'bucket_start', 'reading_count', 'value_sum', 'value_min', 'value_max'
+        )
+        
+        return Response({
+            'equipment': equipment_id,
+            'resolution': resolution,
+            'start': start,
+            'end': end,
+            'results': [
+                {
+                    'parameter_type': parameter_type,
+                    'bucket': bucket,
+                    'count': count,
+                    'min': value_min,
+                    'max': value_max,
+                    'avg': value_sum / count if count else None,
+                }
+                for parameter_type, bucket, count, value_sum, value_min, value_max in rollups
+            ],
+        })
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(SparseFieldsMixin, ConditionalGetMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
     """ViewSet for Ticket model"""
     queryset = Ticket.objects.select_related(
         'equipment', 'assigned_team', 'assigned_technician', 'created_by'
-    ).prefetch_related('messages').annotate(
-        message_count=Count('messages')
     ).all()
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description', 'equipment__name']
+    validator_scopes = ('equipment', 'teams', 'users')
+    pagination_class = KeysetPagination
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_kind = 'ticket'
+    search_related = {'equipment_id': 'equipment'}
     ordering_fields = ['created_at', 'updated_at', 'priority']
     ordering = ['-created_at']
+    export_dataset = TICKETS
+    export_uuid_params = ('equipment', 'assigned_to', 'team')
     
     def get_serializer_class(self):
         """Use detailed serializer for retrieve action"""
@@ -229,8 +544,28 @@ class TicketViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter tickets by various criteria"""
-        queryset = super().get_queryset()
+        queryset = self.filter_tickets(super().get_queryset())
+        if self.field_requested('messages_count'):
+            queryset = queryset.annotate(message_count=Count('messages'))
         
+        # Only the detail view renders message bodies; lists use message_count
+        if self.action == 'retrieve' and self.field_requested('messages'):
+            queryset = queryset.prefetch_related(
+                Prefetch('messages', queryset=Message.objects.select_related('user'))
+            )
+        
+        return queryset
+    
+    def get_validator_queryset(self):
+        """Validators only need the filtered rows, not the message count join"""
+        return self.filter_queryset(self.filter_tickets(Ticket.objects.all()))
+    
+    def export_rows(self, start, end):
+        """Filtered tickets without the message count join (see core/exports.py)"""
+        return TICKETS.rows(self.filter_tickets(Ticket.objects.all()), start, end)
+    
+    def filter_tickets(self, queryset):
+        """Apply the query parameter filters"""
         stage = self.request.query_params.get('stage', None)
         priority = self.request.query_params.get('priority', None)
         request_type = self.request.query_params.get('request_type', None)
@@ -251,6 +586,13 @@ class TicketViewSet(viewsets.ModelViewSet):
         if team_id:
             queryset = queryset.filter(assigned_team_id=team_id)
         
+        subtree_id = self.request.query_params.get('hierarchy_subtree', None)
+        if subtree_id:
+            node_ids = hierarchy_subtree_ids(subtree_id)
+            if node_ids is None:
+                return queryset.none()
+            queryset = queryset.filter(equipment__asset_hierarchy_id__in=node_ids)
+        
         return queryset
     
     def perform_create(self, serializer):
@@ -272,11 +614,17 @@ class TicketViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(SparseFieldsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Message model"""
     queryset = Message.objects.select_related('user', 'ticket').all()
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_backends = [FullTextSearchFilter]
+    search_kind = 'message'
+    ordering = ['created_at']
+    validator_scopes = ('users',)
+    validator_related = ('ticket',)
     
     def get_queryset(self):
         """Filter messages by ticket"""
@@ -186,15 +186,14 @@ for eq in random.sample(equipment_list, 30):
     for _ in range(random.randint(10, 50)):
         param = random.choice(['Temperature', 'Vibration', 'Running_Hours', 'Pressure'])
         value = random.uniform(20, 150)
-        is_anomaly = value > 120 or value < 30
         
+        # Left unprocessed: `manage.py process_telemetry --once` scores
+        # them with the anomaly detector and fills the rollups
         MachineTelemetryLog.objects.create(
             equipment=eq,
             parameter_type=param,
             value=value,
             reading_date_time=fake.date_time_between(start_date='-7d', end_date='now'),
-            is_anomaly=is_anomaly,
-            processed_flag=random.choice([True, False])
         )
         telemetry_count += 1
 